@@ -12,8 +12,10 @@ from app.db.base import Base  # здесь будут модели
 config = context.config
 
 # Настраиваем URL из настроек приложения
+# ('%' удваивается: alembic.ini читается configparser с интерполяцией,
+# а в URL экранированные спецсимволы пароля, например %40)
 settings = get_settings()
-config.set_main_option("sqlalchemy.url", settings.SQLALCHEMY_DATABASE_URI)
+config.set_main_option("sqlalchemy.url", settings.SQLALCHEMY_DATABASE_URI.replace("%", "%%"))
 
 # Интерпретируем файл конфигурации для логгера.
 if config.config_file_name is not None:
@@ -0,0 +1,74 @@
+"""add project search indexes
+
+Revision ID: 2f6a9c1d7e34
+Revises: 8bc86799de97
+Create Date: 2026-10-19 12:00:00.000000
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "2f6a9c1d7e34"
+down_revision = "8bc86799de97"
+branch_labels = None
+depends_on = None
+
+
+# Выражения скопированы из app/models/project.py (PROJECT_*_SQL): поиск
+# подставляет их в запрос дословно, иначе планировщик не узнает индекс.
+SEARCH_DOCUMENT = "to_tsvector('russian'::regconfig, coalesce(name, '') || ' ' || coalesce(description, ''))"
+STATE_COUNT = (
+    "(CASE WHEN jsonb_typeof(config -> 'fsm' -> 'states') = 'array' "
+    "THEN jsonb_array_length(config -> 'fsm' -> 'states') END)"
+)
+TRANSITION_COUNT = (
+    "(CASE WHEN jsonb_typeof(config -> 'fsm' -> 'transitions') = 'array' "
+    "THEN jsonb_array_length(config -> 'fsm' -> 'transitions') END)"
+)
+UNSUPPORTED_CONDITION = (
+    r"""config @? '$.fsm.transitions[*] ? (@.condition.type() == "string" && """
+    r"""!(@.condition like_regex "^\\s*(call_received|door_timer_expired|arrived_at_floor|"""
+    r"""obstacle_detected|tick|always|\\*)?\\s*$" flag "i"))'::jsonpath"""
+)
+
+
+def upgrade() -> None:
+    # config @> '{"fsm": {"states": [{"id": ...}]}}' и прочие @> / @? по config
+    op.create_index(
+        "ix_projects_config_path_ops",
+        "projects",
+        ["config"],
+        postgresql_using="gin",
+        postgresql_ops={"config": "jsonb_path_ops"},
+    )
+    # полнотекстовый поиск по имени и описанию
+    op.create_index(
+        "ix_projects_search_document",
+        "projects",
+        [sa.text(SEARCH_DOCUMENT)],
+        postgresql_using="gin",
+    )
+    # диапазоны числа состояний / переходов FSM
+    op.create_index("ix_projects_state_count", "projects", [sa.text(STATE_COUNT)])
+    op.create_index("ix_projects_transition_count", "projects", [sa.text(TRANSITION_COUNT)])
+    # частичный индекс: только проекты с неподдерживаемыми условиями переходов
+    op.create_index(
+        "ix_projects_unsupported_condition",
+        "projects",
+        ["id"],
+        postgresql_where=sa.text(UNSUPPORTED_CONDITION),
+    )
+    # фильтр по статусу + keyset по id
+    op.create_index("ix_projects_status_id", "projects", ["status", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_projects_status_id", table_name="projects")
+    op.drop_index("ix_projects_unsupported_condition", table_name="projects")
+    op.drop_index("ix_projects_transition_count", table_name="projects")
+    op.drop_index("ix_projects_state_count", table_name="projects")
+    op.drop_index("ix_projects_search_document", table_name="projects")
+    op.drop_index("ix_projects_config_path_ops", table_name="projects")
@@ -0,0 +1,30 @@
+"""add projects (owner_id, id) index
+
+Revision ID: 8bc86799de97
+Revises: 4d2943523621
+Create Date: 2026-10-19 10:00:00.000000
+"""
+from __future__ import annotations
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "8bc86799de97"
+down_revision = "4d2943523621"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # keyset-пагинация списка проектов владельца: WHERE owner_id = ? AND id > ? ORDER BY id
+    op.create_index(
+        "ix_projects_owner_id_id",
+        "projects",
+        ["owner_id", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_projects_owner_id_id", table_name="projects")
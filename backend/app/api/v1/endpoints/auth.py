@@ -2,15 +2,21 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from jose import JWTError
 from pydantic import BaseModel, EmailStr
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app import models, schemas
 from app.core.security import (
-    get_password_hash,
-    verify_password,
+    REFRESH_TOKEN_TYPE,
     create_access_token,
+    create_refresh_token,
+    decode_token,
+    get_password_hash_async,
+    password_needs_rehash,
+    verify_password_async,
 )
 
 router = APIRouter()
@@ -30,7 +36,7 @@ class LoginRequest(BaseModel):
     response_model=schemas.User,
     status_code=status.HTTP_201_CREATED,
 )
-def register(user_in: schemas.UserCreate, db: Session = Depends(get_db)):
+async def register(user_in: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Регистрация нового пользователя.
 
@@ -43,12 +49,10 @@ def register(user_in: schemas.UserCreate, db: Session = Depends(get_db)):
       "is_active": true
     }
     """
-    existing = (
-        db.query(models.User)
-        .filter(models.User.email == user_in.email)
-        .first()
+    existing = await db.scalar(
+        select(models.User.id).where(models.User.email == user_in.email)
     )
-    if existing:
+    if existing is not None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Пользователь с таким email уже существует",
@@ -60,17 +64,23 @@ def register(user_in: schemas.UserCreate, db: Session = Depends(get_db)):
     else:
         db_role = models.UserRole.student
 
+    # bcrypt занимает сотни миллисекунд CPU и ждёт в очереди ограниченного
+    # пула; соединение с БД на это время возвращаем в пул, чтобы волна
+    # регистраций/логинов не забирала его у остальных эндпоинтов
+    await db.close()
+    hashed_password = await get_password_hash_async(user_in.password)
+
     db_user = models.User(
         email=user_in.email,
         full_name=user_in.full_name,
-        hashed_password=get_password_hash(user_in.password),
+        hashed_password=hashed_password,
         role=db_role,
         is_active=user_in.is_active,
     )
 
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 
@@ -80,7 +90,7 @@ def register(user_in: schemas.UserCreate, db: Session = Depends(get_db)):
     "/login",
     response_model=schemas.AuthResponse,
 )
-def login(payload: LoginRequest, db: Session = Depends(get_db)):
+async def login(payload: LoginRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Принимаем JSON:
     {
@@ -91,19 +101,31 @@ def login(payload: LoginRequest, db: Session = Depends(get_db)):
     - access_token
     - user (с full_name, role и т.д.)
     """
-    user = (
-        db.query(models.User)
-        .filter(models.User.email == payload.email)
-        .first()
+    user = await db.scalar(
+        select(models.User).where(models.User.email == payload.email)
     )
 
-    if not user or not verify_password(payload.password, user.hashed_password):
+    # объект остаётся загруженным (detached), соединение уходит обратно
+    # в пул до проверки пароля — см. register
+    await db.close()
+
+    if not user or not await verify_password_async(payload.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Неверный email или пароль",
         )
 
+    # cost factor поменяли в настройках — пересчитываем хеш, пока пароль известен;
+    # соединение берётся заново только для записи
+    if password_needs_rehash(user.hashed_password):
+        hashed_password = await get_password_hash_async(payload.password)
+        user = await db.merge(user, load=False)
+        user.hashed_password = hashed_password
+        await db.commit()
+        await db.refresh(user)
+
     access_token = create_access_token(str(user.id))
+    refresh_token = create_refresh_token(str(user.id))
 
     # ВАЖНО: заворачиваем SQLAlchemy-модель в pydantic-схему User,
     # чтобы гарантированно получить правильный JSON.
@@ -111,5 +133,40 @@ def login(payload: LoginRequest, db: Session = Depends(get_db)):
 
     return schemas.AuthResponse(
         access_token=access_token,
+        refresh_token=refresh_token,
         user=user_schema,
     )
+
+
+# ---------- ОБНОВЛЕНИЕ ТОКЕНА ----------
+
+@router.post(
+    "/refresh",
+    response_model=schemas.Token,
+)
+async def refresh(payload: schemas.RefreshRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Обмен refresh-токена на новую пару access/refresh без пароля.
+    Заблокированный или удалённый пользователь получает 401.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Недействительный refresh-токен",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        claims = decode_token(payload.refresh_token, REFRESH_TOKEN_TYPE)
+        user_id = int(claims["sub"])
+    except (JWTError, KeyError, ValueError):
+        raise credentials_exception
+
+    is_active = await db.scalar(
+        select(models.User.is_active).where(models.User.id == user_id)
+    )
+    if not is_active:
+        raise credentials_exception
+
+    return schemas.Token(
+        access_token=create_access_token(str(user_id)),
+        refresh_token=create_refresh_token(str(user_id)),
+    )
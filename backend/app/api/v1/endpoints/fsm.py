@@ -1,19 +1,117 @@
 from fastapi import APIRouter, HTTPException, status
 
-from app.schemas.fsm import FSMDefinition
+from app.schemas.fsm import (
+    FSMCostReport,
+    FSMDefinition,
+    FSMEquivalenceRequest,
+    FSMEquivalenceResult,
+    FSMMinimizationResult,
+    FSMModelCheckRequest,
+    FSMModelCheckResult,
+    FSMValidationIssue,
+    FSMValidationReport,
+)
+from app.services.fsm_cost import estimate_fsm_cost
+from app.services.fsm_minimization import check_fsm_equivalence, minimize_fsm
+from app.services.fsm_model_check import ModelCheckLimitError, check_fsm_invariants
+from app.services.fsm_validation import validate_fsm_structure
 
 router = APIRouter()
 
 
 @router.post(
     "/validate",
+    response_model=FSMValidationReport,
     summary="Проверить корректность FSM",
 )
 def validate_fsm(fsm: FSMDefinition):
     """
-    Просто пробуем валидировать FSMDefinition.
-    Если что-то не так — Pydantic выбросит ошибку и FastAPI вернёт 422.
-    Возвращаем простой ответ, если всё ок.
+    Сначала FSMDefinition проходит валидацию Pydantic
+    (если что-то не так — FastAPI вернёт 422).
+    Затем выполняется структурный анализ графа автомата:
+    достижимость, тупики, невозвратные состояния, недетерминизм,
+    safety-правило «двери открыты -> движение».
+    """
+    issues = [
+        FSMValidationIssue(
+            level=issue.level,
+            code=issue.code,
+            message=issue.message,
+            state_ids=issue.state_ids,
+            transition_ids=issue.transition_ids,
+        )
+        for issue in validate_fsm_structure(fsm)
+    ]
+    return FSMValidationReport(
+        valid=not any(issue.level == "error" for issue in issues),
+        issues=issues,
+    )
+
+
+@router.post(
+    "/model-check",
+    response_model=FSMModelCheckResult,
+    summary="Исчерпывающая проверка safety-инвариантов FSM",
+)
+def model_check_fsm(payload: FSMModelCheckRequest):
+    """
+    Перебирает все достижимые комбинации (состояние FSM, этаж, ожидающий вызов)
+    и проверяет инварианты:
+    - лифт никогда не начинает движение с открытыми дверями;
+    - every_call_can_be_served: из любого достижимого состояния вызов может
+      быть обслужен (EF; то же, что AF при справедливости по переходам);
+    - every_call_eventually_served: вызов обслуживается на любом пути, где
+      каждое доступное событие (тип, этаж) приходит бесконечно часто.
+    Для нарушенного инварианта возвращается контрпример — кратчайшая
+    последовательность событий (для every_call_eventually_served — до цикла,
+    по которому можно ходить без обслуживания).
+    Слишком большое пространство состояний (MODEL_CHECK_MAX_TRANSITIONS) — 422.
+    """
+    try:
+        return check_fsm_invariants(payload.fsm, payload.floors)
+    except ModelCheckLimitError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+
+
+@router.post(
+    "/minimize",
+    response_model=FSMMinimizationResult,
+    summary="Минимизировать FSM",
+)
+def minimize(fsm: FSMDefinition):
+    """
+    Склеивает эквивалентные состояния (алгоритм Хопкрофта).
+    Алфавит — пары (event_type, condition); состояния эквивалентны, если
+    у них совпадают выходы, действия и цепочки переходов с учётом приоритета.
+    Состояния с «говорящими» id (idle, moving_up, doors_open, ...) сохраняются.
+    """
+    return minimize_fsm(fsm)
+
+
+@router.post(
+    "/equivalence",
+    response_model=FSMEquivalenceResult,
+    summary="Проверить эквивалентность двух FSM",
+)
+def equivalence(payload: FSMEquivalenceRequest):
+    """
+    Два FSM эквивалентны, если их начальные состояния попадают в один
+    класс при минимизации объединённого автомата. Иначе возвращается
+    кратчайшая различающая последовательность меток.
+    """
+    return check_fsm_equivalence(payload.left, payload.right)
+
+
+@router.post(
+    "/cost",
+    response_model=FSMCostReport,
+    summary="Оценить аппаратную стоимость экспортируемого FSM",
+)
+def cost(fsm: FSMDefinition):
+    """
+    Оценка по графу автомата, без синтеза: триггеры и термы/литералы
+    логики next_state для каждого кодирования, глубина цепочек
+    if / else if в ветках case, выходная логика. Рекомендуется
+    кодирование с минимальной оценкой площади.
     """
-    # Если мы здесь — значит, схема успешно провалилась через валидацию
-    return {"valid": True}
+    return estimate_fsm_cost(fsm)
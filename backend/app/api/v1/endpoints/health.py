@@ -1,8 +1,25 @@
 from fastapi import APIRouter
 
+from app.core.auth_cache import auth_cache_stats
+from app.services.fsm_codegen import codegen_cache_stats
+from app.services.fsm_export import verilog_cache_stats
+from app.services.project_config_cache import project_config_cache_stats
+from app.services.simulation_executor import simulation_executor
+
 router = APIRouter()
 
 
 @router.get("/", summary="Health check")
 def health_check():
     return {"status": "ok"}
+
+
+@router.get("/caches", summary="Статистика кэшей и исполнителя симуляций")
+def cache_stats():
+    return {
+        "auth_users": auth_cache_stats(),
+        "project_config": project_config_cache_stats(),
+        "verilog_export": verilog_cache_stats(),
+        "simulation_codegen": codegen_cache_stats(),
+        "simulation_executor": simulation_executor.stats(),
+    }
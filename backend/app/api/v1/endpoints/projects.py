@@ -1,30 +1,202 @@
 # app/api/v1/endpoints/projects.py
 from __future__ import annotations
 
-from typing import List, Optional
-
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import shutil
+import tempfile
+import zipfile
+from typing import Any, AsyncIterator, Dict, Hashable, Iterator, List, Optional, Sequence, Union
+
+from fastapi import APIRouter, Body, Depends, File, Form, Header, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, func, insert, literal_column, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer, selectinload
 
 from app import models, schemas
-from app.db.session import get_db
+from app.db.session import AsyncSessionLocal, get_async_db
+from app.models.project import (
+    PROJECT_SEARCH_DOCUMENT_SQL,
+    PROJECT_STATE_COUNT_SQL,
+    PROJECT_TRANSITION_COUNT_SQL,
+    PROJECT_UNSUPPORTED_CONDITION_SQL,
+)
+from app.core.config import settings
 from app.core.deps import get_current_user, get_current_teacher
 from app.services.simulation import simulate, SimulationValidationError
-from app.services.fsm_validation import validate_fsm_for_export, FSMValidationError
-from app.services.fsm_verilog import generate_verilog_from_fsm
+from app.services.fsm_codegen import simulate_compiled
+from app.services.simulation_executor import (
+    SimulationRejected,
+    SimulationReservation,
+    estimate_simulation_cost,
+    simulation_executor,
+)
+from app.services.fsm_validation import FSMValidationError
+from app.services.vcd import stream_simulation_vcd
+from app.services.cosimulation import VCDParseError, cosimulate_path
+from app.services.fsm_export import (
+    export_verilog,
+    stream_verilog,
+    verilog_export_etag,
+)
+from app.services.fsm_lut import export_lookup_table_zip
+from app.services.project_bulk import (
+    RawDocument,
+    ZipStream,
+    iter_zip_documents,
+    parse_import_batch,
+    take,
+    write_project_entry,
+)
+from app.services.config_patch import (
+    ConfigPatchError,
+    build_patch_statements,
+    describe_step,
+    json_patch_steps,
+    merge_patch_steps,
+)
+from app.services.project_config_cache import (
+    ParsedProjectConfig,
+    get_parsed_config,
+    invalidate_project_config,
+    store_parsed_config,
+)
+from app.utils.etag import etag_matches, etag_matches_strong, make_etag
 
 router = APIRouter()
 
 
+async def _fetch_project(db: AsyncSession, project_id: int) -> Optional[models.Project]:
+    """
+    Проект вместе с владельцем (owner входит в schemas.Project).
+    Ленивой подгрузки в async-сессии нет, поэтому связь грузится сразу;
+    populate_existing перечитывает и уже загруженный объект
+    (updated_at и прочие значения, выставленные сервером).
+    """
+    result = await db.execute(
+        select(models.Project)
+        .options(selectinload(models.Project.owner))
+        .where(models.Project.id == project_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
+
+
+async def _fetch_project_access(db: AsyncSession, project_id: int):
+    """
+    Только (owner_id, updated_at) — для проверки доступа и ключа кэша
+    разобранного config; сам JSONB здесь не читается.
+    """
+    result = await db.execute(
+        select(models.Project.owner_id, models.Project.updated_at).where(models.Project.id == project_id)
+    )
+    return result.one_or_none()
+
+
+async def _fetch_parsed_config(db: AsyncSession, project_id: int, updated_at) -> ParsedProjectConfig:
+    """
+    Разобранный config версии updated_at: из кэша или из БД (config читается
+    вместе с updated_at одним запросом, чтобы ключ соответствовал данным).
+    """
+    parsed = get_parsed_config(project_id, updated_at)
+    if parsed is not None:
+        return parsed
+    row = (
+        await db.execute(
+            select(models.Project.config, models.Project.updated_at).where(models.Project.id == project_id)
+        )
+    ).one_or_none()
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Проект не найден",
+        )
+    return store_parsed_config(project_id, row.updated_at, row.config)
+
+
+# Ответы с ETag кэшируются только в браузере пользователя и всегда
+# перепроверяются (If-None-Match -> 304 без тела).
+_REVALIDATE = "private, no-cache"
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": _REVALIDATE},
+    )
+
+
+def _version_etag(project_id: int, updated_at) -> str:
+    """Версия строки проекта: ETag экспорта и If-Match для PATCH config."""
+    return make_etag("project-version", project_id, updated_at.isoformat())
+
+
+def _project_etag(project_id: int, updated_at, owner_id: Optional[int], owner_updated_at) -> str:
+    # владелец входит в ответ GET /projects/{id}, поэтому учитывается и его версия
+    return make_etag("project", project_id, updated_at.isoformat(), owner_id,
+                     owner_updated_at.isoformat() if owner_updated_at else "")
+
+
 # ---------- CRUD проектов ----------
 
 
+def _visible_projects(current_user: models.User, student_id: Optional[int], own_only: bool) -> list:
+    """Условия WHERE для списка проектов (общие для списка и массового экспорта)."""
+    if current_user.role == models.UserRole.student:
+        # студент всегда видит только свои проекты
+        return [models.Project.owner_id == current_user.id]
+    # teacher / admin
+    if own_only:
+        return [models.Project.owner_id == current_user.id]
+    if student_id is not None:
+        return [models.Project.owner_id == student_id]
+    # иначе без фильтра — все проекты
+    return []
+
+
+async def _list_page(
+    db: AsyncSession,
+    q: Select,
+    response: Response,
+    after_id: Optional[int],
+    limit: Optional[int],
+    fields: schemas.ProjectListFields,
+) -> Sequence:
+    """
+    Страница списка проектов: keyset по id (WHERE id > after_id ORDER BY id
+    LIMIT n — без OFFSET, цена не растёт с номером страницы) и два запроса
+    независимо от размера: проекты + владельцы через selectinload.
+    Если страница заполнена, id последнего проекта уходит в X-Next-After-Id.
+    В режиме summary колонка config не читается, в ответе config = null.
+    """
+    q = q.options(selectinload(models.Project.owner))
+    if fields == schemas.ProjectListFields.summary:
+        q = q.options(defer(models.Project.config, raiseload=True))
+    if after_id is not None:
+        q = q.where(models.Project.id > after_id)
+    q = q.order_by(models.Project.id)
+    if limit is not None:
+        q = q.limit(limit)
+
+    projects = (await db.scalars(q)).all()
+    if limit is not None and len(projects) == limit:
+        response.headers["X-Next-After-Id"] = str(projects[-1].id)
+
+    if fields == schemas.ProjectListFields.summary:
+        return [schemas.ProjectSummary.model_validate(p) for p in projects]
+    return projects
+
+
 @router.get("/", response_model=List[schemas.Project])
-def list_projects(
-    db: Session = Depends(get_db),
+async def list_projects(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_user),
     student_id: Optional[int] = None,
     own_only: bool = False,  # <--- НОВЫЙ параметр
+    after_id: Optional[int] = Query(None, description="Курсор: проекты с id больше этого"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.PROJECT_LIST_MAX_LIMIT, description="Размер страницы"),
+    fields: schemas.ProjectListFields = schemas.ProjectListFields.full,
 ):
     """
     Студент: видит только свои проекты.
@@ -32,41 +204,31 @@ def list_projects(
       - если own_only=true -> только свои проекты (owner_id = current_user.id);
       - если передан student_id -> проекты выбранного студента;
       - иначе -> все проекты.
-    """
-    q = db.query(models.Project)
 
-    if current_user.role == models.UserRole.student:
-        # студент всегда видит только свои проекты
-        q = q.filter(models.Project.owner_id == current_user.id)
-    else:
-        # teacher / admin
-        if own_only:
-            q = q.filter(models.Project.owner_id == current_user.id)
-        elif student_id is not None:
-            q = q.filter(models.Project.owner_id == student_id)
-        # иначе без фильтра — все проекты
-
-    projects = q.order_by(models.Project.id).all()
-    return projects
+    Пагинация: limit + after_id (следующий курсор — заголовок X-Next-After-Id);
+    fields=summary — без config.
+    """
+    q = select(models.Project).where(*_visible_projects(current_user, student_id, own_only))
+    return await _list_page(db, q, response, after_id, limit, fields)
 
 
 
 
 @router.get("/my", response_model=List[schemas.Project], summary="Мои проекты")
-def list_my_projects(
-    db: Session = Depends(get_db),
+async def list_my_projects(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_user),
+    after_id: Optional[int] = Query(None, description="Курсор: проекты с id больше этого"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.PROJECT_LIST_MAX_LIMIT, description="Размер страницы"),
+    fields: schemas.ProjectListFields = schemas.ProjectListFields.full,
 ):
     """
     Возвращает проекты текущего пользователя (студент/преподаватель/админ).
+    Параметры пагинации и fields — как у списка всех проектов.
     """
-    projects = (
-        db.query(models.Project)
-        .filter(models.Project.owner_id == current_user.id)
-        .order_by(models.Project.id)
-        .all()
-    )
-    return projects
+    q = select(models.Project).where(models.Project.owner_id == current_user.id)
+    return await _list_page(db, q, response, after_id, limit, fields)
 
 
 @router.post(
@@ -74,9 +236,9 @@ def list_my_projects(
     response_model=schemas.Project,
     status_code=status.HTTP_201_CREATED,
 )
-def create_project(
+async def create_project(
     project_in: schemas.ProjectCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_user),
 ):
     """
@@ -104,9 +266,8 @@ def create_project(
     )
 
     db.add(db_project)
-    db.commit()
-    db.refresh(db_project)
-    return db_project
+    await db.commit()
+    return await _fetch_project(db, db_project.id)
 
 
 @router.post(
@@ -115,9 +276,9 @@ def create_project(
     status_code=status.HTTP_201_CREATED,
     summary="Импортировать проект из JSON",
 )
-def import_project(
+async def import_project(
     project_in: schemas.ProjectImport,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_user),
 ):
     """
@@ -140,34 +301,321 @@ def import_project(
     )
 
     db.add(db_project)
-    db.commit()
-    db.refresh(db_project)
-    return db_project
+    await db.commit()
+    return await _fetch_project(db, db_project.id)
+
+
+# ---------- Массовый импорт / экспорт ----------
+
+# сколько ошибок импорта возвращать в ответе (счётчик failed — полный)
+_BULK_IMPORT_MAX_ERRORS = 100
+
+
+async def _ndjson_documents(request: Request, max_bytes: int) -> AsyncIterator[RawDocument]:
+    """Документы из NDJSON-тела по мере прихода; буфер — не больше одной строки."""
+    buffer = b""
+    number = 0
+    skipping = False  # текущая строка уже длиннее лимита, ждём её конца
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            number += 1
+            if skipping:
+                skipping = False
+                yield f"строка {number}", None
+            elif line.strip():
+                # строка могла целиком прийти в одном чанке — лимит и для неё
+                yield f"строка {number}", line if len(line) <= max_bytes else None
+        if len(buffer) > max_bytes:
+            skipping, buffer = True, b""
+    if skipping:
+        yield f"строка {number + 1}", None
+    elif buffer.strip():
+        yield f"строка {number + 1}", buffer
+
+
+async def _ndjson_batches(request: Request, size: int) -> AsyncIterator[List[RawDocument]]:
+    batch: List[RawDocument] = []
+    async for document in _ndjson_documents(request, settings.PROJECT_BULK_MAX_DOCUMENT_BYTES):
+        batch.append(document)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def _zip_batches(request: Request, size: int) -> AsyncIterator[List[RawDocument]]:
+    """
+    Zip нельзя читать потоком (оглавление в конце), поэтому тело сначала
+    складывается во временный файл (небольшое — в памяти), а документы
+    читаются из него пачками в потоке.
+    """
+    with tempfile.SpooledTemporaryFile(max_size=settings.PROJECT_BULK_SPOOL_BYTES) as spool:
+        async for chunk in request.stream():
+            await run_in_threadpool(spool.write, chunk)
+        spool.seek(0)
+        try:
+            documents = await run_in_threadpool(iter_zip_documents, spool, settings.PROJECT_BULK_MAX_DOCUMENT_BYTES)
+            while batch := await run_in_threadpool(take, documents, size):
+                yield batch
+        except zipfile.BadZipFile:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Некорректный zip-архив",
+            )
+
+
+@router.post(
+    "/import/bulk",
+    response_model=schemas.ProjectBulkImportResult,
+    summary="Массовый импорт проектов (NDJSON или zip)",
+)
+async def import_projects_bulk(
+    request: Request,
+    content_type: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Тело — поток документов ProjectImport:
+    - application/x-ndjson: по документу на строку, читается по мере прихода;
+    - application/zip: архив из *.json (документ на файл) и/или *.ndjson.
+
+    Документы вставляются пачками по PROJECT_BULK_IMPORT_BATCH_SIZE:
+    один INSERT executemany и одна транзакция на пачку. Ошибочные документы
+    пропускаются и перечисляются в ответе, остальные импортируются.
+    Владелец — как у POST /projects/import.
+    """
+    size = settings.PROJECT_BULK_IMPORT_BATCH_SIZE
+    if content_type and "zip" in content_type:
+        batches = _zip_batches(request, size)
+    else:
+        batches = _ndjson_batches(request, size)
+
+    allow_owner = current_user.role != models.UserRole.student
+    imported = failed = 0
+    errors: List[schemas.ProjectBulkImportError] = []
+
+    def report(problems) -> None:
+        nonlocal failed
+        failed += len(problems)
+        for document, detail in problems:
+            if len(errors) < _BULK_IMPORT_MAX_ERRORS:
+                errors.append(schemas.ProjectBulkImportError(document=document, detail=detail))
+
+    async for documents in batches:
+        batch = await run_in_threadpool(parse_import_batch, documents, current_user.id, allow_owner)
+        report(batch.errors)
+
+        # преподаватель мог указать владельцев — проверяем их одним запросом
+        owner_ids = {row["owner_id"] for row in batch.rows} - {current_user.id}
+        if owner_ids:
+            known = set((await db.scalars(select(models.User.id).where(models.User.id.in_(owner_ids)))).all())
+            rows, problems = [], []
+            for label, row in zip(batch.labels, batch.rows):
+                if row["owner_id"] in known or row["owner_id"] == current_user.id:
+                    rows.append(row)
+                else:
+                    problems.append((label, f"owner_id: пользователь {row['owner_id']} не найден"))
+            report(problems)
+        else:
+            rows = batch.rows
+
+        if rows:
+            await db.execute(insert(models.Project), rows)
+            await db.commit()
+            imported += len(rows)
+
+    return schemas.ProjectBulkImportResult(imported=imported, failed=failed, errors=errors)
+
+
+async def _stream_projects_zip(conditions: list) -> AsyncIterator[bytes]:
+    """
+    Архив пишется последовательно: проекты читаются keyset-пачками, каждая
+    пачка — своей короткой сессией (соединение не держится, пока клиент
+    скачивает), и байты каждого проекта сразу уходят клиенту.
+    """
+    sink = ZipStream()
+    archive = zipfile.ZipFile(sink, mode="w")
+    last_id = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            rows = (
+                await db.execute(
+                    select(
+                        models.Project.id,
+                        models.Project.name,
+                        models.Project.description,
+                        models.Project.status,
+                        models.Project.config,
+                    )
+                    .where(*conditions, models.Project.id > last_id)
+                    .order_by(models.Project.id)
+                    .limit(settings.PROJECT_BULK_EXPORT_BATCH_SIZE)
+                )
+            ).all()
+        if not rows:
+            break
+        for row in rows:
+            await run_in_threadpool(write_project_entry, archive, row)
+            yield sink.drain()
+        last_id = rows[-1].id
+    archive.close()
+    yield sink.drain()
+
+
+@router.get(
+    "/export/bulk",
+    summary="Массовый экспорт проектов в zip (JSON + Verilog)",
+)
+async def export_projects_bulk(
+    student_id: Optional[int] = None,
+    own_only: bool = False,
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Zip с папкой на проект: project.json (как GET /export, пригоден для
+    /import/bulk) и fsm.v (или fsm_errors.txt). Выборка — как у списка
+    проектов: студент получает свои, преподаватель — все, проекты
+    студента (student_id) или свои (own_only). Архив собирается потоком,
+    в памяти — только текущий проект.
+    """
+    return StreamingResponse(
+        _stream_projects_zip(_visible_projects(current_user, student_id, own_only)),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="projects.zip"'},
+    )
+
+
+# ---------- поиск ----------
+
+
+_SEARCH_DOCUMENT = literal_column(PROJECT_SEARCH_DOCUMENT_SQL)
+_STATE_COUNT = literal_column(PROJECT_STATE_COUNT_SQL)
+_TRANSITION_COUNT = literal_column(PROJECT_TRANSITION_COUNT_SQL)
+_UNSUPPORTED_CONDITION = literal_column(PROJECT_UNSUPPORTED_CONDITION_SQL)
+
+
+@router.get(
+    "/search",
+    response_model=List[schemas.Project],
+    summary="Поиск проектов по тексту, статусу и свойствам FSM",
+)
+async def search_projects(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user),
+    q: Optional[str] = Query(None, min_length=1, description="Текст в имени или описании (websearch-синтаксис)"),
+    project_status: Optional[models.ProjectStatus] = Query(None, alias="status"),
+    min_states: Optional[int] = Query(None, ge=0),
+    max_states: Optional[int] = Query(None, ge=0),
+    min_transitions: Optional[int] = Query(None, ge=0),
+    max_transitions: Optional[int] = Query(None, ge=0),
+    state_id: Optional[str] = Query(None, description="В FSM есть состояние с таким id"),
+    condition: Optional[str] = Query(None, description="В FSM есть переход с таким условием (точное совпадение)"),
+    unsupported_conditions: Optional[bool] = Query(
+        None, description="true — только проекты с неподдерживаемыми условиями переходов"
+    ),
+    student_id: Optional[int] = None,
+    own_only: bool = False,
+    after_id: Optional[int] = Query(None, description="Курсор: проекты с id больше этого"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.PROJECT_LIST_MAX_LIMIT, description="Размер страницы"),
+    fields: schemas.ProjectListFields = schemas.ProjectListFields.full,
+):
+    """
+    Фильтры объединяются через AND, видимость — как у списка проектов.
+    Каждый фильтр обслуживается индексом (миграция 2f6a9c1d7e34):
+      - q — GIN по to_tsvector(имя + описание);
+      - status — (status, id);
+      - min/max_states, min/max_transitions — индексы по выражениям размера FSM;
+      - state_id, condition — GIN jsonb_path_ops по config (@>);
+      - unsupported_conditions=true — частичный индекс; false — обычный фильтр.
+    Пагинация и fields — как у списка проектов.
+    """
+    conditions = _visible_projects(current_user, student_id, own_only)
+    if q is not None:
+        conditions.append(_SEARCH_DOCUMENT.op("@@")(func.websearch_to_tsquery(literal_column("'russian'::regconfig"), q)))
+    if project_status is not None:
+        conditions.append(models.Project.status == project_status)
+    if min_states is not None:
+        conditions.append(_STATE_COUNT >= min_states)
+    if max_states is not None:
+        conditions.append(_STATE_COUNT <= max_states)
+    if min_transitions is not None:
+        conditions.append(_TRANSITION_COUNT >= min_transitions)
+    if max_transitions is not None:
+        conditions.append(_TRANSITION_COUNT <= max_transitions)
+    if state_id is not None:
+        conditions.append(models.Project.config.contains({"fsm": {"states": [{"id": state_id}]}}))
+    if condition is not None:
+        conditions.append(models.Project.config.contains({"fsm": {"transitions": [{"condition": condition}]}}))
+    if unsupported_conditions is not None:
+        conditions.append(
+            _UNSUPPORTED_CONDITION if unsupported_conditions
+            else or_(models.Project.config.is_(None), ~_UNSUPPORTED_CONDITION.self_group())
+        )
+
+    query = select(models.Project).where(*conditions)
+    return await _list_page(db, query, response, after_id, limit, fields)
 
 
 @router.get("/{project_id}", response_model=schemas.Project)
-def get_project(
+async def get_project(
     project_id: int,
-    db: Session = Depends(get_db),
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    project = db.query(models.Project).get(project_id)
-    if not project:
+    """
+    ETag — по updated_at проекта и владельца. Доступ и If-None-Match
+    проверяются лёгким запросом без config; 304 не трогает JSONB вовсе.
+    """
+    version = (
+        await db.execute(
+            select(models.Project.owner_id, models.Project.updated_at, models.User.updated_at)
+            .outerjoin(models.User, models.User.id == models.Project.owner_id)
+            .where(models.Project.id == project_id)
+        )
+    ).one_or_none()
+    if not version:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Проект не найден",
         )
 
     # студент может видеть только свои проекты
+    owner_id, updated_at, owner_updated_at = version
     if (
         current_user.role == models.UserRole.student
-        and project.owner_id != current_user.id
+        and owner_id != current_user.id
     ):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Нет доступа к этому проекту",
         )
 
+    etag = _project_etag(project_id, updated_at, owner_id, owner_updated_at)
+    if etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+
+    project = await _fetch_project(db, project_id)
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Проект не найден",
+        )
+
+    # тег — по фактически отданной версии (строка могла измениться между запросами)
+    response.headers["ETag"] = _project_etag(
+        project.id,
+        project.updated_at,
+        project.owner_id,
+        project.owner.updated_at if project.owner else None,
+    )
+    response.headers["Cache-Control"] = _REVALIDATE
     return project
 
 
@@ -176,17 +624,20 @@ def get_project(
     response_model=schemas.ProjectExport,
     summary="Выгрузить проект в JSON",
 )
-def export_project(
+async def export_project(
     project_id: int,
-    db: Session = Depends(get_db),
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_user),
 ):
     """
     Отдает минимальный JSON проекта (name, description, config) для сохранения в файл.
     Доступ: владелец (student) или преподаватель/admin.
+    ETag — по updated_at; на совпадающий If-None-Match — 304 без чтения config.
     """
-    project = db.query(models.Project).get(project_id)
-    if not project:
+    access = await _fetch_project_access(db, project_id)
+    if not access:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Проект не найден",
@@ -194,13 +645,27 @@ def export_project(
 
     if (
         current_user.role == models.UserRole.student
-        and project.owner_id != current_user.id
+        and access.owner_id != current_user.id
     ):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Нет доступа к проекту",
         )
 
+    etag = _version_etag(project_id, access.updated_at)
+    if etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+
+    project = await db.get(models.Project, project_id)
+    if not project:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Проект не найден",
+        )
+
+    response.headers["ETag"] = _version_etag(project_id, project.updated_at)
+    response.headers["Cache-Control"] = _REVALIDATE
+
     return schemas.ProjectExport(
         name=project.name,
         description=project.description,
@@ -209,18 +674,12 @@ def export_project(
     )
 
 
-@router.post(
-    "/{project_id}/fsm/export",
-    response_model=schemas.FSMVerilogExport,
-    summary="Экспорт FSM проекта в Verilog",
-)
-def export_fsm_verilog(
+async def _project_config_for_export(
     project_id: int,
-    payload: schemas.FSMVerilogExportRequest | None = None,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
-):
-    project = db.query(models.Project).get(project_id)
+    db: AsyncSession,
+    current_user: models.User,
+) -> ParsedProjectConfig:
+    project = await _fetch_project_access(db, project_id)
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -233,41 +692,124 @@ def export_fsm_verilog(
             detail="Нет доступа к проекту",
         )
 
-    if project.config is None:
+    parsed = await _fetch_parsed_config(db, project_id, project.updated_at)
+    if parsed.raw is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="У проекта нет config",
         )
 
-    project_config = schemas.ProjectConfig.model_validate(project.config)
-    fsm = project_config.fsm
+    return parsed
+
+
+@router.post(
+    "/{project_id}/fsm/export",
+    response_model=schemas.FSMVerilogExport,
+    summary="Экспорт FSM проекта в Verilog",
+)
+async def export_fsm_verilog(
+    project_id: int,
+    response: Response,
+    payload: schemas.FSMVerilogExportRequest | None = None,
+    if_none_match: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Результат кэшируется по хэшу FSM, имени модуля и кодированию;
+    ETag позволяет клиенту не скачивать неизменившийся модуль (304).
+    """
+    parsed = await _project_config_for_export(project_id, db, current_user)
+
+    payload = payload or schemas.FSMVerilogExportRequest()
+    module_name = payload.module_name or f"project_{project_id}_fsm"
+    etag = verilog_export_etag(parsed.raw_fsm, module_name, payload.encoding, payload.minimize, parsed.fsm_hash)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
 
     try:
-        validate_fsm_for_export(fsm)
+        etag, verilog = await run_in_threadpool(
+            export_verilog,
+            parsed.raw_fsm,
+            module_name,
+            payload.encoding,
+            payload.minimize,
+            fsm_hash=parsed.fsm_hash,
+            prepare=parsed.export_fsm,
+        )
     except FSMValidationError as exc:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=exc.errors,
         )
 
-    module_name = payload.module_name if payload and payload.module_name else f"project_{project_id}_fsm"
-    verilog = generate_verilog_from_fsm(fsm, module_name)
-
+    response.headers["ETag"] = etag
     return schemas.FSMVerilogExport(
         project_id=project_id,
         module_name=module_name,
+        encoding=payload.encoding,
         verilog=verilog,
     )
 
 
+@router.get(
+    "/{project_id}/fsm/export/download",
+    summary="Скачать FSM проекта как Verilog-файл",
+)
+async def download_fsm_verilog(
+    project_id: int,
+    module_name: Optional[str] = None,
+    encoding: schemas.StateEncoding = schemas.StateEncoding.BINARY,
+    minimize: bool = False,
+    if_none_match: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    То же, что POST /fsm/export, но модуль отдаётся потоком как файл .v,
+    без упаковки в JSON — для очень больших автоматов.
+    """
+    parsed = await _project_config_for_export(project_id, db, current_user)
+
+    module_name = module_name or f"project_{project_id}_fsm"
+    etag = verilog_export_etag(parsed.raw_fsm, module_name, encoding, minimize, parsed.fsm_hash)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    try:
+        etag, chunks = await run_in_threadpool(
+            stream_verilog,
+            parsed.raw_fsm,
+            module_name,
+            encoding,
+            minimize,
+            fsm_hash=parsed.fsm_hash,
+            prepare=parsed.export_fsm,
+        )
+    except FSMValidationError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=exc.errors,
+        )
+
+    return StreamingResponse(
+        chunks,
+        media_type="text/x-verilog; charset=utf-8",
+        headers={
+            "ETag": etag,
+            "Content-Disposition": f'attachment; filename="{module_name}.v"',
+        },
+    )
+
+
 @router.put("/{project_id}", response_model=schemas.Project)
-def update_project(
+async def update_project(
     project_id: int,
     project_in: schemas.ProjectUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    project = db.query(models.Project).get(project_id)
+    project = await db.get(models.Project, project_id)
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -299,21 +841,131 @@ def update_project(
         project.owner_id = project_in.owner_id
 
     db.add(project)
-    db.commit()
-    db.refresh(project)
-    return project
+    await db.commit()
+    invalidate_project_config(project_id)
+    return await _fetch_project(db, project_id)
+
+
+@router.patch(
+    "/{project_id}/config",
+    response_model=schemas.ProjectConfigPatchResult,
+    summary="Частичное обновление config (JSON Patch / merge-patch)",
+)
+async def patch_project_config(
+    project_id: int,
+    response: Response,
+    patch: Union[List[schemas.JsonPatchOperation], Dict[str, Any]] = Body(...),
+    content_type: Optional[str] = Header(default=None),
+    if_match: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Тело — массив операций JSON Patch (application/json-patch+json) или
+    объект JSON Merge Patch (application/merge-patch+json).
+
+    Патч выполняется в БД одним UPDATE через jsonb_set / jsonb_insert / #-,
+    без чтения и перезаписи config на стороне приложения. Проверяется только
+    записываемое поддерево (тип узла по схеме ProjectConfig); целостность
+    FSM (ссылки переходов и т.п.) — как и у PUT, при симуляции и экспорте.
+
+    If-Match — ETag версии (из ответа PATCH или GET /export), сравнение
+    сильное (слабый W/-тег — 412): если проект успел измениться, 412.
+    Без If-Match (или с '*') операции накладываются на текущую версию.
+    Неприменимая операция (нет пути, не прошёл test) — 409.
+    """
+    is_merge = bool(content_type and "merge-patch" in content_type)
+    if is_merge and isinstance(patch, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="merge-patch ожидает объект, а не массив операций",
+        )
+
+    access = await _fetch_project_access(db, project_id)
+    if not access:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Проект не найден",
+        )
+
+    # студент может редактировать только свои проекты
+    if (
+        current_user.role == models.UserRole.student
+        and access.owner_id != current_user.id
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Нет доступа к этому проекту",
+        )
+
+    if if_match is not None and not etag_matches_strong(if_match, _version_etag(project_id, access.updated_at)):
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Проект изменился, перечитайте его",
+        )
+
+    try:
+        steps = json_patch_steps(patch) if isinstance(patch, list) else merge_patch_steps(patch)
+    except ConfigPatchError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=exc.errors,
+        )
+    if len(steps) > settings.PROJECT_CONFIG_PATCH_MAX_STEPS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Слишком большой патч (больше {settings.PROJECT_CONFIG_PATCH_MAX_STEPS} операций), используйте PUT",
+        )
+
+    # '*' не привязывает патч к версии: проект лишь должен существовать
+    pinned = if_match is not None and if_match.strip() != "*"
+    update_stmt, failed_stmt = build_patch_statements(
+        project_id,
+        steps,
+        access.updated_at if pinned else None,
+    )
+    updated_at = await db.scalar(update_stmt)
+    if updated_at is None:
+        # строки нет в s0 — проект удалили после проверки доступа
+        outcome = (await db.execute(failed_stmt)).first()
+        await db.rollback()
+        if outcome is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Проект не найден",
+            )
+        failed = outcome.failed
+        if failed is None:
+            # предусловия выполнены — значит, строку изменили между запросами
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="Проект изменился, перечитайте его",
+            )
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Операция не применима: {describe_step(steps[failed - 1])}",
+        )
+    await db.commit()
+    invalidate_project_config(project_id)
+
+    response.headers["ETag"] = _version_etag(project_id, updated_at)
+    return schemas.ProjectConfigPatchResult(
+        project_id=project_id,
+        updated_at=updated_at,
+        operations=len(steps),
+    )
 
 
 @router.delete(
     "/{project_id}",
     status_code=status.HTTP_204_NO_CONTENT,
 )
-def delete_project(
+async def delete_project(
     project_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    project = db.query(models.Project).get(project_id)
+    project = await db.get(models.Project, project_id)
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -330,37 +982,22 @@ def delete_project(
             detail="Нет доступа к этому проекту",
         )
 
-    db.delete(project)
-    db.commit()
+    await db.delete(project)
+    await db.commit()
+    invalidate_project_config(project_id)
     return
 
 
 # ---------- Симуляция ----------
 
 
-@router.post(
-    "/{project_id}/simulate",
-    response_model=schemas.SimulationResult,
-    summary="Запустить симуляцию для сохранённого проекта",
-)
-def simulate_project(
+async def _project_simulation_request(
     project_id: int,
     payload: schemas.ProjectSimulationRequest,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
-):
-    """
-    Берём Project по ID, достаём из config:
-    - elevator
-    - fsm
-    - default_scenario
-    и запускаем симуляцию.
-    Можно переопределить:
-    - сценарий (payload.scenario)
-    - конфиг лифта (payload.config_override)
-    """
-
-    project = db.query(models.Project).get(project_id)
+    db: AsyncSession,
+    current_user: models.User,
+) -> schemas.SimulationRequest:
+    project = await _fetch_project_access(db, project_id)
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -377,15 +1014,16 @@ def simulate_project(
             detail="Нет доступа к этому проекту",
         )
 
-    if project.config is None:
+    parsed = await _fetch_parsed_config(db, project_id, project.updated_at)
+    if parsed.raw is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Project has no config",
         )
 
-    # Восстанавливаем ProjectConfig из JSON в БД
+    # ProjectConfig из JSON в БД — разбирается один раз на версию проекта
     try:
-        project_config = schemas.ProjectConfig.model_validate(project.config)
+        project_config = parsed.project_config
     except Exception as e:  # noqa: BLE001
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -403,16 +1041,235 @@ def simulate_project(
             detail="No scenario provided and project has no default_scenario",
         )
 
-    sim_request = schemas.SimulationRequest(
+    return schemas.SimulationRequest(
         project_id=project_id,
         config=elevator_config,
         fsm=project_config.fsm,
         scenario=scenario,
     )
 
+
+def _simulation_rejected(exc: SimulationRejected) -> HTTPException:
+    return HTTPException(
+        status_code=exc.status_code,
+        detail=exc.detail,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+async def _stream_in_slot(
+    reservation: Optional[SimulationReservation],
+    user: Hashable,
+    cost: int,
+    chunks: Iterator[str],
+) -> AsyncIterator[str]:
+    """Потоковый прогон под слотом simulation_executor по резерву из admit()."""
+    async with simulation_executor.slot(user, cost, reservation=reservation):
+        async for chunk in iterate_in_threadpool(chunks):
+            yield chunk
+
+
+class _ReservedStreamingResponse(StreamingResponse):
+    """
+    Потоковый ответ, который при любом исходе (в том числе если клиент
+    отключился до первого чанка и генератор так и не стартовал) закрывает
+    генератор и возвращает резерв исполнителя.
+    """
+
+    def __init__(self, content: AsyncIterator[str], reservation: Optional[SimulationReservation], **kwargs) -> None:
+        super().__init__(content, **kwargs)
+        self.reservation = reservation
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            try:
+                await self.body_iterator.aclose()
+            finally:
+                simulation_executor.release(self.reservation)
+
+
+@router.post(
+    "/{project_id}/simulate",
+    response_model=schemas.SimulationResult,
+    summary="Запустить симуляцию для сохранённого проекта",
+)
+async def simulate_project(
+    project_id: int,
+    payload: schemas.ProjectSimulationRequest,
+    metrics_only: bool = False,
+    minimize: bool = False,
+    compiled: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Берём Project по ID, достаём из config:
+    - elevator
+    - fsm
+    - default_scenario
+    и запускаем симуляцию.
+    Можно переопределить:
+    - сценарий (payload.scenario)
+    - конфиг лифта (payload.config_override)
+    metrics_only=true — не строить таймлайн, вернуть только метрики.
+    minimize=true — симулировать минимизированный автомат.
+    compiled=true — прогон на сгенерированном для FSM коде.
+    Тяжёлые прогоны выполняются в отдельном пуле процессов; при перегрузке —
+    503 (очередь заполнена) или 429 (слишком много прогонов пользователя)
+    с заголовком Retry-After.
+    """
+    sim_request = await _project_simulation_request(project_id, payload, db, current_user)
+
+    run = simulate_compiled if compiled else simulate
+    cost = estimate_simulation_cost(sim_request.fsm, sim_request.scenario)
     try:
-        result = simulate(sim_request)
+        result = await simulation_executor.run(
+            current_user.id,
+            cost,
+            run,
+            sim_request,
+            metrics_only=metrics_only,
+            minimize=minimize,
+        )
         return result
+    except SimulationRejected as exc:
+        raise _simulation_rejected(exc)
+    except SimulationValidationError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "message": exc.message,
+                "errors": exc.errors,
+            },
+        )
+
+
+@router.get(
+    "/{project_id}/fsm/export/c",
+    summary="Скачать FSM проекта как таблицу переходов на C",
+)
+async def download_fsm_lookup_table(
+    project_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    ZIP для микроконтроллеров: заголовок и исходник с плотной таблицей
+    переходов (состояние × символ), тестовая программа, проигрывающая
+    default_scenario проекта, и та же таблица в формате .npy.
+    """
+    parsed = await _project_config_for_export(project_id, db, current_user)
+    try:
+        fsm = parsed.export_fsm()
+    except FSMValidationError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=exc.errors,
+        )
+
+    scenario = parsed.default_scenario
+
+    name = f"project_{project_id}_fsm"
+    content = await run_in_threadpool(export_lookup_table_zip, fsm, scenario, name)
+    return Response(
+        content=content,
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{name}_lut.zip"'},
+    )
+
+
+@router.post(
+    "/{project_id}/fsm/export/vcd",
+    summary="Скачать прогон симуляции проекта в формате VCD",
+)
+async def export_simulation_vcd(
+    project_id: int,
+    payload: schemas.ProjectSimulationRequest | None = None,
+    encoding: schemas.StateEncoding = schemas.StateEncoding.BINARY,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Симуляция сценария проекта (как в /simulate) с записью Value Change Dump:
+    state (код как в экспортированном Verilog), floor, doors_open, direction
+    и входные сигналы. Дамп пишется в ответ по мере симуляции.
+    """
+    sim_request = await _project_simulation_request(
+        project_id,
+        payload or schemas.ProjectSimulationRequest(),
+        db,
+        current_user,
+    )
+    module_name = f"project_{project_id}_fsm"
+
+    # симуляция идёт в генераторе ответа, но слот исполнителя берётся как у
+    # /simulate; отказ 429/503 — до начала ответа, место резервируется сразу
+    cost = estimate_simulation_cost(sim_request.fsm, sim_request.scenario)
+    try:
+        reservation = simulation_executor.admit(current_user.id, cost)
+    except SimulationRejected as exc:
+        raise _simulation_rejected(exc)
+
+    return _ReservedStreamingResponse(
+        _stream_in_slot(reservation, current_user.id, cost, stream_simulation_vcd(sim_request, module_name, encoding)),
+        reservation,
+        media_type="text/x-vcd; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{module_name}.vcd"'},
+    )
+
+
+@router.post(
+    "/{project_id}/fsm/cosim",
+    response_model=schemas.CoSimulationResult,
+    summary="Сравнить VCD внешнего RTL-прогона с симуляцией проекта",
+)
+async def cosimulate_project(
+    project_id: int,
+    vcd: UploadFile = File(..., description="VCD из симулятора HDL"),
+    state_signal: str = Form("state"),
+    encoding: schemas.StateEncoding = Form(schemas.StateEncoding.BINARY),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Студент прогоняет сценарий проекта на своём RTL и загружает VCD.
+    Регистр state_signal переводится в состояния FSM по кодированию
+    экспортированного Verilog и сравнивается с таймлайном simulate():
+    первое расхождение и статистика по последовательности состояний.
+    Файл читается потоково через mmap, размер не ограничен памятью.
+    """
+    sim_request = await _project_simulation_request(
+        project_id,
+        schemas.ProjectSimulationRequest(),
+        db,
+        current_user,
+    )
+
+    # прогон идёт в пуле процессов симуляций: загрузку копируем в именованный
+    # временный файл, воркер читает его через mmap по пути
+    cost = estimate_simulation_cost(sim_request.fsm, sim_request.scenario)
+    try:
+        with tempfile.NamedTemporaryFile(suffix=".vcd") as copy:
+            await run_in_threadpool(shutil.copyfileobj, vcd.file, copy)
+            copy.flush()
+            return await simulation_executor.run(
+                current_user.id,
+                cost,
+                cosimulate_path,
+                copy.name,
+                sim_request,
+                state_signal,
+                encoding,
+            )
+    except SimulationRejected as exc:
+        raise _simulation_rejected(exc)
+    except (VCDParseError, ValueError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Некорректный VCD: {exc}",
+        )
     except SimulationValidationError as exc:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -431,17 +1288,17 @@ def simulate_project(
     response_model=schemas.ProjectReview,
     status_code=status.HTTP_201_CREATED,
 )
-def create_review(
+async def create_review(
     project_id: int,
     review_in: schemas.ProjectReviewCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_teacher: models.User = Depends(get_current_teacher),
 ):
     """
     Преподаватель оставляет рецензию к проекту студента.
     """
-    project = db.query(models.Project).get(project_id)
-    if not project:
+    project_exists = await db.scalar(select(models.Project.id).where(models.Project.id == project_id))
+    if project_exists is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Проект не найден",
@@ -453,8 +1310,8 @@ def create_review(
         comment=review_in.comment,
     )
     db.add(db_review)
-    db.commit()
-    db.refresh(db_review)
+    await db.commit()
+    await db.refresh(db_review)
     db_review.teacher = current_teacher
     return db_review
 
@@ -463,17 +1320,21 @@ def create_review(
     "/{project_id}/reviews",
     response_model=List[schemas.ProjectReview],
 )
-def list_reviews(
+async def list_reviews(
     project_id: int,
-    db: Session = Depends(get_db),
+    response: Response,
+    if_none_match: Optional[str] = Header(default=None),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_user),
 ):
     """
     Просмотр рецензий:
     - студент может видеть рецензии своих проектов;
     - преподаватель может видеть рецензии любых проектов.
+    ETag — по числу рецензий, id последней и версиям их авторов
+    (агрегат по индексу project_id, сами рецензии при 304 не читаются).
     """
-    project = db.query(models.Project).get(project_id)
+    project = await _fetch_project_access(db, project_id)
     if not project:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -489,10 +1350,35 @@ def list_reviews(
             detail="Нет доступа к этому проекту",
         )
 
-    reviews = (
-        db.query(models.ProjectReview)
-        .filter(models.ProjectReview.project_id == project_id)
-        .order_by(models.ProjectReview.created_at)
-        .all()
+    count, last_id, teachers_updated_at = (
+        await db.execute(
+            select(
+                func.count(models.ProjectReview.id),
+                func.max(models.ProjectReview.id),
+                func.max(models.User.updated_at),
+            )
+            .join(models.User, models.User.id == models.ProjectReview.teacher_id)
+            .where(models.ProjectReview.project_id == project_id)
+        )
+    ).one()
+    etag = make_etag(
+        "reviews",
+        project_id,
+        count,
+        last_id,
+        teachers_updated_at.isoformat() if teachers_updated_at else "",
     )
+    if etag_matches(if_none_match, etag):
+        return _not_modified(etag)
+
+    reviews = (
+        await db.scalars(
+            select(models.ProjectReview)
+            .options(selectinload(models.ProjectReview.teacher))
+            .where(models.ProjectReview.project_id == project_id)
+            .order_by(models.ProjectReview.created_at)
+        )
+    ).all()
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = _REVALIDATE
     return reviews
@@ -1,21 +1,141 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Request, status
 
-from app.schemas.simulation import SimulationRequest, SimulationResult
-from app.services.simulation import simulate
+from app.schemas.simulation import (
+    RTLCrossCheckResult,
+    SimulationBatchRequest,
+    SimulationBatchResult,
+    SimulationRequest,
+    SimulationResult,
+)
+from app.services.fsm_codegen import simulate_compiled
+from app.services.rtl_simulation import cross_check_with_simulation
+from app.services.simulation import SimulationValidationError, simulate, simulate_batch
+from app.services.simulation_executor import SimulationRejected, estimate_simulation_cost, simulation_executor
 
 router = APIRouter()
 
 
+def _client_key(request: Request) -> str:
+    # эндпоинты без авторизации: справедливость очереди — по адресу клиента
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def _rejected(exc: SimulationRejected) -> HTTPException:
+    return HTTPException(
+        status_code=exc.status_code,
+        detail=exc.detail,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+def _invalid(exc: SimulationValidationError) -> HTTPException:
+    # FSM прошёл схему, но симуляция наткнулась на недопустимый переход
+    return HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail={
+            "message": exc.message,
+            "errors": exc.errors,
+        },
+    )
+
+
 @router.post(
     "/",
     response_model=SimulationResult,
     summary="Запустить симуляцию FSM лифта по сценарию",
 )
-def run_simulation(payload: SimulationRequest) -> SimulationResult:
+async def run_simulation(
+    payload: SimulationRequest,
+    request: Request,
+    metrics_only: bool = False,
+    minimize: bool = False,
+    compiled: bool = False,
+) -> SimulationResult:
     """
     Принимает описание FSM, конфиг лифта и сценарий вызовов.
     Пока используется упрощённая модель (заглушка),
     позднее сюда добавим полноценную симуляцию.
+
+    metrics_only=true — вернуть только метрики и покрытие, без таймлайна.
+    minimize=true — симулировать минимизированный автомат.
+    compiled=true — прогон на сгенерированном для этого FSM Python-коде
+    (результат тот же, код кэшируется по хэшу FSM).
+    Тяжёлые прогоны идут в пул процессов (503/429 + Retry-After при перегрузке).
+    Недопустимый переход в FSM (двери открыты -> движение) — 422.
     """
-    result = simulate(payload)
+    run = simulate_compiled if compiled else simulate
+    cost = estimate_simulation_cost(payload.fsm, payload.scenario)
+    try:
+        result = await simulation_executor.run(
+            _client_key(request),
+            cost,
+            run,
+            payload,
+            metrics_only=metrics_only,
+            minimize=minimize,
+        )
+    except SimulationRejected as exc:
+        raise _rejected(exc)
+    except SimulationValidationError as exc:
+        raise _invalid(exc)
     return result
+
+
+@router.post(
+    "/batch",
+    response_model=SimulationBatchResult,
+    summary="Пакетная симуляция FSM по нескольким сценариям",
+)
+async def run_simulation_batch(
+    payload: SimulationBatchRequest,
+    request: Request,
+    minimize: bool = False,
+) -> SimulationBatchResult:
+    """
+    Прогоняет один FSM по списку сценариев.
+    Возвращает метрики каждого прогона и суммарный отчёт покрытия
+    (сработавшие переходы, время в состояниях, мягкий режим).
+    Стоимость в очереди — суммарная по всем сценариям.
+    """
+    cost = estimate_simulation_cost(payload.fsm, *payload.scenarios)
+    try:
+        return await simulation_executor.run(
+            _client_key(request),
+            cost,
+            simulate_batch,
+            payload,
+            minimize=minimize,
+        )
+    except SimulationRejected as exc:
+        raise _rejected(exc)
+    except SimulationValidationError as exc:
+        raise _invalid(exc)
+
+
+@router.post(
+    "/rtl-check",
+    response_model=RTLCrossCheckResult,
+    summary="Сверить семантику сгенерированного Verilog с симуляцией",
+)
+async def run_rtl_cross_check(payload: SimulationBatchRequest, request: Request) -> RTLCrossCheckResult:
+    """
+    На каждом событии сценариев сравнивает переход, выбранный simulate(),
+    с тактом RTL-модели (case / if-else if по входным сигналам, event_type
+    в железе не виден). Расхождения показывают, где экспорт в Verilog
+    поведёт себя иначе, чем симуляция.
+    Прогон идёт через очередь симуляций, как /batch.
+    """
+    cost = estimate_simulation_cost(payload.fsm, *payload.scenarios)
+    try:
+        return await simulation_executor.run(
+            _client_key(request),
+            cost,
+            cross_check_with_simulation,
+            payload.fsm,
+            payload.config,
+            payload.scenarios,
+        )
+    except SimulationRejected as exc:
+        raise _rejected(exc)
+    except SimulationValidationError as exc:
+        raise _invalid(exc)
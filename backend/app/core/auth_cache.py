@@ -0,0 +1,115 @@
+# app/core/auth_cache.py
+from __future__ import annotations
+
+from typing import Any, Dict, Optional, Set
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app import models
+from app.core.config import settings
+from app.utils.cache import LRUCache
+
+# (user_id, token) -> значения колонок пользователя; срок токена проверяет
+# jwt.decode до обращения к кэшу
+_user_cache: LRUCache[Dict[str, Any]] = LRUCache(
+    maxsize=settings.AUTH_USER_CACHE_SIZE,
+    ttl=settings.AUTH_USER_CACHE_TTL,
+)
+
+_USER_COLUMNS = tuple(attr.key for attr in inspect(models.User).column_attrs)
+
+# Растёт при каждой инвалидации. Запрос, прочитавший пользователя из БД,
+# кладёт его в кэш, только если за время чтения инвалидаций не было —
+# иначе прочитанная строка могла устареть до того, как попала в кэш.
+_epoch = 0
+
+# ключи session.info: id изменённых пользователей / был массовый UPDATE
+_DIRTY_KEY = "auth_cache_dirty_users"
+_BULK_KEY = "auth_cache_bulk_change"
+
+
+def auth_cache_epoch() -> int:
+    return _epoch
+
+
+def get_cached_user(user_id: int, token: str) -> Optional[models.User]:
+    """
+    Пользователь из кэша авторизации или None.
+
+    Возвращается отсоединённый (detached) объект без единого запроса к БД;
+    к сессии его присоединяют через merge(load=False). Запись живёт не дольше
+    AUTH_USER_CACHE_TTL.
+    """
+    values = _user_cache.get((user_id, token))
+    if values is None:
+        return None
+    user = models.User(**values)
+    make_transient_to_detached(user)
+    return user
+
+
+def cache_user(user: models.User, token: str, epoch: int) -> None:
+    """epoch — auth_cache_epoch(), снятый до чтения пользователя из БД."""
+    if not user.is_active or epoch != _epoch:
+        return
+    _user_cache.set((user.id, token), {key: getattr(user, key) for key in _USER_COLUMNS})
+
+
+def invalidate_user(user_id: int) -> int:
+    """Сбросить все закэшированные токены пользователя (роль, блокировка, удаление)."""
+    global _epoch
+    _epoch += 1
+    return _user_cache.pop_where(lambda key: key[0] == user_id)
+
+
+def invalidate_all_users() -> None:
+    global _epoch
+    _epoch += 1
+    _user_cache.clear()
+
+
+def auth_cache_stats() -> Dict[str, float]:
+    return _user_cache.stats()
+
+
+# Инвалидация — после COMMIT, а не при flush: между flush и commit другой
+# запрос ещё видит старую строку и положил бы её в кэш на весь TTL.
+# При flush только запоминаем, кого изменили; rollback список отбрасывает.
+# Кэш у каждого процесса свой, остальные процессы догонят по TTL.
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session: Session, flush_context) -> None:
+    changed = [obj.id for obj in (*session.dirty, *session.deleted) if isinstance(obj, models.User)]
+    if changed:
+        dirty: Set[int] = session.info.setdefault(_DIRTY_KEY, set())
+        dirty.update(changed)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_changes(orm_execute_state) -> None:
+    # session.execute(update(User) / delete(User)) идёт мимо flush, и какие
+    # строки затронуты, неизвестно — после commit сбрасываем кэш целиком.
+    # Core-запросы через connection.execute сессию не проходят вовсе:
+    # после них нужно вызвать invalidate_user / invalidate_all_users явно.
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    if any(mapper.class_ is models.User for mapper in orm_execute_state.all_mappers):
+        orm_execute_state.session.info[_BULK_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session: Session) -> None:
+    if session.info.pop(_BULK_KEY, False):
+        session.info.pop(_DIRTY_KEY, None)
+        invalidate_all_users()
+        return
+    for user_id in session.info.pop(_DIRTY_KEY, ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_rolled_back_users(session: Session, previous_transaction) -> None:
+    session.info.pop(_DIRTY_KEY, None)
+    session.info.pop(_BULK_KEY, None)
@@ -1,6 +1,7 @@
 from functools import lru_cache
 from typing import List
 from pydantic_settings import BaseSettings
+from sqlalchemy.engine import URL, make_url
 
 
 class Settings(BaseSettings):
@@ -16,10 +17,66 @@ class Settings(BaseSettings):
 
     # сколько минут живёт access-token
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    # refresh-token: обмен на новый access без пароля (и без bcrypt)
+    REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 14
+
+    # bcrypt: cost factor для новых хешей и число потоков хеширования.
+    # Запросы сверх BCRYPT_WORKERS ждут в очереди пула, а не занимают threadpool.
+    BCRYPT_ROUNDS: int = 12
+    BCRYPT_WORKERS: int = 2
 
     # Можно переопределить целиком через .env
     DATABASE_URL: str | None = None
 
+    # пул соединений (отдельно у sync- и async-движка)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # ограничение времени одного SQL-запроса на сервере, мс (0 — без ограничения)
+    DB_STATEMENT_TIMEOUT_MS: int = 30_000
+
+    # кэш авторизации: пользователь по (id, токен), секунд жизни записи
+    AUTH_USER_CACHE_SIZE: int = 4096
+    AUTH_USER_CACHE_TTL: float = 60.0
+
+    # максимальный размер страницы списка проектов (?limit=)
+    PROJECT_LIST_MAX_LIMIT: int = 500
+
+    # кэш разобранных config проектов по (id, updated_at)
+    PROJECT_CONFIG_CACHE_SIZE: int = 256
+
+    # максимум примитивных обновлений jsonb в одном PATCH /projects/{id}/config
+    PROJECT_CONFIG_PATCH_MAX_STEPS: int = 256
+
+    # массовый импорт/экспорт проектов: размер пачки (одна транзакция
+    # импорта / один запрос экспорта), лимит одного документа, сколько
+    # архива держать в памяти до сброса на диск
+    PROJECT_BULK_IMPORT_BATCH_SIZE: int = 200
+    PROJECT_BULK_EXPORT_BATCH_SIZE: int = 50
+    PROJECT_BULK_MAX_DOCUMENT_BYTES: int = 16_000_000
+    PROJECT_BULK_SPOOL_BYTES: int = 8_000_000
+
+    # кэш экспорта Verilog: число модулей и максимальный размер одного модуля
+    VERILOG_EXPORT_CACHE_SIZE: int = 128
+    VERILOG_EXPORT_CACHE_MAX_CHARS: int = 4_000_000
+
+    # model checker: предел числа раскрытых переходов произведения
+    # (состояние × этаж × вызов); память растёт линейно от него
+    MODEL_CHECK_MAX_TRANSITIONS: int = 5_000_000
+
+    # кэш сгенерированного кода симуляции (число FSM)
+    SIMULATION_CODEGEN_CACHE_SIZE: int = 64
+
+    # исполнитель симуляций: процессы (0 — по числу CPU), очередь и лимиты.
+    # Стоимость прогона — события × переходы; дешёвые прогоны идут в потоке.
+    SIMULATION_WORKERS: int = 0
+    SIMULATION_QUEUE_LIMIT: int = 64
+    SIMULATION_QUEUE_MAX_COST: int = 500_000_000
+    SIMULATION_MAX_PER_USER: int = 2
+    SIMULATION_INLINE_COST: int = 20_000
+
     BACKEND_CORS_ORIGINS: List[str] = ["http://localhost:3000"]
 
     @property
@@ -27,11 +84,22 @@ class Settings(BaseSettings):
         if self.DATABASE_URL:
             return self.DATABASE_URL
 
-        return (
-            f"postgresql+psycopg2://"
-            f"{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}"
-            f"@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+        # URL.create экранирует спецсимволы пароля ('@', ':', '/')
+        url = URL.create(
+            "postgresql+psycopg2",
+            username=self.POSTGRES_USER,
+            password=self.POSTGRES_PASSWORD,
+            host=self.POSTGRES_SERVER,
+            port=self.POSTGRES_PORT,
+            database=self.POSTGRES_DB,
         )
+        return url.render_as_string(hide_password=False)
+
+    @property
+    def SQLALCHEMY_ASYNC_DATABASE_URI(self) -> str:
+        """Тот же адрес БД, но с драйвером asyncpg."""
+        url = make_url(self.SQLALCHEMY_DATABASE_URI).set(drivername="postgresql+asyncpg")
+        return url.render_as_string(hide_password=False)
 
     class Config:
         env_file = ".env"
@@ -5,13 +5,14 @@ from typing import Generator
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from jose import JWTError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.db.session import get_async_db, get_db
 from app import models
-from app.core.config import settings
-from app.core.security import ALGORITHM
+from app.core.auth_cache import auth_cache_epoch, cache_user, get_cached_user
+from app.core.security import ACCESS_TOKEN_TYPE, decode_token
 from app.schemas.user import TokenPayload
 from app.models.project import UserRole as SAUserRole  # SQLAlchemy enum
 
@@ -28,9 +29,9 @@ def get_db_dep() -> Generator[Session, None, None]:
         db.close()
 
 
-def get_current_user(
+async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> models.User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -39,11 +40,7 @@ def get_current_user(
     )
 
     try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[ALGORITHM],
-        )
+        payload = decode_token(token, ACCESS_TOKEN_TYPE)
         sub = payload.get("sub")
         if sub is None:
             raise credentials_exception
@@ -51,14 +48,22 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = db.query(models.User).get(int(token_data.sub))  # type: ignore[arg-type]
+    user_id = int(token_data.sub)
+    cached = get_cached_user(user_id, token)
+    if cached is not None:
+        # без SELECT: объект просто регистрируется в identity map сессии
+        return await db.merge(cached, load=False)
+
+    epoch = auth_cache_epoch()
+    user = await db.get(models.User, user_id)
     if user is None or not user.is_active:
         raise credentials_exception
 
+    cache_user(user, token, epoch)
     return user
 
 
-def get_current_teacher(
+async def get_current_teacher(
     current_user: models.User = Depends(get_current_user),
 ) -> models.User:
     if current_user.role != SAUserRole.teacher and current_user.role != SAUserRole.admin:
@@ -1,11 +1,13 @@
 # backend/app/core/security.py
 from __future__ import annotations
 
+import asyncio
 import bcrypt
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional
 
-from jose import jwt
+from jose import JWTError, jwt
 
 from app.core.config import settings  # ВАЖНО: именно settings, а не Settings
 
@@ -15,6 +17,14 @@ from app.core.config import settings  # ВАЖНО: именно settings, а н
 
 MAX_BCRYPT_BYTES = 72
 
+# bcrypt отпускает GIL, но каждый вызов — сотни миллисекунд CPU. Отдельный
+# ограниченный пул: при массовом входе запросы встают в очередь пула и не
+# выедают общий threadpool, в котором работают остальные эндпоинты.
+_bcrypt_pool = ThreadPoolExecutor(
+    max_workers=max(1, settings.BCRYPT_WORKERS),
+    thread_name_prefix="bcrypt",
+)
+
 
 def _prepare_password_bytes(password: str) -> bytes:
     """
@@ -29,7 +39,7 @@ def _prepare_password_bytes(password: str) -> bytes:
 
 def get_password_hash(password: str) -> str:
     pw_bytes = _prepare_password_bytes(password)
-    hashed = bcrypt.hashpw(pw_bytes, bcrypt.gensalt())
+    hashed = bcrypt.hashpw(pw_bytes, bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS))
     return hashed.decode("utf-8")
 
 
@@ -42,12 +52,44 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Хеш посчитан с другим cost factor, чем BCRYPT_ROUNDS ($2b$<rounds>$...)."""
+    parts = hashed_password.split("$")
+    return len(parts) < 4 or parts[2] != f"{settings.BCRYPT_ROUNDS:02d}"
+
+
+async def get_password_hash_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_bcrypt_pool, get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_bcrypt_pool, verify_password, plain_password, hashed_password)
+
+
 # -------------------
 # JWT-токены
 # -------------------
 
 ALGORITHM = "HS256"
 
+# claim "type": access-токен авторизует запросы, refresh — только /auth/refresh
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
+
+
+def _create_token(subject: str, token_type: str, expires_delta: timedelta) -> str:
+    expire = datetime.utcnow() + expires_delta
+    to_encode = {"sub": subject, "exp": expire, "type": token_type}
+
+    encoded_jwt = jwt.encode(
+        to_encode,
+        settings.SECRET_KEY,
+        algorithm=ALGORITHM,
+    )
+    return encoded_jwt
+
 
 def create_access_token(
     subject: str,
@@ -57,13 +99,30 @@ def create_access_token(
         expires_delta = timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
+    return _create_token(subject, ACCESS_TOKEN_TYPE, expires_delta)
 
-    expire = datetime.utcnow() + expires_delta
-    to_encode = {"sub": subject, "exp": expire}
 
-    encoded_jwt = jwt.encode(
-        to_encode,
+def create_refresh_token(
+    subject: str,
+    expires_delta: Optional[timedelta] = None,
+) -> str:
+    if expires_delta is None:
+        expires_delta = timedelta(
+            minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES
+        )
+    return _create_token(subject, REFRESH_TOKEN_TYPE, expires_delta)
+
+
+def decode_token(token: str, token_type: str) -> Dict[str, Any]:
+    """
+    Проверить подпись, срок и тип токена. Бросает JWTError.
+    Токены, выданные до появления claim "type", считаются access.
+    """
+    payload = jwt.decode(
+        token,
         settings.SECRET_KEY,
-        algorithm=ALGORITHM,
+        algorithms=[ALGORITHM],
     )
-    return encoded_jwt
+    if payload.get("type", ACCESS_TOKEN_TYPE) != token_type:
+        raise JWTError("Неверный тип токена")
+    return payload
@@ -1,18 +1,58 @@
+from typing import Any, AsyncIterator, Dict
+
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import get_settings
 
 settings = get_settings()
 
+
+def _pool_options() -> Dict[str, Any]:
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+# statement_timeout задаётся при подключении, чтобы зависший запрос
+# не держал соединение пула бесконечно
+_sync_connect_args: Dict[str, Any] = {}
+_async_connect_args: Dict[str, Any] = {}
+if settings.DB_STATEMENT_TIMEOUT_MS > 0:
+    _sync_connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+    _async_connect_args["server_settings"] = {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+
+# Синхронный движок: Alembic, init_db, скрипты
 engine = create_engine(
     settings.SQLALCHEMY_DATABASE_URI,
     future=True,
     echo=False,  # можно сделать True для отладки SQL
+    connect_args=_sync_connect_args,
+    **_pool_options(),
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Асинхронный движок (asyncpg) для эндпоинтов: ожидание БД не занимает
+# поток из threadpool, число одновременных запросов ограничено только пулом
+async_engine = create_async_engine(
+    settings.SQLALCHEMY_ASYNC_DATABASE_URI,
+    echo=False,
+    connect_args=_async_connect_args,
+    **_pool_options(),
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 
 # Зависимость для FastAPI
 def get_db():
@@ -21,3 +61,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
+        yield db
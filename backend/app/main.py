@@ -1,14 +1,26 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
 from app.core.config import get_settings
 from app.core.config import settings
 from app.api.v1.api import api_router
+from app.services.simulation_executor import simulation_executor
 from fastapi.middleware.cors import CORSMiddleware
 
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # пул процессов симуляции создаётся лениво, гасим его при остановке
+    simulation_executor.shutdown()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -17,6 +29,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # курсор пагинации и ETag (условные GET) должны быть видны фронтенду
+    expose_headers=["X-Next-After-Id", "ETag"],
 )
 
 app.include_router(api_router, prefix=settings.API_V1_PREFIX)
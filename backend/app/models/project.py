@@ -13,6 +13,8 @@ from sqlalchemy import (
     DateTime,
     Enum as SqlEnum,
     ForeignKey,
+    Index,
+    text,
 )
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
@@ -27,6 +29,34 @@ class ProjectStatus(enum.Enum):
     reviewed = "reviewed"
 
 
+# ---------- выражения поисковых индексов ----------
+# Поиск (GET /projects/search) подставляет эти выражения в WHERE дословно:
+# Postgres использует индекс по выражению или частичный индекс, только если
+# выражение запроса совпадает с выражением индекса. Миграция 2f6a9c1d7e34
+# создаёт индексы с тем же текстом — менять их можно только новой миграцией.
+
+# полнотекстовый документ проекта: имя + описание (русская морфология)
+PROJECT_SEARCH_DOCUMENT_SQL = (
+    "to_tsvector('russian'::regconfig, coalesce(name, '') || ' ' || coalesce(description, ''))"
+)
+# размеры FSM; config без массива fsm.states / fsm.transitions -> NULL
+PROJECT_STATE_COUNT_SQL = (
+    "(CASE WHEN jsonb_typeof(config -> 'fsm' -> 'states') = 'array' "
+    "THEN jsonb_array_length(config -> 'fsm' -> 'states') END)"
+)
+PROJECT_TRANSITION_COUNT_SQL = (
+    "(CASE WHEN jsonb_typeof(config -> 'fsm' -> 'transitions') = 'array' "
+    "THEN jsonb_array_length(config -> 'fsm' -> 'transitions') END)"
+)
+# есть переход с условием вне SUPPORTED_SIGNALS (app/services/fsm_validation.py);
+# регистр и пробелы по краям не важны — как в normalize_condition
+PROJECT_UNSUPPORTED_CONDITION_SQL = (
+    r"""config @? '$.fsm.transitions[*] ? (@.condition.type() == "string" && """
+    r"""!(@.condition like_regex "^\\s*(call_received|door_timer_expired|arrived_at_floor|"""
+    r"""obstacle_detected|tick|always|\\*)?\\s*$" flag "i"))'::jsonpath"""
+)
+
+
 class Project(Base):
     __tablename__ = "projects"
 
@@ -69,6 +99,21 @@ class Project(Base):
         cascade="all, delete-orphan",
     )
 
+    __table_args__ = (
+        # keyset-пагинация проектов владельца (WHERE owner_id = ? AND id > ?)
+        Index("ix_projects_owner_id_id", "owner_id", "id"),
+        # поиск проектов: только Postgres (jsonb, tsvector, jsonpath)
+        Index("ix_projects_config_path_ops", "config", postgresql_using="gin",
+              postgresql_ops={"config": "jsonb_path_ops"}).ddl_if(dialect="postgresql"),
+        Index("ix_projects_search_document", text(PROJECT_SEARCH_DOCUMENT_SQL),
+              postgresql_using="gin").ddl_if(dialect="postgresql"),
+        Index("ix_projects_state_count", text(PROJECT_STATE_COUNT_SQL)).ddl_if(dialect="postgresql"),
+        Index("ix_projects_transition_count", text(PROJECT_TRANSITION_COUNT_SQL)).ddl_if(dialect="postgresql"),
+        Index("ix_projects_unsupported_condition", "id",
+              postgresql_where=text(PROJECT_UNSUPPORTED_CONDITION_SQL)).ddl_if(dialect="postgresql"),
+        Index("ix_projects_status_id", "status", "id"),
+    )
+
 
 class UserRole(enum.Enum):
     student = "student"
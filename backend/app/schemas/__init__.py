@@ -1,11 +1,22 @@
-from .fsm import FSMDefinition, FSMState, FSMTransition, FSMType
+from .fsm import FSMDefinition, FSMState, FSMTransition, FSMType, StateEncoding
 from .scenario import Scenario, ScenarioEvent, Direction
 from .simulation import (
     SimulationRequest,
     SimulationResult,
     TimelineItem,
     SimulationMetrics,
+    FloorWaitStats,
+    DirectionWaitStats,
+    CoverageReport,
+    TransitionCoverage,
+    StateResidency,
     ProjectSimulationRequest,
+    SimulationBatchRequest,
+    SimulationBatchResult,
+    RTLCrossCheckMismatch,
+    RTLCrossCheckResult,
+    CoSimulationDivergence,
+    CoSimulationResult,
 )
 from .project_config import ProjectConfig
 from .project import (
@@ -14,7 +25,13 @@ from .project import (
     ProjectUpdate,
     ProjectInDBBase,
     Project,
+    ProjectListFields,
+    ProjectSummary,
+    JsonPatchOperation,
+    ProjectConfigPatchResult,
     ProjectImport,
+    ProjectBulkImportError,
+    ProjectBulkImportResult,
     ProjectExport,
     ProjectStatus,
     ProjectConfig,
@@ -32,6 +49,7 @@ from .user import (
     User,
     UserInDB,
     Token,
+    RefreshRequest,
     TokenPayload,
     AuthResponse,
 )
@@ -39,4 +57,19 @@ from .review import (
     ProjectReview,
     ProjectReviewCreate,
 )
-from .fsm import FSMVerilogExport, FSMVerilogExportRequest
+from .fsm import (
+    FSMVerilogExport,
+    FSMVerilogExportRequest,
+    FSMValidationIssue,
+    FSMValidationReport,
+    FSMModelCheckRequest,
+    FSMModelCheckResult,
+    FSMInvariantResult,
+    FSMModelCheckStep,
+    FSMMinimizationResult,
+    FSMEquivalenceRequest,
+    FSMEquivalenceResult,
+    FSMEncodingCost,
+    FSMCaseArmCost,
+    FSMCostReport,
+)
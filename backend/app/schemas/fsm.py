@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from enum import Enum
-from typing import Any, Optional, Set
+from typing import Any, List, Literal, Optional, Set
 
 from pydantic import BaseModel, Field, model_validator
 from app.schemas.scenario import ScenarioEventType
@@ -12,6 +12,12 @@ class FSMType(str, Enum):
     MOORE = "moore"
 
 
+class StateEncoding(str, Enum):
+    BINARY = "binary"
+    ONE_HOT = "one_hot"
+    GRAY = "gray"
+
+
 class FSMState(BaseModel):
     id: str = Field(..., description="Уникальный ID состояния")
     name: str = Field(..., description="Человекочитаемое имя состояния")
@@ -48,14 +54,59 @@ class FSMTransition(BaseModel):
 
 class FSMVerilogExportRequest(BaseModel):
     module_name: Optional[str] = None
+    minimize: bool = Field(False, description="Экспортировать минимизированный автомат")
+    encoding: StateEncoding = Field(
+        StateEncoding.BINARY,
+        description="Кодирование состояний: binary (меньше триггеров), one_hot (проще логика), gray",
+    )
 
 
 class FSMVerilogExport(BaseModel):
     project_id: int
     module_name: str
+    encoding: StateEncoding = StateEncoding.BINARY
     verilog: str
 
 
+class FSMValidationIssue(BaseModel):
+    level: Literal["error", "warning"] = "error"
+    code: str = Field("", description="Машиночитаемый код проблемы")
+    message: str
+    state_ids: List[str] = Field(default_factory=list)
+    transition_ids: List[str] = Field(default_factory=list)
+
+
+class FSMValidationReport(BaseModel):
+    valid: bool = Field(..., description="Нет ни одной ошибки (предупреждения допустимы)")
+    issues: List[FSMValidationIssue] = Field(default_factory=list)
+
+
+class FSMModelCheckStep(BaseModel):
+    """
+    Шаг контрпримера: событие (None у начального шага) и состояние после него.
+    """
+    event_type: Optional[ScenarioEventType] = None
+    event_floor: Optional[int] = None
+    state_id: str
+    floor: int
+    pending_floor: Optional[int] = Field(None, description="Этаж ожидающего вызова")
+    transition_id: Optional[str] = None
+
+
+class FSMInvariantResult(BaseModel):
+    name: str
+    description: str
+    holds: bool
+    counterexample: List[FSMModelCheckStep] = Field(default_factory=list)
+
+
+class FSMModelCheckResult(BaseModel):
+    floors: int
+    explored_states: int
+    explored_transitions: int
+    invariants: List[FSMInvariantResult]
+
+
 class FSMDefinition(BaseModel):
     type: FSMType = FSMType.MEALY
     states: list[FSMState]
@@ -84,3 +135,62 @@ class FSMDefinition(BaseModel):
                 )
 
         return self
+
+
+class FSMModelCheckRequest(BaseModel):
+    fsm: FSMDefinition
+    floors: int = Field(..., gt=0, le=200, description="Количество этажей")
+
+
+class FSMMinimizationResult(BaseModel):
+    fsm: FSMDefinition
+    original_states: int
+    minimized_states: int
+    merged_states: dict[str, str] = Field(
+        default_factory=dict,
+        description="Склеенные состояния: id -> id представителя",
+    )
+
+
+class FSMEquivalenceRequest(BaseModel):
+    left: FSMDefinition
+    right: FSMDefinition
+
+
+class FSMEquivalenceResult(BaseModel):
+    equivalent: bool
+    left_states: int
+    right_states: int
+    counterexample: List[str] = Field(
+        default_factory=list,
+        description="Кратчайшая различающая последовательность меток event_type:condition",
+    )
+
+
+class FSMEncodingCost(BaseModel):
+    encoding: StateEncoding
+    flip_flops: int
+    next_state_terms: int = Field(..., description="Термы суммы произведений логики next_state")
+    next_state_literals: int
+    max_term_literals: int = Field(..., description="Самый длинный терм — оценка глубины логики")
+    estimated_area: int = Field(..., description="Оценка площади в эквивалентах вентилей")
+
+
+class FSMCaseArmCost(BaseModel):
+    state_id: str
+    chain_depth: int = Field(..., description="Длина цепочки if / else if в ветке case")
+    shadowed_transitions: int = Field(0, description="Переходы после безусловного — никогда не срабатывают")
+    holds_state: bool = Field(..., description="Нет безусловного перехода: нужна логика удержания состояния")
+
+
+class FSMCostReport(BaseModel):
+    states: int
+    transitions: int
+    input_signals: List[str] = Field(default_factory=list)
+    output_signals: List[str] = Field(default_factory=list)
+    output_terms: int = 0
+    max_chain_depth: int = 0
+    arms: List[FSMCaseArmCost] = Field(default_factory=list)
+    encodings: List[FSMEncodingCost] = Field(default_factory=list)
+    recommended_encoding: StateEncoding = StateEncoding.BINARY
+    reason: str = ""
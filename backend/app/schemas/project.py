@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 from enum import Enum
-from typing import Optional, Any, Dict, List
+from typing import Optional, Any, Dict, List, Literal
 
 from pydantic import BaseModel, Field, ConfigDict
 
@@ -97,6 +97,48 @@ class Project(ProjectInDBBase):
     owner: Optional[UserSchema] = None
 
 
+class ProjectListFields(str, Enum):
+    """Объём данных в списке проектов."""
+    full = "full"        # вместе с config
+    summary = "summary"  # без config (колонка даже не читается из БД)
+
+
+class ProjectSummary(BaseModel):
+    """
+    Элемент списка в режиме fields=summary: метаданные проекта без config.
+    """
+    id: int
+    name: str
+    description: Optional[str] = None
+    status: ProjectStatus
+    owner_id: Optional[int] = None
+    created_at: datetime
+    updated_at: datetime
+    owner: Optional[UserSchema] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class JsonPatchOperation(BaseModel):
+    """
+    Операция JSON Patch (RFC 6902) над config проекта.
+    path / from — JSON Pointer от корня config, например "/fsm/states/3/name".
+    """
+    op: Literal["add", "remove", "replace", "move", "copy", "test"]
+    path: str
+    value: Any = None
+    from_: Optional[str] = Field(default=None, alias="from")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
+class ProjectConfigPatchResult(BaseModel):
+    """Ответ PATCH /projects/{id}/config: новая версия без тела config."""
+    project_id: int
+    updated_at: datetime
+    operations: int = Field(..., description="Число примитивных обновлений jsonb")
+
+
 class ProjectExport(BaseModel):
     """
     JSON для экспорта/импорта проекта без БД-метаданных.
@@ -116,6 +158,20 @@ class ProjectImport(ProjectCreate):
     pass
 
 
+class ProjectBulkImportError(BaseModel):
+    document: str = Field(..., description="Строка NDJSON или файл в архиве")
+    detail: str
+
+
+class ProjectBulkImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ProjectBulkImportError] = Field(
+        default_factory=list,
+        description="Первые ошибки (список обрезается, счётчик failed — полный)",
+    )
+
+
 # Ниже можешь оставить ExternalEventType/ExternalEvent, если они нужны позже,
 # но они не влияют на работу текущих эндпоинтов.
 
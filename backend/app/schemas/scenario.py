@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 from enum import Enum
+from functools import lru_cache
 from typing import Optional, List, Any
 
-from pydantic import BaseModel, Field, ValidationError
+from pydantic import BaseModel, Field, TypeAdapter, field_validator
 
 
 class Direction(str, Enum):
@@ -43,36 +44,65 @@ class Scenario(BaseModel):
     events: List[ScenarioEvent] = Field(default_factory=list)
 
     @classmethod
-    def model_validate(cls, obj: Any) -> "Scenario":  # type: ignore[override]
+    def model_validate(cls, obj: Any, **kwargs: Any) -> "Scenario":  # type: ignore[override]
         """
         Переопределяем validate, чтобы:
         - принимать уже нормальный формат (name + events с type);
         - принимать старый формат {name, events: [{time, floor, direction}]}
           и дополнять его полем type = CALL.
+
+        Формат определяется заранее (без повторной валидации после
+        ValidationError), события старого формата валидируются одним
+        вызовом через закешированный TypeAdapter.
         """
-        try:
-            # Попробуем обычную валидацию
-            return super().model_validate(obj)
-        except ValidationError:
-            pass
+        if not _is_legacy_payload(obj):
+            return super().model_validate(obj, **kwargs)
 
         # Старый формат: { name, events: [ {time, floor, direction} ] }
-        name = None
-        events_raw: List[Any] = []
-
-        if isinstance(obj, dict):
-            name = obj.get("name")
-            events_raw = obj.get("events", []) or []
-
-        converted_events: List[ScenarioEvent] = []
-        for ev in events_raw:
-            converted_events.append(
-                ScenarioEvent(
-                    time=int(ev.get("time", 0)),
-                    floor=int(ev.get("floor", 0)),
-                    direction=Direction(ev.get("direction", "none")),
-                    type=ScenarioEventType.CALL,
-                )
+        legacy_events = _legacy_events_adapter().validate_python(obj.get("events") or [])
+        converted_events = [
+            ScenarioEvent.model_construct(
+                time=ev.time,
+                floor=ev.floor,
+                direction=ev.direction,
+                type=ScenarioEventType.CALL,
             )
+            for ev in legacy_events
+        ]
+        return cls(name=obj.get("name"), events=converted_events)
+
 
-        return Scenario(name=name, events=converted_events)
+class _LegacyScenarioEvent(BaseModel):
+    """
+    Событие старого формата: только time/floor/direction,
+    числа могут приходить дробными или строками.
+    """
+    time: int = Field(0, ge=0)
+    floor: int = Field(0, ge=0)
+    direction: Direction = Direction.NONE
+
+    @field_validator("time", "floor", mode="before")
+    @classmethod
+    def _truncate(cls, value: Any) -> Any:
+        if value is None:
+            return 0
+        return int(float(value)) if isinstance(value, (float, str)) else value
+
+
+@lru_cache(maxsize=None)
+def _legacy_events_adapter() -> TypeAdapter[List[_LegacyScenarioEvent]]:
+    return TypeAdapter(List[_LegacyScenarioEvent])
+
+
+def _is_legacy_payload(obj: Any) -> bool:
+    """
+    Старый формат: dict, в событиях которого нет поля type.
+    """
+    if not isinstance(obj, dict):
+        return False
+    events = obj.get("events")
+    if not events:
+        return False
+    if not isinstance(events, list):
+        return False
+    return all(isinstance(ev, dict) and "type" not in ev for ev in events)
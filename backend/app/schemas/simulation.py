@@ -1,11 +1,11 @@
 # backend/app/schemas/simulation.py
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
-from app.schemas.scenario import Scenario, Direction
+from app.schemas.scenario import Scenario, Direction, ScenarioEventType
 from app.schemas.fsm import FSMDefinition
 from app.schemas.project import ElevatorConfig
 
@@ -28,15 +28,132 @@ class TimelineItem(BaseModel):
     direction: Direction
 
 
+class FloorWaitStats(BaseModel):
+    floor: int
+    calls: int
+    avg_wait_time: float
+    max_wait_time: float
+
+
+class DirectionWaitStats(BaseModel):
+    direction: Direction
+    calls: int
+    avg_wait_time: float
+    max_wait_time: float
+
+
 class SimulationMetrics(BaseModel):
     avg_wait_time: float
     total_moves: int
     stops: int
+    # Распределение времени ожидания (квантили — оценка потокового скетча, ~1%)
+    p50_wait_time: float = 0.0
+    p90_wait_time: float = 0.0
+    p99_wait_time: float = 0.0
+    max_wait_time: float = 0.0
+    wait_by_floor: List[FloorWaitStats] = Field(default_factory=list)
+    # вызовы с этажей вне 0..floors: в общей статистике есть, в wait_by_floor — нет
+    calls_outside_floors: int = 0
+    wait_by_direction: List[DirectionWaitStats] = Field(default_factory=list)
+
+
+class TransitionCoverage(BaseModel):
+    transition_id: str
+    from_state_id: str
+    to_state_id: str
+    hits: int
+
+
+class StateResidency(BaseModel):
+    state_id: str
+    visits: int
+    time: float
+
+
+class CoverageReport(BaseModel):
+    """
+    Какие переходы FSM сработали и сколько времени лифт провёл в каждом
+    состоянии. Отчёты нескольких прогонов одного FSM можно складывать
+    (см. merge_coverage_reports).
+    """
+    runs: int = 1
+    events: int = 0
+    total_time: float = 0.0
+    idle_time: float = 0.0
+    idle_ratio: float = 0.0
+    soft_mode_hits: int = Field(0, description="События, обработанные мягким режимом (нет перехода)")
+    unhandled_events: int = Field(0, description="События без перехода, которые ничего не изменили")
+    transition_coverage: float = Field(0.0, description="Доля переходов, сработавших хотя бы раз")
+    transitions: List[TransitionCoverage] = Field(default_factory=list)
+    states: List[StateResidency] = Field(default_factory=list)
 
 
 class SimulationResult(BaseModel):
     timeline: List[TimelineItem]
     metrics: SimulationMetrics
+    coverage: Optional[CoverageReport] = None
+
+
+class SimulationBatchRequest(BaseModel):
+    """
+    Пакетный прогон одного FSM по нескольким сценариям.
+    """
+    project_id: int
+    config: ElevatorConfig
+    fsm: FSMDefinition
+    scenarios: List[Scenario]
+
+
+class SimulationBatchResult(BaseModel):
+    metrics: List[SimulationMetrics]
+    coverage: CoverageReport
+
+
+class RTLCrossCheckMismatch(BaseModel):
+    """
+    Событие, на котором RTL-семантика выбрала другое состояние, чем simulate().
+    """
+    scenario_index: int
+    event_index: int
+    time: int
+    event_type: ScenarioEventType
+    state_id: str
+    simulation_state_id: str
+    rtl_state_id: str
+
+
+class RTLCrossCheckResult(BaseModel):
+    signals: List[str] = Field(default_factory=list, description="Входные сигналы модуля")
+    events: int = 0
+    mismatches_total: int = 0
+    mismatches: List[RTLCrossCheckMismatch] = Field(default_factory=list)
+
+
+class CoSimulationDivergence(BaseModel):
+    """
+    Первая позиция, где последовательности смен состояния разошлись.
+    Поля RTL пусты, если дамп закончился раньше симуляции, и наоборот.
+    """
+    index: int
+    rtl_time: Optional[int] = Field(None, description="Время в единицах timescale VCD")
+    rtl_state_id: Optional[str] = None
+    rtl_value: Optional[str] = None
+    simulation_time: Optional[int] = None
+    simulation_state_id: Optional[str] = None
+
+
+class CoSimulationResult(BaseModel):
+    signal: str
+    timescale: str = ""
+    rtl_changes: int = 0
+    simulation_changes: int = 0
+    matched_prefix: int = 0
+    mismatched_positions: int = 0
+    unknown_values: int = Field(0, description="Значения x/z и коды вне кодирования состояний")
+    equivalent: bool = False
+    first_divergence: Optional[CoSimulationDivergence] = None
+    rtl_visits: Dict[str, int] = Field(default_factory=dict)
+    simulation_visits: Dict[str, int] = Field(default_factory=dict)
 
 
 class ProjectSimulationRequest(BaseModel):
@@ -75,9 +75,14 @@ class UserInDB(UserInDBBase):
 
 class Token(BaseModel):
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str = "bearer"
 
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
 class TokenPayload(BaseModel):
     sub: Optional[str] = None  # user_id в строковом виде
     role: Optional[UserRole] = None
@@ -89,9 +94,10 @@ class LoginRequest(BaseModel):
 class AuthResponse(BaseModel):
     """
     Ответ авторизации /auth/login:
-    - JWT токен
+    - JWT токен и refresh-токен для его продления (/auth/refresh)
     - объект пользователя с full_name, role и т.д.
     """
     access_token: str
+    refresh_token: Optional[str] = None
     token_type: str = "bearer"
     user: User
@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import types
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Annotated, Any, Dict, List, Optional, Sequence, Tuple, Union, get_args, get_origin
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from sqlalchemy import Integer, Text, and_, case, cast, func, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+
+from app import models
+from app.schemas.project import JsonPatchOperation, ProjectConfig
+
+Path = Tuple[str, ...]
+
+
+class ConfigPatchError(Exception):
+    """Патч некорректен или записывает значения, не проходящие схему (422)."""
+
+    def __init__(self, errors: List[str]) -> None:
+        self.errors = errors
+        super().__init__("; ".join(errors))
+
+
+@dataclass(frozen=True)
+class PatchStep:
+    """
+    Примитивное обновление jsonb. JSON Patch и merge-patch сводятся к
+    последовательности таких шагов; каждый шаг — одна функция jsonb
+    (jsonb_set / jsonb_insert / #-) и, для JSON Patch, предусловие.
+    """
+
+    kind: str  # add | remove | replace | test | copy | move | ensure_object | set | delete
+    path: Path
+    value: Any = None
+    from_path: Path = ()
+
+
+# ---------- JSON Pointer ----------
+
+
+def parse_pointer(pointer: str) -> Path:
+    if pointer == "":
+        return ()
+    if not pointer.startswith("/"):
+        raise ConfigPatchError([f"Некорректный JSON Pointer: {pointer!r}"])
+    return tuple(token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/"))
+
+
+def _pointer(path: Path) -> str:
+    return "".join("/" + token.replace("~", "~0").replace("/", "~1") for token in path)
+
+
+# ---------- схема config: тип узла по пути ----------
+
+
+@dataclass(frozen=True)
+class _Node:
+    annotation: Any
+    metadata: Tuple[Any, ...] = ()
+    required: bool = False
+
+
+_ROOT = _Node(ProjectConfig, required=True)
+
+
+def _unwrap_optional(annotation: Any) -> Any:
+    if get_origin(annotation) in (Union, types.UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def _is_model(annotation: Any) -> bool:
+    return isinstance(annotation, type) and issubclass(annotation, BaseModel)
+
+
+def _child(node: _Node, token: str) -> Optional[_Node]:
+    """Тип дочернего узла или None, если схема о нём ничего не знает (Any, extra-ключи)."""
+    annotation = _unwrap_optional(node.annotation)
+    if _is_model(annotation):
+        field = annotation.model_fields.get(token)
+        if field is None:
+            return None
+        return _Node(field.annotation, tuple(field.metadata), field.is_required())
+    origin = get_origin(annotation)
+    if origin in (list, List):
+        (item,) = get_args(annotation) or (Any,)
+        return _Node(item) if item is not Any else None
+    if origin in (dict, Dict):
+        args = get_args(annotation)
+        return _Node(args[1]) if len(args) == 2 and args[1] is not Any else None
+    return None
+
+
+def _resolve(path: Path) -> Optional[_Node]:
+    node: Optional[_Node] = _ROOT
+    for token in path:
+        if node is None:
+            return None
+        node = _child(node, token)
+    return node
+
+
+_adapters: Dict[_Node, TypeAdapter] = {}
+
+
+def _validate_value(path: Path, value: Any) -> None:
+    """Проверяет только записываемое поддерево — по типу узла схемы."""
+    node = _resolve(path)
+    if node is None:
+        return
+    annotation = _unwrap_optional(node.annotation)
+    try:
+        if _is_model(annotation) and value is not None:
+            # model_validate, а не TypeAdapter: Scenario принимает и старый формат
+            annotation.model_validate(value)
+            return
+        adapter = _adapters.get(node)
+        if adapter is None:
+            target = Annotated[(node.annotation, *node.metadata)] if node.metadata else node.annotation
+            adapter = _adapters[node] = TypeAdapter(target)
+        adapter.validate_python(value)
+    except ValidationError as exc:
+        raise ConfigPatchError([
+            f"{_pointer(path + tuple(str(part) for part in err['loc']))}: {err['msg']}"
+            for err in exc.errors()
+        ]) from None
+
+
+def _check_removable(path: Path) -> None:
+    if not path:
+        raise ConfigPatchError(["Нельзя удалить config целиком"])
+    node = _resolve(path)
+    parent = _resolve(path[:-1])
+    if node is not None and node.required and parent is not None and _is_model(_unwrap_optional(parent.annotation)):
+        raise ConfigPatchError([f"{_pointer(path)}: обязательное поле нельзя удалить"])
+
+
+# ---------- разбор патчей в шаги ----------
+
+
+def json_patch_steps(operations: Sequence[JsonPatchOperation]) -> List[PatchStep]:
+    steps: List[PatchStep] = []
+    for op in operations:
+        path = parse_pointer(op.path)
+        has_value = "value" in op.model_fields_set
+        if op.op in ("add", "replace", "test"):
+            if not has_value:
+                raise ConfigPatchError([f"{op.op} {op.path}: нет value"])
+            if op.op != "test":
+                _validate_value(path, op.value)
+            steps.append(PatchStep(op.op, path, op.value))
+        elif op.op == "remove":
+            _check_removable(path)
+            steps.append(PatchStep("remove", path))
+        else:  # move / copy
+            if op.from_ is None:
+                raise ConfigPatchError([f"{op.op} {op.path}: нет from"])
+            from_path = parse_pointer(op.from_)
+            if op.op == "move":
+                if path[:len(from_path)] == from_path and path != from_path:
+                    raise ConfigPatchError([f"move {op.path}: нельзя переместить узел внутрь самого себя"])
+                _check_removable(from_path)
+            source, target = _resolve(from_path), _resolve(path)
+            if source is not None and target is not None and source.annotation != target.annotation:
+                raise ConfigPatchError([f"{op.op} {op.from_} -> {op.path}: несовместимые типы узлов"])
+            steps.append(PatchStep(op.op, path, from_path=from_path))
+    return steps
+
+
+def _strip_nulls(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _strip_nulls(item) for key, item in value.items() if item is not None}
+    return value
+
+
+def merge_patch_steps(patch: Dict[str, Any], path: Path = ()) -> List[PatchStep]:
+    """
+    JSON Merge Patch (RFC 7396): null — удалить ключ (отсутствующий ключ —
+    не ошибка, поэтому delete без предусловия, в отличие от remove JSON Patch),
+    объект — слить рекурсивно (узел, не являющийся объектом, сначала
+    заменяется на {}), остальное — записать как есть.
+    """
+    steps: List[PatchStep] = []
+    for key, value in patch.items():
+        child = path + (key,)
+        if value is None:
+            _check_removable(child)
+            steps.append(PatchStep("delete", child))
+        elif isinstance(value, dict):
+            steps.append(PatchStep("ensure_object", child))
+            steps.extend(merge_patch_steps(value, child))
+        else:
+            _validate_value(child, value)
+            steps.append(PatchStep("set", child, value))
+    return steps
+
+
+# ---------- шаги -> SQL ----------
+
+
+def _path_literal(path: Path):
+    return cast(literal(list(path), ARRAY(Text)), ARRAY(Text))
+
+
+def _json(value: Any):
+    return cast(literal(value, JSONB), JSONB)
+
+
+def _at(doc, path: Path):
+    return doc.op("#>")(_path_literal(path)) if path else doc
+
+
+def _exists(doc, path: Path):
+    return _at(doc, path).isnot(None)
+
+
+def _add_condition(doc, path: Path):
+    """Для add: родитель — объект, либо массив и индекс в пределах [0, len] или "-"."""
+    if not path:
+        return literal(True)
+    parent, token = _at(doc, path[:-1]), path[-1]
+    is_object = func.jsonb_typeof(parent) == "object"
+    if token == "-":
+        return or_(is_object, func.jsonb_typeof(parent) == "array")
+    if token.isdigit():
+        in_array = and_(func.jsonb_typeof(parent) == "array", int(token) <= func.jsonb_array_length(parent))
+        return or_(is_object, in_array)
+    return is_object
+
+
+def _add(doc, path: Path, value):
+    if not path:
+        return value
+    parent = _at(doc, path[:-1])
+    if path[-1] == "-":
+        into_array = func.jsonb_insert(doc, _path_literal(path[:-1] + ("-1",)), value, True)
+    else:
+        into_array = func.jsonb_insert(doc, _path_literal(path), value)
+    return case(
+        (func.jsonb_typeof(parent) == "array", into_array),
+        else_=func.jsonb_set(doc, _path_literal(path), value, True),
+    )
+
+
+def _step_sql(doc, step: PatchStep):
+    """(новый документ, предусловие) для шага."""
+    path = step.path
+    if step.kind == "add":
+        return _add(doc, path, _json(step.value)), _add_condition(doc, path)
+    if step.kind == "replace":
+        new = _json(step.value) if not path else func.jsonb_set(doc, _path_literal(path), _json(step.value), False)
+        return new, _exists(doc, path)
+    if step.kind == "remove":
+        return doc.op("#-")(_path_literal(path)), _exists(doc, path)
+    if step.kind == "test":
+        return doc, _at(doc, path) == _json(step.value)
+    if step.kind == "copy":
+        return _add(doc, path, _at(doc, step.from_path)), and_(_exists(doc, step.from_path), _add_condition(doc, path))
+    if step.kind == "move":
+        removed = doc.op("#-")(_path_literal(step.from_path))
+        return (
+            _add(removed, path, _at(doc, step.from_path)),
+            and_(_exists(doc, step.from_path), _add_condition(removed, path)),
+        )
+    if step.kind == "ensure_object":
+        new = case(
+            (func.jsonb_typeof(_at(doc, path)) == "object", doc),
+            else_=func.jsonb_set(doc, _path_literal(path), _json({}), True),
+        )
+        return new, literal(True)
+    if step.kind == "set":
+        return func.jsonb_set(doc, _path_literal(path), _json(step.value), True), literal(True)
+    if step.kind == "delete":
+        return doc.op("#-")(_path_literal(path)), literal(True)
+    raise ValueError(step.kind)
+
+
+def build_patch_statements(
+    project_id: int,
+    steps: Sequence[PatchStep],
+    expected_updated_at: Optional[datetime] = None,
+):
+    """
+    UPDATE с цепочкой CTE: s0 берёт config под FOR UPDATE, каждый
+    следующий s<i> применяет один шаг к документу предыдущего и запоминает
+    номер первого шага, чьё предусловие не выполнилось. Запись происходит,
+    только если таких шагов нет (и версия совпала с expected_updated_at).
+    Размер SQL линеен по числу шагов, в БД уходят только изменённые значения.
+
+    Возвращает (update ... returning updated_at, select failed) — второй
+    запрос нужен, чтобы объяснить клиенту, какая операция не применилась;
+    если он не вернул ни одной строки, проекта уже нет.
+    """
+    project = models.Project
+    prev = (
+        select(
+            func.coalesce(project.config, _json({})).label("d"),
+            cast(literal(None), Integer).label("failed"),
+        )
+        .where(project.id == project_id)
+        .with_for_update()
+        .cte("s0")
+    )
+    for index, step in enumerate(steps, start=1):
+        new_doc, condition = _step_sql(prev.c.d, step)
+        failed = case(
+            (prev.c.failed.isnot(None), prev.c.failed),
+            (func.coalesce(condition, False), cast(literal(None), Integer)),
+            else_=literal(index),
+        )
+        prev = select(new_doc.label("d"), failed.label("failed")).select_from(prev).cte(f"s{index}")
+
+    conditions = [
+        project.id == project_id,
+        select(prev.c.failed).scalar_subquery().is_(None),
+    ]
+    if expected_updated_at is not None:
+        conditions.append(project.updated_at == expected_updated_at)
+    stmt = (
+        update(project)
+        .where(*conditions)
+        .values(config=select(prev.c.d).scalar_subquery(), updated_at=func.now())
+        .returning(project.updated_at)
+    )
+    return stmt, select(prev.c.failed)
+
+
+def describe_step(step: PatchStep) -> str:
+    if step.kind in ("copy", "move"):
+        return f"{step.kind} {_pointer(step.from_path)} -> {_pointer(step.path)}"
+    return f"{step.kind} {_pointer(step.path)}"
@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import mmap
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
+
+from app.schemas.fsm import StateEncoding
+from app.schemas.simulation import (
+    CoSimulationDivergence,
+    CoSimulationResult,
+    SimulationRequest,
+)
+from app.services.fsm_verilog import state_encoding
+from app.services.simulation import simulate
+
+
+class VCDParseError(Exception):
+    pass
+
+
+@dataclass
+class VCDVariable:
+    id: str
+    name: str
+    width: int
+    scope: str
+
+    @property
+    def path(self) -> str:
+        return f"{self.scope}.{self.name}" if self.scope else self.name
+
+
+class VCDReader:
+    """
+    Потоковый разбор Value Change Dump поверх mmap.
+
+    Заголовок ($scope / $var / $timescale) разбирается сразу, тело файла —
+    лениво в changes() поиском по отображённой памяти, поэтому память
+    процесса не зависит от размера файла (многогигабайтные дампы читаются
+    так же, как маленькие). Значения отдаются строками VCD без разбора.
+    """
+
+    def __init__(self, file: BinaryIO) -> None:
+        self._mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.timescale = ""
+        self.variables: List[VCDVariable] = []
+        self._body_offset = 0
+        self._parse_header()
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def __enter__(self) -> "VCDReader":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def _header_tokens(self) -> Iterator[str]:
+        mm = self._mm
+        mm.seek(0)
+        for line in iter(mm.readline, b""):
+            for token in line.decode("utf-8", errors="replace").split():
+                yield token
+            self._body_offset = mm.tell()
+
+    def _parse_header(self) -> None:
+        tokens = self._header_tokens()
+        scopes: List[str] = []
+        for token in tokens:
+            if token == "$enddefinitions":
+                self._skip_to_end(tokens)
+                self._body_offset = self._mm.tell()
+                return
+            if token == "$scope":
+                block = self._read_block(tokens)
+                scopes.append(block[1] if len(block) > 1 else "")
+            elif token == "$upscope":
+                self._read_block(tokens)
+                if scopes:
+                    scopes.pop()
+            elif token == "$timescale":
+                self.timescale = "".join(self._read_block(tokens))
+            elif token == "$var":
+                block = self._read_block(tokens)
+                if len(block) < 4:
+                    raise VCDParseError(f"Некорректное объявление $var: {' '.join(block)}")
+                try:
+                    width = int(block[1])
+                except ValueError:
+                    raise VCDParseError(f"Некорректная разрядность в $var: {block[1]}") from None
+                self.variables.append(
+                    VCDVariable(id=block[2], name=block[3], width=width, scope=".".join(scopes))
+                )
+            elif token.startswith("$"):
+                self._skip_to_end(tokens)
+        raise VCDParseError("В файле нет $enddefinitions")
+
+    @staticmethod
+    def _read_block(tokens: Iterator[str]) -> List[str]:
+        block: List[str] = []
+        for token in tokens:
+            if token == "$end":
+                return block
+            block.append(token)
+        raise VCDParseError("Незакрытый блок в заголовке VCD")
+
+    def _skip_to_end(self, tokens: Iterator[str]) -> None:
+        self._read_block(tokens)
+
+    def find(self, name: str) -> Optional[VCDVariable]:
+        """
+        Переменная по имени: точное совпадение полного пути
+        (tb.dut.state), иначе первая с совпадающим окончанием пути.
+        """
+        for var in self.variables:
+            if var.path == name:
+                return var
+        suffix = "." + name
+        for var in self.variables:
+            if var.name == name or var.path.endswith(suffix):
+                return var
+        return None
+
+    def changes(self, var: VCDVariable) -> Iterator[Tuple[int, str]]:
+        """
+        (время, значение) для изменений одной переменной.
+        Значение — строка VCD: '0'/'1'/'x'/'z' для скаляров, '0101'/'x' для векторов.
+
+        Строки переменной ищутся поиском подстроки прямо по mmap (в C,
+        со скоростью чтения памяти); строки остальных сигналов и отметки
+        времени в Python не попадают — время изменения находится обратным
+        поиском ближайшей строки '#'. Ожидается обычная раскладка дампа —
+        одна запись на строку, как пишут iverilog, Verilator, ModelSim и GTKWave.
+        """
+        mm = self._mm
+        ident = var.id.encode()
+        body = max(self._body_offset, 1)
+        # конец записи: id, затем перевод строки (\n или \r\n) или конец файла
+        needle = ident + (b"\r\n" if mm.find(b"\r\n", 0, body) >= 0 else b"\n")
+
+        stamp_at = -2
+        time = 0
+        for pos in self._find_all(needle, ident):
+            line_start = mm.rfind(b"\n", body - 1, pos) + 1
+            head = mm[line_start:pos]
+            if len(head) == 1 and head in b"01xXzZ":
+                value = head
+            elif len(head) > 2 and head[:1] in (b"b", b"B") and head[-1:] in (b" ", b"\t"):
+                value = head[1:].strip()
+            else:
+                continue  # совпадение внутри другой записи
+
+            stamp = mm.rfind(b"\n#", body - 1, line_start)
+            if stamp != stamp_at:
+                stamp_at = stamp
+                if stamp >= 0:
+                    time = int(mm[stamp + 2:mm.find(b"\n", stamp + 1)])
+            yield time, value.decode().lower()
+
+    def _find_all(self, needle: bytes, ident: bytes) -> Iterator[int]:
+        mm = self._mm
+        pos = mm.find(needle, self._body_offset)
+        while pos >= 0:
+            yield pos
+            pos = mm.find(needle, pos + len(needle))
+        # последняя строка без перевода строки
+        tail = len(mm) - len(ident)
+        if tail >= self._body_offset and mm[tail:] == ident:
+            yield tail
+
+
+def _decode(value: str) -> Optional[int]:
+    try:
+        return int(value, 2)
+    except ValueError:
+        return None  # x / z
+
+
+def cosimulate(
+    file: BinaryIO,
+    request: SimulationRequest,
+    state_signal: str = "state",
+    encoding: StateEncoding = StateEncoding.BINARY,
+) -> CoSimulationResult:
+    """
+    Сравнивает состояние из VCD внешнего RTL-прогона с таймлайном simulate().
+
+    Значение регистра состояния переводится в id через кодирование
+    localparam из generate_verilog_from_fsm. Время RTL (такты) и время
+    симуляции не сопоставимы, поэтому сравниваются последовательности
+    смен состояния: первое расхождение и статистика по всей длине.
+    """
+    codes = state_encoding(request.fsm, encoding)
+    by_code = {code: sid for sid, code in codes.items()}
+
+    simulated: List[Tuple[int, str]] = []
+    for item in simulate(request).timeline:
+        if not simulated or simulated[-1][1] != item.state_id:
+            simulated.append((item.time, item.state_id))
+
+    with VCDReader(file) as reader:
+        var = reader.find(state_signal)
+        if var is None:
+            raise VCDParseError(f"Сигнал '{state_signal}' не найден в VCD")
+
+        rtl_visits: Counter[str] = Counter()
+        unknown_values = 0
+        rtl_changes = 0
+        mismatched = 0
+        first: Optional[CoSimulationDivergence] = None
+        last_value: Optional[str] = None
+        rtl_state: Optional[str] = None
+
+        for time, value in reader.changes(var):
+            if value == last_value:
+                continue
+            last_value = value
+            code = _decode(value)
+            state_id = by_code.get(code) if code is not None else None
+            if state_id is None:
+                unknown_values += 1
+                continue
+            if state_id == rtl_state:
+                continue
+            rtl_state = state_id
+            index = rtl_changes
+            rtl_changes += 1
+            rtl_visits[state_id] += 1
+
+            expected = simulated[index] if index < len(simulated) else None
+            if expected is None or expected[1] != state_id:
+                mismatched += 1
+                if first is None:
+                    first = CoSimulationDivergence(
+                        index=index,
+                        rtl_time=time,
+                        rtl_state_id=state_id,
+                        rtl_value=value,
+                        simulation_time=expected[0] if expected else None,
+                        simulation_state_id=expected[1] if expected else None,
+                    )
+
+    if first is None and rtl_changes < len(simulated):
+        # RTL закончился раньше симуляции
+        time, state_id = simulated[rtl_changes]
+        first = CoSimulationDivergence(
+            index=rtl_changes,
+            simulation_time=time,
+            simulation_state_id=state_id,
+        )
+
+    simulation_visits = Counter(state_id for _, state_id in simulated)
+    return CoSimulationResult(
+        signal=var.path,
+        timescale=reader.timescale,
+        rtl_changes=rtl_changes,
+        simulation_changes=len(simulated),
+        matched_prefix=first.index if first else rtl_changes,
+        mismatched_positions=mismatched + max(0, len(simulated) - rtl_changes),
+        unknown_values=unknown_values,
+        equivalent=first is None,
+        first_divergence=first,
+        rtl_visits=dict(rtl_visits),
+        simulation_visits=dict(simulation_visits),
+    )
+
+
+def cosimulate_path(
+    path: str,
+    request: SimulationRequest,
+    state_signal: str = "state",
+    encoding: StateEncoding = StateEncoding.BINARY,
+) -> CoSimulationResult:
+    """cosimulate() по пути к файлу — для запуска в пуле процессов симуляций."""
+    with open(path, "rb") as file:
+        return cosimulate(file, request, state_signal, encoding)
@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
+
+from app.core.config import settings
+from app.schemas.fsm import FSMDefinition
+from app.schemas.scenario import Direction, ScenarioEventType
+from app.schemas.simulation import (
+    CoverageReport,
+    SimulationMetrics,
+    SimulationRequest,
+    SimulationResult,
+    TimelineItem,
+)
+from app.services.fsm_minimization import minimize_fsm
+from app.services.simulation import (
+    ALLOWED_MOVING_STATES,
+    EVENT_CODES,
+    NUM_SYMBOLS,
+    OPEN_STATES,
+    CompiledFSM,
+    SimulationValidationError,
+    _ordered_events,
+    _validate_or_raise,
+    compile_fsm,
+    transition_lut,
+)
+from app.services.simulation_metrics import CoverageCounters, WaitTimeMetrics
+from app.utils.cache import LRUCache
+from app.utils.etag import content_hash
+
+# хэш FSM -> скомпилированный код; генерация и compile() дороже самой симуляции
+_codegen_cache: LRUCache["CompiledSimulation"] = LRUCache(maxsize=settings.SIMULATION_CODEGEN_CACHE_SIZE)
+
+_SOFT_MODE_EVENTS = {ScenarioEventType.CALL, ScenarioEventType.CABIN}
+_DIRECTION_NAMES = {Direction.NONE: "NONE", Direction.UP: "UP", Direction.DOWN: "DOWN"}
+
+
+@dataclass
+class CompiledSimulation:
+    """
+    FSM, скомпилированный в Python-функции симуляции.
+
+    run_timeline / run_metrics(events, move_time, door_time, waits, coverage[, timeline])
+    прогоняют события и возвращают total_moves; waits и coverage — те же
+    накопители, что у _SimulationEngine. source — сгенерированный код.
+    """
+    compiled: CompiledFSM
+    source: str
+    run_timeline: Callable[..., int]
+    run_metrics: Callable[..., int]
+
+
+class _Source:
+    def __init__(self) -> None:
+        self.lines: List[str] = []
+
+    def add(self, indent: int, line: str) -> None:
+        self.lines.append("    " * indent + line)
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+class _Generator:
+    """
+    Генерация кода по CompiledFSM.
+
+    Исход каждой пары (состояние, символ) известен заранее: переход
+    (с проверками, которые в интерпретаторе делаются на каждом событии),
+    мягкий режим или необработанное событие. Одинаковые исходы
+    объединяются в действия; действие по паре берётся из плоской таблицы
+    ACTIONS, а ветка действия выбирается сбалансированным деревом
+    сравнений — O(log числа действий) на событие, без словарей и
+    сравнения строк. Состояние хранится сразу как смещение строки
+    таблицы (индекс * NUM_SYMBOLS).
+    """
+
+    def __init__(self, compiled: CompiledFSM) -> None:
+        self.compiled = compiled
+        self.state_ids = [st.id for st in compiled.states]
+        self.actions: List[Tuple] = []
+        action_ids: Dict[Tuple, int] = {}
+        self.table: List[int] = []
+        lut = transition_lut(compiled)
+        for state_idx in range(len(self.state_ids)):
+            for ev_type, code in EVENT_CODES.items():
+                for nonzero in (0, 1):
+                    tr_idx = lut[state_idx * NUM_SYMBOLS + code * 2 + nonzero]
+                    key = self._action_key(state_idx, ev_type, tr_idx)
+                    if key not in action_ids:
+                        action_ids[key] = len(self.actions)
+                        self.actions.append(key)
+                    self.table.append(action_ids[key])
+
+    def _action_key(self, state_idx: int, ev_type: ScenarioEventType, tr_idx: int) -> Tuple:
+        if tr_idx < 0:
+            return ("soft" if ev_type in _SOFT_MODE_EVENTS else "unhandled", state_idx)
+        target = self.compiled.transitions[tr_idx].to_state_id
+        if target not in self.compiled.state_index:
+            return ("unknown", tr_idx)
+        current = self.state_ids[state_idx].lower()
+        if current in OPEN_STATES and target.lower() in ALLOWED_MOVING_STATES:
+            return ("unsafe", state_idx, tr_idx)
+        return ("transition", tr_idx)
+
+    # --- фрагменты кода ---
+
+    def _emit(self, src: _Source, indent: int, record: bool, time: str, state_id: str,
+              doors_open: bool | str, direction: str) -> None:
+        index = self.compiled.state_index.get(state_id, -1)
+        src.add(indent, f"enter({index}, {time})")
+        if record:
+            src.add(
+                indent,
+                f"append(Item(time=int(round({time})), floor=floor, state_id={state_id!r}, "
+                f"doors_open={doors_open}, direction={direction}))",
+            )
+
+    def _arrive(self, src: _Source, indent: int, record: bool, fallback_idx: int) -> None:
+        compiled = self.compiled
+        src.add(indent, "floor = target")
+        self._emit(src, indent, record, "now", compiled.door_opening_id, False, "NONE")
+        src.add(indent, "now += quarter")
+        self._emit(src, indent, record, "now", compiled.door_open_id, True, "NONE")
+        src.add(indent, "now += half")
+        self._emit(src, indent, record, "now", compiled.door_closing_id, False, "NONE")
+        src.add(indent, "now += quarter")
+        self._emit(src, indent, record, "now", compiled.idle_id, False, "NONE")
+        next_idx = compiled.state_index.get(compiled.idle_id, fallback_idx)
+        src.add(indent, f"state = {next_idx * NUM_SYMBOLS}")
+
+    def _move(self, src: _Source, indent: int) -> None:
+        src.add(indent, "target = ev.floor")
+        src.add(indent, "diff = abs(target - floor)")
+        src.add(indent, "travel = diff * move_time")
+
+    def _serve(self, src: _Source, indent: int) -> None:
+        src.add(indent, "moves += diff")
+        src.add(indent, "add_wait(max((now - ev.time) + travel, 0.0), target, ev.direction)")
+
+    def _raise(self, src: _Source, indent: int, detail: str, transition_id: str) -> None:
+        src.add(
+            indent,
+            f"raise SimulationValidationError([{{'detail': {detail!r}, 'transition_id': {transition_id!r}}}])",
+        )
+
+    def _action(self, src: _Source, indent: int, record: bool, key: Tuple) -> None:
+        kind = key[0]
+        if kind == "unhandled":
+            state_id = self.state_ids[key[1]]
+            src.add(indent, "unhandled += 1")
+            self._emit(src, indent, record, "now", state_id, state_id.lower() == "doors_open", "NONE")
+        elif kind == "soft":
+            state_id = self.state_ids[key[1]]
+            src.add(indent, "soft += 1")
+            self._move(src, indent)
+            if record:
+                src.add(indent, "direction = UP if target > floor else DOWN if target < floor else NONE")
+            self._emit(src, indent, record, "now", state_id, state_id.lower() == "doors_open", "direction")
+            self._serve(src, indent)
+            src.add(indent, "now = max(now, float(ev.time)) + travel")
+            self._arrive(src, indent, record, key[1])
+        elif kind == "unknown":
+            tr = self.compiled.transitions[key[1]]
+            self._raise(src, indent, f"Transition {tr.id} указывает на неизвестное состояние", tr.id)
+        elif kind == "unsafe":
+            tr = self.compiled.transitions[key[2]]
+            detail = f"Недопустимый переход {tr.id}: {self.state_ids[key[1]]} -> {tr.to_state_id}"
+            self._raise(src, indent, detail, tr.id)
+        else:
+            tr_idx = key[1]
+            target = self.compiled.transitions[tr_idx].to_state_id
+            target_idx = self.compiled.state_index[target]
+            src.add(indent, f"hits[{tr_idx}] += 1")
+            src.add(indent, "now = max(now, float(ev.time))")
+            if target.lower() in ALLOWED_MOVING_STATES:
+                direction = "UP" if target.lower() == "moving_up" else "DOWN"
+                self._move(src, indent)
+                self._emit(src, indent, record, "now", target, False, direction)
+                self._serve(src, indent)
+                src.add(indent, "now += travel")
+                self._arrive(src, indent, record, target_idx)
+            else:
+                self._emit(src, indent, record, "now", target, target.lower() == "doors_open", "NONE")
+                src.add(indent, f"state = {target_idx * NUM_SYMBOLS}")
+
+    def _dispatch(self, src: _Source, indent: int, record: bool, lo: int, hi: int) -> None:
+        if hi - lo == 1:
+            self._action(src, indent, record, self.actions[lo])
+            return
+        mid = (lo + hi) // 2
+        src.add(indent, f"if action < {mid}:")
+        self._dispatch(src, indent + 1, record, lo, mid)
+        src.add(indent, "else:")
+        self._dispatch(src, indent + 1, record, mid, hi)
+
+    def _function(self, src: _Source, name: str, record: bool) -> None:
+        initial_id = self.state_ids[self.compiled.initial_index]
+        args = "events, move_time, door_time, waits, coverage" + (", timeline" if record else "")
+        src.add(0, f"def {name}({args}):")
+        src.add(1, "enter = coverage.enter")
+        src.add(1, "hits = coverage.transition_hits")
+        src.add(1, "add_wait = waits.add")
+        if record:
+            src.add(1, "append = timeline.append")
+        src.add(1, "quarter = door_time * 0.25")
+        src.add(1, "half = door_time * 0.5")
+        src.add(1, f"state = {self.compiled.initial_index * NUM_SYMBOLS}")
+        src.add(1, "floor = 0")
+        src.add(1, "now = 0.0")
+        src.add(1, "moves = soft = unhandled = 0")
+        self._emit(src, 1, record, "now", initial_id, False, "NONE")
+        src.add(1, "for ev in events:")
+        src.add(2, "action = ACTIONS[state + CODES[ev.type] + (1 if ev.floor else 0)]")
+        self._dispatch(src, 2, record, 0, len(self.actions))
+        src.add(1, "coverage.events += len(events)")
+        src.add(1, "coverage.soft_mode_hits += soft")
+        src.add(1, "coverage.unhandled_events += unhandled")
+        src.add(1, "return moves")
+        src.add(0, "")
+
+    def source(self) -> str:
+        src = _Source()
+        # строки пользователя (id состояний, переходов) попадают в код
+        # только через repr(), никогда в комментарии или имена
+        src.add(0, "# Auto-generated simulation code")
+        src.add(0, f"STATE_IDS = {tuple(self.state_ids)!r}")
+        src.add(0, f"ACTIONS = {tuple(self.table)!r}")
+        src.add(0, "")
+        self._function(src, "run_timeline", record=True)
+        self._function(src, "run_metrics", record=False)
+        return src.text()
+
+
+def generate_simulation_source(fsm: FSMDefinition) -> str:
+    """Python-код специализированной симуляции для FSM (для отладки)."""
+    return _Generator(compile_fsm(fsm)).source()
+
+
+def compile_simulation(fsm: FSMDefinition) -> CompiledSimulation:
+    """
+    Генерирует и компилирует код симуляции; результат кэшируется
+    по хэшу содержимого FSM.
+    """
+    key = content_hash(fsm.model_dump(mode="json"))
+    cached = _codegen_cache.get(key)
+    if cached is not None:
+        return cached
+
+    compiled = compile_fsm(fsm)
+    source = _Generator(compiled).source()
+    namespace: Dict[str, object] = {
+        "CODES": {ev: code * 2 for ev, code in EVENT_CODES.items()},
+        "Item": TimelineItem,
+        "SimulationValidationError": SimulationValidationError,
+        **{name: direction for direction, name in _DIRECTION_NAMES.items()},
+    }
+    exec(compile(source, f"<fsm-simulation {key[:12]}>", "exec"), namespace)
+    result = CompiledSimulation(
+        compiled=compiled,
+        source=source,
+        run_timeline=namespace["run_timeline"],  # type: ignore[arg-type]
+        run_metrics=namespace["run_metrics"],  # type: ignore[arg-type]
+    )
+    _codegen_cache.set(key, result)
+    return result
+
+
+def simulate_compiled(
+    request: SimulationRequest,
+    metrics_only: bool = False,
+    minimize: bool = False,
+) -> SimulationResult:
+    """
+    То же, что simulate(), но на сгенерированном для этого FSM коде.
+    Результат совпадает с simulate() (проверяется дифференциально
+    на случайных FSM и сценариях).
+    """
+    events = _ordered_events(request.scenario.events)
+    fsm = request.fsm
+
+    _validate_or_raise(fsm)
+    if minimize:
+        fsm = minimize_fsm(fsm).fsm
+
+    if not events:
+        return SimulationResult(
+            timeline=[],
+            metrics=SimulationMetrics(
+                avg_wait_time=0.0,
+                total_moves=0,
+                stops=0,
+            ),
+            coverage=CoverageReport(),
+        )
+
+    program = compile_simulation(fsm)
+    compiled = program.compiled
+    config = request.config
+    waits = WaitTimeMetrics(config.floors)
+    coverage = CoverageCounters(len(compiled.states), len(compiled.transitions))
+    move_time = float(config.move_time)
+    door_time = float(config.door_time)
+
+    timeline: List[TimelineItem] = []
+    if metrics_only:
+        total_moves = program.run_metrics(events, move_time, door_time, waits, coverage)
+    else:
+        total_moves = program.run_timeline(events, move_time, door_time, waits, coverage, timeline)
+
+    return SimulationResult(
+        timeline=timeline,
+        metrics=waits.to_schema(total_moves),
+        coverage=coverage.to_schema(
+            compiled.states,
+            compiled.transitions,
+            idle_index=compiled.state_index.get(compiled.idle_id, -1),
+        ),
+    )
+
+
+def codegen_cache_stats() -> Dict[str, float]:
+    return _codegen_cache.stats()
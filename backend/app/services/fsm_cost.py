@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from typing import List
+
+from app.schemas.fsm import (
+    FSMCaseArmCost,
+    FSMCostReport,
+    FSMDefinition,
+    FSMEncodingCost,
+    StateEncoding,
+)
+from app.services.fsm_graph import FSMGraph
+from app.services.fsm_validation import SUPPORTED_SIGNALS, UNCONDITIONAL, normalize_condition
+from app.services.fsm_verilog import collect_output_signals, state_encoding, state_encoding_width
+
+# Грубая модель площади в эквивалентах вентилей: триггер с асинхронным
+# сбросом ~ 6 GE, каждый литерал в сумме произведений ~ 1 GE
+FLIP_FLOP_AREA = 6
+LITERAL_AREA = 1
+
+
+def _popcount(value: int) -> int:
+    return bin(value).count("1")
+
+
+def estimate_fsm_cost(fsm: FSMDefinition) -> FSMCostReport:
+    """
+    Оценка стоимости модуля из generate_verilog_from_fsm без синтеза.
+
+    Логика следующего состояния считается как сумма произведений:
+    переход k в ветке состояния s даёт терм
+    (curr_state == s) & cond_k & ~cond_1 & ... & ~cond_{k-1}
+    для каждого единичного бита кода целевого состояния; если в ветке нет
+    безусловного перехода, добавляется терм удержания (все условия ложны)
+    для единичных битов кода самого s. Декодирование состояния стоит
+    width литералов для binary/gray и один литерал для one-hot.
+    Всё считается за O(S + T) для каждого кодирования.
+    """
+    graph = FSMGraph(fsm)
+    transitions = fsm.transitions
+
+    # ветки case: условия в порядке приоритета до первого безусловного
+    arms: List[FSMCaseArmCost] = []
+    chains: List[List[tuple]] = []
+    signals = set()
+    for idx, state_id in enumerate(graph.state_ids):
+        chain: List[tuple] = []
+        shadowed = 0
+        closed = False
+        for tr_idx in graph.out_transitions[idx]:
+            tr = transitions[tr_idx]
+            cond = normalize_condition(tr.condition)
+            if closed:
+                shadowed += 1
+                continue
+            unconditional = cond in UNCONDITIONAL
+            # неподдерживаемые условия в Verilog — неподключённые провода,
+            # но литерал в логике всё равно занимают
+            chain.append((graph.index[tr.to_state_id], unconditional))
+            if not unconditional and cond in SUPPORTED_SIGNALS:
+                signals.add(cond)
+            closed = unconditional
+        chains.append(chain)
+        arms.append(
+            FSMCaseArmCost(
+                state_id=state_id,
+                chain_depth=len(chain),
+                shadowed_transitions=shadowed,
+                holds_state=not closed,
+            )
+        )
+
+    encodings: List[FSMEncodingCost] = []
+    for encoding in StateEncoding:
+        width = state_encoding_width(len(fsm.states), encoding)
+        codes = state_encoding(fsm, encoding)
+        decode = 1 if encoding == StateEncoding.ONE_HOT else width
+        terms = 0
+        literals = 0
+        max_term = 0
+        for idx, chain in enumerate(chains):
+            negated = 0
+            for target, unconditional in chain:
+                term_literals = decode + negated + (0 if unconditional else 1)
+                ones = _popcount(codes[graph.state_ids[target]])
+                terms += ones
+                literals += ones * term_literals
+                if ones:
+                    max_term = max(max_term, term_literals)
+                negated += 0 if unconditional else 1
+            if not arms[idx].holds_state:
+                continue
+            ones = _popcount(codes[graph.state_ids[idx]])
+            term_literals = decode + negated
+            terms += ones
+            literals += ones * term_literals
+            if ones:
+                max_term = max(max_term, term_literals)
+
+        encodings.append(
+            FSMEncodingCost(
+                encoding=encoding,
+                flip_flops=width,
+                next_state_terms=terms,
+                next_state_literals=literals,
+                max_term_literals=max_term,
+                estimated_area=width * FLIP_FLOP_AREA + literals * LITERAL_AREA,
+            )
+        )
+
+    outputs = collect_output_signals(fsm, signals)
+    output_terms = 0
+    if outputs:
+        sources = [st.outputs for st in fsm.states] + [tr.actions for tr in transitions]
+        for values in sources:
+            for name, value in (values or {}).items():
+                if name in outputs and value not in (0, False, None):
+                    output_terms += 1
+
+    best = min(encodings, key=lambda cost: (cost.estimated_area, cost.max_term_literals))
+    fastest = min(encodings, key=lambda cost: (cost.max_term_literals, cost.estimated_area))
+    reason = (
+        f"{best.encoding.value}: минимальная оценка площади "
+        f"({best.flip_flops} триггеров, {best.next_state_literals} литералов)"
+    )
+    if fastest.encoding != best.encoding:
+        reason += (
+            f"; {fastest.encoding.value} даёт самые короткие термы "
+            f"({fastest.max_term_literals} литералов) — лучше по частоте"
+        )
+
+    return FSMCostReport(
+        states=len(graph.state_ids),
+        transitions=len(transitions),
+        input_signals=sorted(signals),
+        output_signals=sorted(outputs),
+        output_terms=output_terms,
+        max_chain_depth=max((arm.chain_depth for arm in arms), default=0),
+        arms=arms,
+        encodings=encodings,
+        recommended_encoding=best.encoding,
+        reason=reason,
+    )
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.schemas.fsm import FSMDefinition, StateEncoding
+from app.services.fsm_minimization import minimize_fsm
+from app.services.fsm_validation import FSMValidationError, validate_fsm_for_export
+from app.services.fsm_verilog import VERILOG_FORMAT_VERSION, iter_verilog
+from app.utils.cache import LRUCache
+from app.utils.etag import content_hash, make_etag
+
+# ETag -> готовый текст модуля. Ключ учитывает содержимое FSM, имя модуля,
+# кодирование и минимизацию, поэтому при изменении проекта кэш не нужно чистить.
+_verilog_cache: LRUCache[str] = LRUCache(maxsize=settings.VERILOG_EXPORT_CACHE_SIZE)
+
+_STREAM_CHUNK = 64 * 1024
+
+
+# Разобранный config проекта (ParsedProjectConfig) уже знает хэш FSM и держит
+# проверенный автомат — тогда их передают через fsm_hash / prepare.
+Prepare = Callable[[bool], FSMDefinition]
+
+
+def verilog_export_etag(
+    raw_fsm: Any,
+    module_name: str,
+    encoding: StateEncoding = StateEncoding.BINARY,
+    minimize: bool = False,
+    fsm_hash: Optional[str] = None,
+) -> str:
+    fsm_hash = fsm_hash or content_hash(raw_fsm)
+    return make_etag("verilog", VERILOG_FORMAT_VERSION, fsm_hash, module_name, encoding.value, int(minimize))
+
+
+def prepare_fsm_for_export(raw_fsm: Any, minimize: bool = False) -> FSMDefinition:
+    """
+    Разбирает config["fsm"] из БД и проверяет его для экспорта.
+    Любая ошибка превращается в FSMValidationError.
+    """
+    try:
+        fsm = FSMDefinition.model_validate(raw_fsm)
+    except ValidationError as exc:
+        errors = [
+            " ".join(["FSM", ".".join(str(part) for part in err["loc"])]).strip() + f": {err['msg']}"
+            for err in exc.errors()
+        ]
+        raise FSMValidationError(errors) from exc
+    validate_fsm_for_export(fsm)
+    if minimize:
+        fsm = minimize_fsm(fsm).fsm
+    return fsm
+
+
+def export_verilog(
+    raw_fsm: Any,
+    module_name: str,
+    encoding: StateEncoding = StateEncoding.BINARY,
+    minimize: bool = False,
+    fsm_hash: Optional[str] = None,
+    prepare: Optional[Prepare] = None,
+) -> Tuple[str, str]:
+    """
+    Verilog-модуль для FSM проекта: (etag, текст). Повторный экспорт того же
+    FSM не разбирает и не валидирует config заново.
+    """
+    etag = verilog_export_etag(raw_fsm, module_name, encoding, minimize, fsm_hash)
+    cached = _verilog_cache.get(etag)
+    if cached is not None:
+        return etag, cached
+    fsm = prepare(minimize) if prepare else prepare_fsm_for_export(raw_fsm, minimize)
+    verilog = "".join(iter_verilog(fsm, module_name, encoding))
+    if len(verilog) <= settings.VERILOG_EXPORT_CACHE_MAX_CHARS:
+        _verilog_cache.set(etag, verilog)
+    return etag, verilog
+
+
+def stream_verilog(
+    raw_fsm: Any,
+    module_name: str,
+    encoding: StateEncoding = StateEncoding.BINARY,
+    minimize: bool = False,
+    fsm_hash: Optional[str] = None,
+    prepare: Optional[Prepare] = None,
+) -> Tuple[str, Iterator[str]]:
+    """
+    Как export_verilog, но текст отдаётся по кусочкам (для скачивания файла).
+    Валидация выполняется сразу, до начала ответа; генерация — по мере чтения.
+    """
+    etag = verilog_export_etag(raw_fsm, module_name, encoding, minimize, fsm_hash)
+    cached = _verilog_cache.get(etag)
+    if cached is not None:
+        return etag, _slices(cached)
+    fsm = prepare(minimize) if prepare else prepare_fsm_for_export(raw_fsm, minimize)
+    return etag, _generate_and_store(etag, iter_verilog(fsm, module_name, encoding))
+
+
+def _slices(text: str) -> Iterator[str]:
+    for start in range(0, len(text), _STREAM_CHUNK):
+        yield text[start:start + _STREAM_CHUNK]
+
+
+def _generate_and_store(etag: str, chunks: Iterator[str]) -> Iterator[str]:
+    # Небольшие модули кэшируются по ходу отдачи, большие — только стримятся
+    collected: Optional[List[str]] = []
+    size = 0
+    for chunk in chunks:
+        if collected is not None:
+            size += len(chunk)
+            if size > settings.VERILOG_EXPORT_CACHE_MAX_CHARS:
+                collected = None
+            else:
+                collected.append(chunk)
+        yield chunk
+    if collected is not None:
+        _verilog_cache.set(etag, "".join(collected))
+
+
+def verilog_cache_stats() -> dict:
+    return _verilog_cache.stats()
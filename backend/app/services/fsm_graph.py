@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Dict, Iterable, List
+
+from app.schemas.fsm import FSMDefinition
+
+
+class FSMGraph:
+    """
+    FSM как ориентированный граф на списках смежности.
+
+    Вершины — состояния (индексы в state_ids, дубликаты id схлопываются
+    в первое вхождение), рёбра — переходы. Переходы, ссылающиеся
+    на неизвестные состояния, в граф не попадают.
+    Все алгоритмы линейные: O(S + T).
+    """
+
+    def __init__(self, fsm: FSMDefinition) -> None:
+        self.fsm = fsm
+        self.state_ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        for st in fsm.states:
+            if st.id not in self.index:
+                self.index[st.id] = len(self.state_ids)
+                self.state_ids.append(st.id)
+
+        n = len(self.state_ids)
+        # successors[i] — куда ведут переходы из i; out_transitions[i] — индексы
+        # этих переходов в fsm.transitions (в порядке приоритета)
+        self.successors: List[List[int]] = [[] for _ in range(n)]
+        self.out_transitions: List[List[int]] = [[] for _ in range(n)]
+        for tr_idx, tr in enumerate(fsm.transitions):
+            src = self.index.get(tr.from_state_id)
+            dst = self.index.get(tr.to_state_id)
+            if src is None or dst is None:
+                continue
+            self.successors[src].append(dst)
+            self.out_transitions[src].append(tr_idx)
+
+        self.initial: List[int] = [self.index[st.id] for st in fsm.states if st.is_initial]
+
+    def __len__(self) -> int:
+        return len(self.state_ids)
+
+    def reachable(self, sources: Iterable[int]) -> List[bool]:
+        """
+        BFS: seen[i] = True, если состояние i достижимо из sources.
+        """
+        seen = [False] * len(self.state_ids)
+        queue: deque[int] = deque()
+        for src in sources:
+            if not seen[src]:
+                seen[src] = True
+                queue.append(src)
+        successors = self.successors
+        while queue:
+            node = queue.popleft()
+            for nxt in successors[node]:
+                if not seen[nxt]:
+                    seen[nxt] = True
+                    queue.append(nxt)
+        return seen
+
+    def strongly_connected_components(self) -> List[int]:
+        """
+        Итеративный алгоритм Тарьяна: номер компоненты сильной связности
+        для каждого состояния. Компоненты нумеруются в обратном
+        топологическом порядке (стоки — первыми).
+        """
+        n = len(self.state_ids)
+        successors = self.successors
+        index = [-1] * n
+        lowlink = [0] * n
+        on_stack = [False] * n
+        component = [-1] * n
+        stack: List[int] = []
+        counter = 0
+        components = 0
+
+        for root in range(n):
+            if index[root] != -1:
+                continue
+            # (вершина, позиция следующего соседа)
+            work: List[List[int]] = [[root, 0]]
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+
+            while work:
+                frame = work[-1]
+                node, pos = frame
+                if pos < len(successors[node]):
+                    frame[1] += 1
+                    nxt = successors[node][pos]
+                    if index[nxt] == -1:
+                        index[nxt] = lowlink[nxt] = counter
+                        counter += 1
+                        stack.append(nxt)
+                        on_stack[nxt] = True
+                        work.append([nxt, 0])
+                    elif on_stack[nxt] and index[nxt] < lowlink[node]:
+                        lowlink[node] = index[nxt]
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if lowlink[node] < lowlink[parent]:
+                        lowlink[parent] = lowlink[node]
+                if lowlink[node] == index[node]:
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component[member] = components
+                        if member == node:
+                            break
+                    components += 1
+
+        return component
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import io
+import re
+import zipfile
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.schemas.fsm import FSMDefinition
+from app.schemas.scenario import Scenario
+from app.services.simulation import (
+    EVENT_TYPES,
+    NUM_SYMBOLS,
+    CompiledFSM,
+    _ordered_events,
+    compile_fsm,
+    event_symbol,
+    transition_lut,
+)
+
+_NOT_IDENTIFIER = re.compile(r"[^A-Za-z0-9_]")
+
+
+@dataclass
+class FSMLookupTable:
+    """
+    FSM как плотная таблица (состояние × входной символ).
+
+    Символ — (тип события, floor != 0), всего NUM_SYMBOLS; это ровно те
+    признаки, от которых зависит выбор перехода в simulate().
+    next_state[s, sym] — индекс следующего состояния или -1 (нет перехода),
+    transition[s, sym] — индекс перехода в fsm.transitions или -1.
+    """
+    compiled: CompiledFSM
+    next_state: np.ndarray
+    transition: np.ndarray
+
+    @property
+    def state_ids(self) -> List[str]:
+        return [st.id for st in self.compiled.states]
+
+    @property
+    def symbols(self) -> List[str]:
+        return [f"{ev.value}_{'floor' if nonzero else 'ground'}" for ev in EVENT_TYPES for nonzero in (0, 1)]
+
+
+def build_lookup_table(fsm: FSMDefinition) -> FSMLookupTable:
+    compiled = compile_fsm(fsm)
+    transition = np.array(transition_lut(compiled), dtype=np.int16).reshape(-1, NUM_SYMBOLS)
+    targets = np.array(
+        [compiled.state_index.get(tr.to_state_id, -1) for tr in compiled.transitions] + [-1],
+        dtype=np.int16,
+    )
+    # индекс -1 указывает на последний элемент targets, т.е. снова на -1
+    next_state = targets[transition]
+    return FSMLookupTable(compiled=compiled, next_state=next_state, transition=transition)
+
+
+def lookup_table_npy(table: FSMLookupTable) -> bytes:
+    """Таблица next_state в формате .npy (int16, форма S × NUM_SYMBOLS)."""
+    buf = io.BytesIO()
+    np.save(buf, table.next_state, allow_pickle=False)
+    return buf.getvalue()
+
+
+def _c_identifiers(names: List[str], prefix: str) -> List[str]:
+    result: List[str] = []
+    seen: Dict[str, int] = {}
+    for name in names:
+        ident = f"{prefix}_{_NOT_IDENTIFIER.sub('_', name).upper()}"
+        count = seen.get(ident, 0)
+        seen[ident] = count + 1
+        result.append(ident if count == 0 else f"{ident}_{count}")
+    return result
+
+
+def _c_rows(matrix: np.ndarray, indent: str = "    ") -> str:
+    return ",\n".join(
+        indent + "{" + ", ".join(f"{int(v):d}" for v in row) + "}" for row in matrix
+    )
+
+
+def _c_string(value: str) -> str:
+    """
+    Строковый литерал C для произвольного id: байты UTF-8 вне печатного
+    ASCII (перевод строки, управляющие, не-ASCII) — восьмеричными escape
+    ровно из трёх цифр, чтобы следующий символ не продолжил escape
+    (у \\x длина не ограничена). '?' экранируется против триграфов.
+    """
+    chars = []
+    for byte in value.encode("utf-8"):
+        char = chr(byte)
+        if char in '\\"?':
+            chars.append("\\" + char)
+        elif 0x20 <= byte < 0x7F:
+            chars.append(char)
+        else:
+            chars.append(f"\\{byte:03o}")
+    return '"' + "".join(chars) + '"'
+
+
+def generate_c_header(table: FSMLookupTable, name: str = "elevator_fsm") -> str:
+    guard = f"{_NOT_IDENTIFIER.sub('_', name).upper()}_H"
+    states = _c_identifiers(table.state_ids, "STATE")
+    symbols = _c_identifiers(table.symbols, "SYM")
+    lines = [
+        "/* Auto-generated by Smart Elevator FSM backend. */",
+        f"#ifndef {guard}",
+        f"#define {guard}",
+        "",
+        "#include <stdint.h>",
+        "",
+        f"#define {name.upper()}_NUM_STATES {len(states)}",
+        f"#define {name.upper()}_NUM_SYMBOLS {NUM_SYMBOLS}",
+        f"#define {name.upper()}_INITIAL_STATE {states[table.compiled.initial_index]}",
+        "",
+        "enum {",
+        *[f"    {ident} = {idx}," for idx, ident in enumerate(states)],
+        "};",
+        "",
+        "enum {",
+        *[f"    EVENT_{ev.value.upper()} = {idx}," for idx, ev in enumerate(EVENT_TYPES)],
+        "};",
+        "",
+        "/* input symbol: event_type * 2 + (floor != 0) */",
+        "enum {",
+        *[f"    {ident} = {idx}," for idx, ident in enumerate(symbols)],
+        "};",
+        "",
+        f"extern const int16_t {name}_next[{len(states)}][{NUM_SYMBOLS}];",
+        f"extern const char *const {name}_state_names[{len(states)}];",
+        "",
+        "/* next state; stays in state when no transition matches */",
+        f"static inline int16_t {name}_step(int16_t state, uint8_t symbol)",
+        "{",
+        f"    int16_t next = {name}_next[state][symbol];",
+        "    return next >= 0 ? next : state;",
+        "}",
+        "",
+        "static inline uint8_t "
+        f"{name}_symbol(uint8_t event_type, int floor)",
+        "{",
+        "    return (uint8_t)(event_type * 2 + (floor != 0));",
+        "}",
+        "",
+        f"#endif /* {guard} */",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def generate_c_source(table: FSMLookupTable, name: str = "elevator_fsm") -> str:
+    states = table.state_ids
+    return "\n".join(
+        [
+            "/* Auto-generated by Smart Elevator FSM backend. */",
+            f'#include "{name}.h"',
+            "",
+            "/* -1: no matching transition */",
+            f"const int16_t {name}_next[{len(states)}][{NUM_SYMBOLS}] = {{",
+            _c_rows(table.next_state),
+            "};",
+            "",
+            f"const char *const {name}_state_names[{len(states)}] = {{",
+            ",\n".join(f"    {_c_string(sid)}" for sid in states),
+            "};",
+            "",
+        ]
+    )
+
+
+def generate_c_harness(
+    table: FSMLookupTable,
+    scenario: Optional[Scenario],
+    name: str = "elevator_fsm",
+) -> str:
+    """
+    Тестовая программа: проигрывает события сценария по таблице
+    и печатает состояние после каждого события. Моделируется только
+    сам автомат (без движения кабины и цикла дверей из simulate()).
+    """
+    events = _ordered_events(scenario.events) if scenario else []
+    rows = [
+        f"    {{{event_symbol(ev.type, ev.floor)}, {int(ev.time)}}}, /* {ev.type.value} floor={ev.floor} */"
+        for ev in events
+    ]
+    return "\n".join(
+        [
+            "/* Auto-generated by Smart Elevator FSM backend. */",
+            "#include <stdio.h>",
+            f'#include "{name}.h"',
+            "",
+            "struct scenario_event { uint8_t symbol; int time; };",
+            "",
+            f"static const struct scenario_event events[{max(len(rows), 1)}] = {{",
+            *(rows or ["    {0, 0}"]),
+            "};",
+            "",
+            "int main(void)",
+            "{",
+            f"    int16_t state = {name.upper()}_INITIAL_STATE;",
+            f"    printf(\"0 %s\\n\", {name}_state_names[state]);",
+            f"    for (unsigned i = 0; i < {len(rows)}u; ++i) {{",
+            f"        state = {name}_step(state, events[i].symbol);",
+            f"        printf(\"%d %s\\n\", events[i].time, {name}_state_names[state]);",
+            "    }",
+            "    return 0;",
+            "}",
+            "",
+        ]
+    )
+
+
+def export_lookup_table_zip(
+    fsm: FSMDefinition,
+    scenario: Optional[Scenario] = None,
+    name: str = "elevator_fsm",
+) -> bytes:
+    """
+    Архив для встраиваемых систем: {name}.h, {name}.c, {name}_harness.c
+    и {name}_next.npy с той же таблицей для NumPy.
+    """
+    name = _NOT_IDENTIFIER.sub("_", name)
+    table = build_lookup_table(fsm)
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr(f"{name}.h", generate_c_header(table, name))
+        zf.writestr(f"{name}.c", generate_c_source(table, name))
+        zf.writestr(f"{name}_harness.c", generate_c_harness(table, scenario, name))
+        zf.writestr(f"{name}_next.npy", lookup_table_npy(table))
+    return buf.getvalue()
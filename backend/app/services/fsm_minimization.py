@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import json
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+from app.schemas.fsm import (
+    FSMDefinition,
+    FSMEquivalenceResult,
+    FSMMinimizationResult,
+    FSMState,
+    FSMTransition,
+)
+from app.services.fsm_graph import FSMGraph
+from app.services.fsm_validation import (
+    ALLOWED_LIFT_STATES,
+    DOOR_OPEN_STATES,
+    MOVING_STATES,
+    normalize_condition,
+)
+
+# Состояния, id которых что-то значит для симуляции: их нельзя склеивать
+# с состояниями с другим id
+_SPECIAL_STATE_IDS = ALLOWED_LIFT_STATES | DOOR_OPEN_STATES | MOVING_STATES | {"doors_closing"}
+
+Label = Tuple[Optional[str], str]
+
+
+def _label(tr: FSMTransition) -> Label:
+    """Символ входного алфавита: (event_type, нормализованное условие)."""
+    return (tr.event_type.value if tr.event_type is not None else None, normalize_condition(tr.condition))
+
+
+def _dump(value: object) -> str:
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+@dataclass
+class _Automaton:
+    """
+    Полный детерминированный автомат для разбиения:
+    delta[s * len(labels) + a] — следующее состояние, последнее состояние — сток.
+    keys[s] — всё, что должно совпадать у эквивалентных состояний
+    (смысл id, выходы Мура, финальность, порядок меток, действия Мили).
+    """
+    states: List[FSMState]
+    labels: List[Label]
+    delta: List[int]
+    keys: List[Hashable]
+
+
+def _build_automaton(fsms: List[FSMDefinition]) -> Tuple[_Automaton, List[int]]:
+    """
+    Строит общий автомат для одного или нескольких FSM (для проверки
+    эквивалентности — дизъюнктное объединение). Возвращает автомат
+    и глобальные индексы начальных состояний каждого FSM.
+    """
+    label_index: Dict[Label, int] = {}
+    for fsm in fsms:
+        for tr in fsm.transitions:
+            label_index.setdefault(_label(tr), len(label_index))
+    labels = list(label_index)
+
+    states: List[FSMState] = []
+    keys: List[Hashable] = []
+    targets: List[Dict[Label, int]] = []
+    initials: List[int] = []
+
+    for fsm in fsms:
+        graph = FSMGraph(fsm)
+        offset = len(states)
+        by_id = {st.id: st for st in reversed(fsm.states)}  # первое вхождение
+        initials.append(offset + (graph.initial[0] if graph.initial else 0))
+        for idx, state_id in enumerate(graph.state_ids):
+            st = by_id[state_id]
+            chain: Dict[Label, FSMTransition] = {}
+            for tr_idx in graph.out_transitions[idx]:
+                tr = fsm.transitions[tr_idx]
+                # более поздний переход с той же меткой никогда не сработает
+                chain.setdefault(_label(tr), tr)
+            lowered = state_id.lower()
+            keys.append(
+                (
+                    lowered if lowered in _SPECIAL_STATE_IDS else "",
+                    st.is_final,
+                    _dump(st.outputs),
+                    tuple(chain),
+                    tuple(_dump(tr.actions) for tr in chain.values()),
+                )
+            )
+            states.append(st)
+            targets.append({label: offset + graph.index[tr.to_state_id] for label, tr in chain.items()})
+
+    sink = len(states)
+    k = len(labels)
+    delta = [sink] * ((sink + 1) * k)
+    for s, chain_targets in enumerate(targets):
+        for label, target in chain_targets.items():
+            delta[s * k + label_index[label]] = target
+    keys.append(("__sink__",))
+
+    return _Automaton(states, labels, delta, keys), initials
+
+
+def _refine(automaton: _Automaton) -> List[int]:
+    """
+    Алгоритм Хопкрофта (разбиение с уточнением), O(k · n log n).
+    Возвращает номер блока эквивалентности для каждого состояния.
+    """
+    n = len(automaton.keys)
+    k = len(automaton.labels)
+    delta = automaton.delta
+
+    # обратные переходы: inverse[a][t] — состояния s с delta(s, a) = t
+    inverse: List[List[List[int]]] = [[[] for _ in range(n)] for _ in range(k)]
+    for s in range(n):
+        row = s * k
+        for a in range(k):
+            inverse[a][delta[row + a]].append(s)
+
+    block_of = [0] * n
+    blocks: List[Set[int]] = []
+    by_key: Dict[Hashable, int] = {}
+    for s, key in enumerate(automaton.keys):
+        b = by_key.get(key)
+        if b is None:
+            b = by_key[key] = len(blocks)
+            blocks.append(set())
+        blocks[b].add(s)
+        block_of[s] = b
+
+    pending: Set[Tuple[int, int]] = {(b, a) for b in range(len(blocks)) for a in range(k)}
+    worklist = list(pending)
+
+    while worklist:
+        splitter, a = worklist.pop()
+        pending.discard((splitter, a))
+
+        # X = прообраз блока splitter по символу a, сгруппированный по блокам
+        touched: Dict[int, List[int]] = {}
+        for t in blocks[splitter]:
+            for s in inverse[a][t]:
+                touched.setdefault(block_of[s], []).append(s)
+
+        for b, members in touched.items():
+            if len(members) == len(blocks[b]):
+                continue
+            new_b = len(blocks)
+            moved = set(members)
+            blocks[b] -= moved
+            blocks.append(moved)
+            for s in moved:
+                block_of[s] = new_b
+            smaller = new_b if len(moved) <= len(blocks[b]) else b
+            for c in range(k):
+                if (b, c) in pending:
+                    pending.add((new_b, c))
+                    worklist.append((new_b, c))
+                else:
+                    pending.add((smaller, c))
+                    worklist.append((smaller, c))
+
+    return block_of
+
+
+def minimize_fsm(fsm: FSMDefinition) -> FSMMinimizationResult:
+    """
+    Минимизирует FSM: склеивает состояния с одинаковым поведением.
+    Алфавит — пары (event_type, condition); эквивалентные состояния имеют
+    одинаковые цепочки переходов (с учётом приоритета), выходы и действия,
+    поэтому и simulate(), и сгенерированный Verilog ведут себя так же.
+    """
+    automaton, initials = _build_automaton([fsm])
+    block_of = _refine(automaton)
+    initial = initials[0]
+
+    representative: Dict[int, int] = {block_of[initial]: initial}
+    for s in range(len(automaton.states)):
+        representative.setdefault(block_of[s], s)
+
+    states: List[FSMState] = []
+    transitions: List[FSMTransition] = []
+    merged: Dict[str, str] = {}
+    graph_ids = [st.id for st in automaton.states]
+
+    for s, st in enumerate(automaton.states):
+        rep = representative[block_of[s]]
+        if rep != s:
+            merged[st.id] = graph_ids[rep]
+            continue
+        states.append(st.model_copy(update={"is_initial": s == initial}))
+
+    index = {sid: s for s, sid in enumerate(graph_ids)}
+    for tr in fsm.transitions:
+        src = index.get(tr.from_state_id)
+        dst = index.get(tr.to_state_id)
+        if src is None or dst is None or representative[block_of[src]] != src:
+            continue
+        transitions.append(
+            tr.model_copy(update={"to_state_id": graph_ids[representative[block_of[dst]]]})
+        )
+
+    minimized = FSMDefinition(type=fsm.type, states=states, transitions=transitions)
+    return FSMMinimizationResult(
+        fsm=minimized,
+        original_states=len(fsm.states),
+        minimized_states=len(states),
+        merged_states=merged,
+    )
+
+
+def check_fsm_equivalence(left: FSMDefinition, right: FSMDefinition) -> FSMEquivalenceResult:
+    """
+    Проверяет эквивалентность двух FSM: начальные состояния должны попасть
+    в один блок разбиения их объединения. Если FSM не эквивалентны,
+    возвращается кратчайшая различающая последовательность меток.
+    """
+    automaton, (left_initial, right_initial) = _build_automaton([left, right])
+    block_of = _refine(automaton)
+    equivalent = block_of[left_initial] == block_of[right_initial]
+
+    counterexample: List[str] = []
+    if not equivalent:
+        counterexample = _distinguishing_word(automaton, left_initial, right_initial)
+
+    return FSMEquivalenceResult(
+        equivalent=equivalent,
+        left_states=len(left.states),
+        right_states=len(right.states),
+        counterexample=counterexample,
+    )
+
+
+def _distinguishing_word(automaton: _Automaton, left: int, right: int) -> List[str]:
+    """
+    BFS по парам состояний до первой пары с разными ключами.
+    """
+    k = len(automaton.labels)
+    delta = automaton.delta
+    keys = automaton.keys
+    parent: Dict[Tuple[int, int], Tuple[Tuple[int, int], int]] = {}
+    start = (left, right)
+    seen = {start}
+    queue: deque[Tuple[int, int]] = deque([start])
+
+    while queue:
+        pair = queue.popleft()
+        p, q = pair
+        if keys[p] != keys[q]:
+            word: List[str] = []
+            while pair != start:
+                pair, a = parent[pair]
+                event_type, condition = automaton.labels[a]
+                word.append(f"{event_type or '*'}:{condition or '*'}")
+            word.reverse()
+            return word
+        for a in range(k):
+            nxt = (delta[p * k + a], delta[q * k + a])
+            if nxt not in seen:
+                seen.add(nxt)
+                parent[nxt] = (pair, a)
+                queue.append(nxt)
+    return []
@@ -0,0 +1,457 @@
+from __future__ import annotations
+
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.schemas.fsm import (
+    FSMDefinition,
+    FSMInvariantResult,
+    FSMModelCheckResult,
+    FSMModelCheckStep,
+)
+from app.schemas.scenario import ScenarioEventType
+from app.services.simulation import (
+    ALLOWED_MOVING_STATES,
+    EVENT_TYPES,
+    OPEN_STATES,
+    CompiledFSM,
+    compile_fsm,
+    transition_lut,
+)
+
+class ModelCheckLimitError(Exception):
+    """Пространство состояний произведения больше допустимого (422)."""
+
+
+# Инварианты, которые проверяет model checker
+INVARIANT_DOORS = "never_moves_with_doors_open"
+INVARIANT_SERVICE_POSSIBLE = "every_call_can_be_served"
+INVARIANT_SERVICE = "every_call_eventually_served"
+
+_INVARIANT_DESCRIPTIONS = {
+    INVARIANT_DOORS: "Лифт никогда не начинает движение с открытыми дверями",
+    INVARIANT_SERVICE_POSSIBLE: "Из любого достижимого состояния ожидающий вызов может быть обслужен (EF)",
+    INVARIANT_SERVICE: (
+        "Ожидающий вызов обслуживается на любом пути, где каждый тип события "
+        "приходит бесконечно часто (AF при справедливом окружении)"
+    ),
+}
+
+_EVENT_TYPES: List[ScenarioEventType] = EVENT_TYPES
+_CALL_TYPES = {ScenarioEventType.CALL, ScenarioEventType.CABIN}
+
+
+class _ProductModel:
+    """
+    Абстракция лифта для перебора: (состояние FSM) × (этаж) × (ожидающий вызов).
+
+    Ожидающий вызов — этаж единственного необслуженного вызова или «нет»
+    (новый вызов принимается только когда предыдущий обслужен, повторное
+    нажатие той же кнопки допускается). Состояние кодируется одним int:
+    ((state * floors) + floor) * (floors + 1) + pending, где pending = 0 —
+    вызова нет, pending = p + 1 — ждём этаж p.
+
+    Переходы повторяют семантику simulate(): выбирается первый подходящий
+    переход FSM; движение (или мягкий режим для call/cabin без перехода)
+    переносит лифт на этаж события и возвращает его в idle после цикла дверей.
+    """
+
+    def __init__(self, compiled: CompiledFSM, floors: int) -> None:
+        self.compiled = compiled
+        self.floors = floors
+        self.num_states = len(compiled.states)
+        self.size = self.num_states * floors * (floors + 1)
+
+        lowered = [st.id.lower() for st in compiled.states]
+        # то же правило безопасности, что у движка симуляции
+        self.is_open = [sid in OPEN_STATES for sid in lowered]
+        self.is_moving = [sid in ALLOWED_MOVING_STATES for sid in lowered]
+        self.idle_index = compiled.state_index.get(compiled.idle_id, -1)
+
+        # Выбор перехода зависит только от (состояние, тип события, floor != 0):
+        # choice[(s * len(_EVENT_TYPES) + e) * 2 + nonzero] -> индекс перехода или -1
+        self.choice = array("i", transition_lut(compiled))
+        self.target = array(
+            "i",
+            [compiled.state_index.get(tr.to_state_id, -1) for tr in compiled.transitions],
+        )
+
+        # Метки рёбер для проверки справедливости — событие (тип, этаж) как бит
+        # e * floors + g. Метка ребра — индекс в label_masks: одиночное событие
+        # e * floors + g, либо группа «тип e, все этажи с тем же floor != 0»
+        # (переходы без движения от этажа не зависят и раскрываются один раз).
+        n_types = len(_EVENT_TYPES)
+        self.group_label = n_types * floors
+        every_floor = (1 << floors) - 1
+        self.label_masks: List[int] = [1 << label for label in range(n_types * floors)]
+        for e in range(n_types):
+            self.label_masks.append(1 << (e * floors))
+            self.label_masks.append((every_floor & ~1) << (e * floors))
+
+    def encode(self, state: int, floor: int, pending: int) -> int:
+        return (state * self.floors + floor) * (self.floors + 1) + pending
+
+    def decode(self, code: int) -> Tuple[int, int, int]:
+        rest, pending = divmod(code, self.floors + 1)
+        state, floor = divmod(rest, self.floors)
+        return state, floor, pending
+
+    def successors(
+        self,
+        code: int,
+        unsafe: List[Tuple[int, int, int, int]],
+    ) -> Iterator[Tuple[int, int, int, int]]:
+        """
+        Генерирует (event_index, event_floor, next_code, label). Небезопасные
+        переходы (двери открыты -> движение) не раскрываются, а складываются
+        в unsafe. Событие без перехода, которое ничего не меняет, даёт петлю
+        (next_code == code).
+        """
+        state, floor, pending = self.decode(code)
+        floors = self.floors
+        n_types = len(_EVENT_TYPES)
+        for e, ev_type in enumerate(_EVENT_TYPES):
+            is_call = ev_type in _CALL_TYPES
+            if is_call and pending:
+                event_floors = (pending - 1,)
+            else:
+                event_floors = range(floors)
+            base = (state * n_types + e) * 2
+            stay_done = [False, False]
+            for g in event_floors:
+                nonzero = 1 if g else 0
+                pend = g + 1 if (is_call and not pending) else pending
+                tr_idx = self.choice[base + nonzero]
+                if tr_idx < 0:
+                    if not is_call:
+                        # событие ничего не меняет: петля, одна на тип события
+                        if not stay_done[nonzero]:
+                            stay_done[nonzero] = True
+                            yield e, g, code, self.group_label + e * 2 + nonzero
+                        continue
+                    nxt_state = self.idle_index if self.idle_index >= 0 else state
+                    nxt_pending = 0 if pend == g + 1 else pend
+                    yield e, g, self.encode(nxt_state, g, nxt_pending), e * floors + g
+                    continue
+
+                to = self.target[tr_idx]
+                if to < 0:
+                    continue
+                if self.is_open[state] and self.is_moving[to]:
+                    unsafe.append((code, e, g, tr_idx))
+                    continue
+                if self.is_moving[to]:
+                    nxt_state = self.idle_index if self.idle_index >= 0 else to
+                    nxt_pending = 0 if pend == g + 1 else pend
+                    yield e, g, self.encode(nxt_state, g, nxt_pending), e * floors + g
+                    continue
+
+                # переход без движения: этаж не меняется, результат зависит
+                # только от floor != 0 (кроме регистрации нового вызова)
+                if not (is_call and not pending):
+                    if stay_done[nonzero]:
+                        continue
+                    stay_done[nonzero] = True
+                    label = self.group_label + e * 2 + nonzero
+                else:
+                    label = e * floors + g
+                yield e, g, self.encode(to, floor, pend), label
+
+    def fair_mask(self, pending: int) -> int:
+        """
+        События, доступные при ожидающем вызове pending: вызовы (call/cabin) —
+        только на этаж ожидающего вызова, остальные — на любой этаж.
+        """
+        floors = self.floors
+        mask = 0
+        for e, ev_type in enumerate(_EVENT_TYPES):
+            if ev_type in _CALL_TYPES:
+                mask |= 1 << (e * floors + pending - 1)
+            else:
+                mask |= ((1 << floors) - 1) << (e * floors)
+        return mask
+
+
+def check_fsm_invariants(
+    fsm: FSMDefinition,
+    floors: int,
+    max_transitions: Optional[int] = None,
+) -> FSMModelCheckResult:
+    """
+    Исчерпывающая проверка инвариантов на произведении
+    состояние FSM × этаж × ожидающий вызов.
+
+    Обход в ширину фронтами. Достижимые состояния нумеруются по порядку
+    обхода (узлы), и все массивы — предки для контрпримеров, рёбра, CSR,
+    Тарьян — растут вместе с обходом, а не занимают S·F·(F+1) заранее.
+    Обход длиннее max_transitions (по умолчанию MODEL_CHECK_MAX_TRANSITIONS)
+    прерывается ModelCheckLimitError.
+    """
+    limit = settings.MODEL_CHECK_MAX_TRANSITIONS if max_transitions is None else max_transitions
+    compiled = compile_fsm(fsm)
+    model = _ProductModel(compiled, floors)
+
+    # узел -> код состояния произведения и обратно; предок каждого узла
+    node_of: Dict[int, int] = {}
+    codes = array("q")
+    parent = array("i")
+    parent_event = array("i")
+    parent_floor = array("i")
+
+    # рёбра между узлами с метками событий (проверки обслуживания вызовов)
+    # и петли: loop_mask[node] — события, оставляющие состояние на месте
+    edge_src = array("i")
+    edge_dst = array("i")
+    edge_label = array("i")
+    loop_mask: Dict[int, int] = {}
+    label_masks = model.label_masks
+    unsafe: List[Tuple[int, int, int, int]] = []
+
+    start = model.encode(compiled.initial_index, 0, 0)
+    node_of[start] = 0
+    codes.append(start)
+    parent.append(-1)
+    parent_event.append(-1)
+    parent_floor.append(-1)
+    frontier = [0]
+    explored_transitions = 0
+
+    while frontier:
+        next_frontier: List[int] = []
+        for node in frontier:
+            code = codes[node]
+            for e, g, nxt, label in model.successors(code, unsafe):
+                explored_transitions += 1
+                if nxt == code:
+                    loop_mask[node] = loop_mask.get(node, 0) | label_masks[label]
+                    continue
+                target = node_of.get(nxt)
+                if target is None:
+                    target = node_of[nxt] = len(codes)
+                    codes.append(nxt)
+                    parent.append(node)
+                    parent_event.append(e)
+                    parent_floor.append(g)
+                    next_frontier.append(target)
+                edge_src.append(node)
+                edge_dst.append(target)
+                edge_label.append(label)
+            if explored_transitions > limit:
+                raise ModelCheckLimitError(
+                    f"Пространство состояний слишком велико: больше {limit} переходов "
+                    f"(состояний FSM: {model.num_states}, этажей: {floors})"
+                )
+        frontier = next_frontier
+
+    nodes = len(codes)
+    modulus = floors + 1
+
+    def trace(node: int) -> List[FSMModelCheckStep]:
+        path: List[int] = []
+        while node != -1:
+            path.append(node)
+            node = parent[node]
+        path.reverse()
+        return [_step(model, codes[n], parent_event[n], parent_floor[n]) for n in path]
+
+    invariants: List[FSMInvariantResult] = []
+
+    # 1. Safety: двери открыты -> движение
+    if unsafe:
+        code, e, g, tr_idx = unsafe[0]
+        tr = compiled.transitions[tr_idx]
+        counterexample = trace(node_of[code])
+        counterexample.append(
+            FSMModelCheckStep(
+                event_type=_EVENT_TYPES[e],
+                event_floor=g,
+                state_id=tr.to_state_id,
+                floor=model.decode(code)[1],
+                pending_floor=None,
+                transition_id=tr.id,
+            )
+        )
+        invariants.append(_result(INVARIANT_DOORS, False, counterexample))
+    else:
+        invariants.append(_result(INVARIANT_DOORS, True))
+
+    # 2. EF served: обратный обход от состояний без ожидающего вызова
+    can_serve = bytearray(nodes)
+    offsets, sources, _ = _adjacency(edge_dst, edge_src, nodes)
+    stack = [node for node in range(nodes) if codes[node] % modulus == 0]
+    for node in stack:
+        can_serve[node] = 1
+    while stack:
+        node = stack.pop()
+        for pos in range(offsets[node], offsets[node + 1]):
+            prev = sources[pos]
+            if not can_serve[prev]:
+                can_serve[prev] = 1
+                stack.append(prev)
+
+    stuck = next((node for node in range(nodes) if not can_serve[node]), None)
+    if stuck is not None:
+        invariants.append(_result(INVARIANT_SERVICE_POSSIBLE, False, trace(stuck)))
+    else:
+        invariants.append(_result(INVARIANT_SERVICE_POSSIBLE, True))
+
+    # 3. AF served при справедливом окружении: ищем бесконечный путь
+    # по состояниям с ожидающим вызовом, на котором каждое доступное событие
+    # встречается бесконечно часто (или тупик с ожидающим вызовом)
+    forward = _adjacency(edge_src, edge_dst, nodes, edge_label)
+    unfair = _unserved_fair_cycle(model, codes, forward, loop_mask)
+    if unfair is not None:
+        invariants.append(_result(INVARIANT_SERVICE, False, trace(unfair)))
+    else:
+        invariants.append(_result(INVARIANT_SERVICE, True))
+
+    return FSMModelCheckResult(
+        floors=floors,
+        explored_states=nodes,
+        explored_transitions=explored_transitions,
+        invariants=invariants,
+    )
+
+
+def _adjacency(
+    edge_from: array,
+    edge_to: array,
+    size: int,
+    labels: Optional[array] = None,
+) -> Tuple[array, array, Optional[array]]:
+    """
+    CSR графа: соседи v — neighbours[offsets[v]:offsets[v + 1]], метки рёбер
+    (если переданы) — в тех же позициях. Для обратного графа — поменять
+    edge_from и edge_to местами.
+    """
+    offsets = array("i", [0]) * (size + 1)
+    for src in edge_from:
+        offsets[src + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+    fill = array("i", offsets)
+    neighbours = array("i", [0]) * len(edge_from)
+    ordered = array("i", [0]) * len(edge_from) if labels is not None else None
+    for pos, (src, dst) in enumerate(zip(edge_from, edge_to)):
+        neighbours[fill[src]] = dst
+        if ordered is not None:
+            ordered[fill[src]] = labels[pos]
+        fill[src] += 1
+    return offsets, neighbours, ordered
+
+
+def _unserved_fair_cycle(
+    model: _ProductModel,
+    codes: array,
+    forward: Tuple[array, array, Optional[array]],
+    loop_mask: Dict[int, int],
+) -> Optional[int]:
+    """
+    Узел, из которого есть справедливый путь без обслуживания вызова, или None.
+    Граф — по узлам обхода, codes[узел] — код состояния произведения.
+
+    Справедливость — каждое доступное событие (тип, этаж) приходит
+    бесконечно часто; пока вызов ждёт, вызовы приходят только на его этаж
+    (model.fair_mask). Ожидающий вызов не меняется до обслуживания, поэтому
+    набор доступных событий в компоненте один и тот же. Справедливый путь
+    без обслуживания есть, если среди состояний с ожидающим вызовом есть
+    компонента сильной связности, рёбра и петли которой покрывают все
+    доступные события: по ней можно ходить вечно. Тупик с ожидающим
+    вызовом тоже нарушение. Компоненты — итеративный Тарьян, O(V + E).
+    """
+    offsets, targets, labels = forward
+    label_masks = model.label_masks
+    size = len(codes)
+    modulus = model.floors + 1
+    pending = array("i", [code % modulus for code in codes])
+
+    index = array("i", [-1]) * size
+    low = array("i", [0]) * size
+    component = array("i", [-1]) * size
+    on_stack = bytearray(size)
+    stack: List[int] = []
+    counter = 0
+    components = 0
+
+    for root in range(size):
+        if not pending[root] or index[root] >= 0:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        work = [[root, offsets[root]]]
+        while work:
+            frame = work[-1]
+            v, pos = frame
+            if pos < offsets[v + 1]:
+                frame[1] = pos + 1
+                w = targets[pos]
+                if not pending[w]:
+                    continue  # вызов обслужен — ребро выходит из области
+                if index[w] < 0:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = 1
+                    work.append([w, offsets[w]])
+                elif on_stack[w] and index[w] < low[v]:
+                    low[v] = index[w]
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                if low[v] < low[parent]:
+                    low[parent] = low[v]
+            if low[v] != index[v]:
+                continue
+
+            members: List[int] = []
+            while True:
+                w = stack.pop()
+                on_stack[w] = 0
+                component[w] = components
+                members.append(w)
+                if w == v:
+                    break
+            mask = 0
+            for w in members:
+                loops = loop_mask.get(w, 0)
+                mask |= loops
+                start, end = offsets[w], offsets[w + 1]
+                if start == end and not loops:
+                    return w  # тупик: вызов не будет обслужен никогда
+                for pos in range(start, end):
+                    if component[targets[pos]] == components:
+                        mask |= label_masks[labels[pos]]
+            required = model.fair_mask(pending[v])
+            if mask & required == required:
+                return v
+            components += 1
+    return None
+
+
+def _step(model: _ProductModel, code: int, event: int, event_floor: int) -> FSMModelCheckStep:
+    state, floor, pending = model.decode(code)
+    return FSMModelCheckStep(
+        event_type=_EVENT_TYPES[event] if event >= 0 else None,
+        event_floor=event_floor if event >= 0 else None,
+        state_id=model.compiled.states[state].id,
+        floor=floor,
+        pending_floor=pending - 1 if pending else None,
+    )
+
+
+def _result(
+    name: str,
+    holds: bool,
+    counterexample: Optional[List[FSMModelCheckStep]] = None,
+) -> FSMInvariantResult:
+    return FSMInvariantResult(
+        name=name,
+        description=_INVARIANT_DESCRIPTIONS[name],
+        holds=holds,
+        counterexample=counterexample or [],
+    )
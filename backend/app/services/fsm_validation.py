@@ -1,15 +1,20 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import List, Set
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
 
-from app.schemas.fsm import FSMDefinition
+from app.schemas.fsm import FSMDefinition, FSMTransition
+from app.services.fsm_graph import FSMGraph
 
 
 @dataclass
 class ValidationIssue:
     message: str
     level: str = "error"  # "error" | "warning"
+    code: str = ""
+    state_ids: List[str] = field(default_factory=list)
+    transition_ids: List[str] = field(default_factory=list)
 
 class FSMValidationError(Exception):
     def __init__(self, errors: List[str]):
@@ -36,68 +41,232 @@ SUPPORTED_SIGNALS = {
     "always",
 }
 
+UNCONDITIONAL = {"", "*", "always"}
+
+# Safety: из этих состояний нельзя напрямую переходить в движение.
+# Единственное определение: симуляция, сгенерированный код и model checker
+# берут эти же множества, иначе /fsm/validate и simulate() расходятся.
+DOOR_OPEN_STATES = {"doors_open", "doors_opening"}
+MOVING_STATES = {"moving_up", "moving_down"}
+
+
+def normalize_condition(condition: Optional[str]) -> str:
+    return (condition or "").strip().lower()
+
 
 def validate_fsm_structure(fsm: FSMDefinition) -> List[ValidationIssue]:
+    """
+    Структурный анализ FSM на графе (списки смежности), всё за O(S + T):
+    - ссылки переходов на существующие состояния, дубликаты id;
+    - достижимость из начального состояния (BFS);
+    - тупиковые состояния и состояния, из которых нельзя вернуться
+      в начальное (через компоненты сильной связности);
+    - недетерминированные переходы по (состояние, event_type);
+    - safety: двери открыты -> движение.
+    """
     issues: List[ValidationIssue] = []
 
     if not fsm.states:
-        issues.append(ValidationIssue("FSM must contain at least one state"))
+        issues.append(ValidationIssue("FSM must contain at least one state", code="no_states"))
         return issues
 
-    if not any(st.is_initial for st in fsm.states):
-        issues.append(ValidationIssue("FSM must contain at least one initial state"))
+    graph = FSMGraph(fsm)
+
+    if not graph.initial:
+        issues.append(
+            ValidationIssue("FSM must contain at least one initial state", code="no_initial_state")
+        )
+    elif len(set(graph.initial)) > 1:
+        initial_ids = [graph.state_ids[idx] for idx in dict.fromkeys(graph.initial)]
+        issues.append(
+            ValidationIssue(
+                f"Multiple initial states: {', '.join(initial_ids)}; the first one is used",
+                level="warning",
+                code="multiple_initial_states",
+                state_ids=initial_ids,
+            )
+        )
 
-    state_ids: Set[str] = {st.id for st in fsm.states}
+    if len(graph) != len(fsm.states):
+        duplicates = _duplicates(st.id for st in fsm.states)
+        issues.append(
+            ValidationIssue(
+                f"Duplicate state ids: {', '.join(duplicates)}",
+                code="duplicate_state_id",
+                state_ids=duplicates,
+            )
+        )
+    duplicate_transitions = _duplicates(tr.id for tr in fsm.transitions)
+    if duplicate_transitions:
+        issues.append(
+            ValidationIssue(
+                f"Duplicate transition ids: {', '.join(duplicate_transitions)}",
+                code="duplicate_transition_id",
+                transition_ids=duplicate_transitions,
+            )
+        )
 
     for tr in fsm.transitions:
-        if tr.from_state_id not in state_ids:
+        if tr.from_state_id not in graph.index:
             issues.append(
                 ValidationIssue(
-                    f"Transition {tr.id} has invalid from_state_id={tr.from_state_id}"
+                    f"Transition {tr.id} has invalid from_state_id={tr.from_state_id}",
+                    code="invalid_from_state",
+                    transition_ids=[tr.id],
                 )
             )
-        if tr.to_state_id not in state_ids:
+        if tr.to_state_id not in graph.index:
             issues.append(
                 ValidationIssue(
-                    f"Transition {tr.id} has invalid to_state_id={tr.to_state_id}"
+                    f"Transition {tr.id} has invalid to_state_id={tr.to_state_id}",
+                    code="invalid_to_state",
+                    transition_ids=[tr.id],
                 )
             )
 
-    # Reachability check (warning)
-    initial_states = [st.id for st in fsm.states if st.is_initial]
-    if initial_states:
-        reachable: Set[str] = set(initial_states)
-        changed = True
-        while changed:
-            changed = False
-            for tr in fsm.transitions:
-                if tr.from_state_id in reachable and tr.to_state_id not in reachable:
-                    reachable.add(tr.to_state_id)
-                    changed = True
-
-        unreachable = state_ids - reachable
-        if unreachable:
-            issues.append(
-                ValidationIssue(
-                    f"Unreachable states from initial: {', '.join(sorted(unreachable))}",
-                    level="warning",
-                )
-            )
+    if graph.initial:
+        issues.extend(_graph_issues(fsm, graph))
+
+    issues.extend(_nondeterminism_issues(fsm, graph))
 
     # Safety invariants: запрещаем прямой переход из открытых дверей в движение
-    open_states = {"doors_open", "doors_opening"}
-    moving_states = {"moving_up", "moving_down"}
     for tr in fsm.transitions:
-        if tr.from_state_id.lower() in open_states and tr.to_state_id.lower() in moving_states:
+        if tr.from_state_id.lower() in DOOR_OPEN_STATES and tr.to_state_id.lower() in MOVING_STATES:
             issues.append(
                 ValidationIssue(
-                    f"Unsafe transition {tr.id}: from {tr.from_state_id} to {tr.to_state_id} (doors open -> moving)"
+                    f"Unsafe transition {tr.id}: from {tr.from_state_id} to {tr.to_state_id} (doors open -> moving)",
+                    code="unsafe_transition",
+                    state_ids=[tr.from_state_id, tr.to_state_id],
+                    transition_ids=[tr.id],
                 )
             )
 
     return issues
 
 
+def _duplicates(ids: Iterable[str]) -> List[str]:
+    seen: Set[str] = set()
+    duplicates: Dict[str, None] = {}
+    for item in ids:
+        if item in seen:
+            duplicates[item] = None
+        seen.add(item)
+    return list(duplicates)
+
+
+def _graph_issues(fsm: FSMDefinition, graph: FSMGraph) -> List[ValidationIssue]:
+    issues: List[ValidationIssue] = []
+    reachable = graph.reachable(graph.initial)
+
+    unreachable = [sid for idx, sid in enumerate(graph.state_ids) if not reachable[idx]]
+    if unreachable:
+        issues.append(
+            ValidationIssue(
+                f"Unreachable states from initial: {', '.join(sorted(unreachable))}",
+                level="warning",
+                code="unreachable_state",
+                state_ids=unreachable,
+            )
+        )
+
+    final = [False] * len(graph)
+    for st in fsm.states:
+        if st.is_final:
+            final[graph.index[st.id]] = True
+
+    dead_ends = [
+        sid
+        for idx, sid in enumerate(graph.state_ids)
+        if reachable[idx] and not graph.successors[idx] and not final[idx]
+    ]
+    if dead_ends:
+        issues.append(
+            ValidationIssue(
+                f"Dead-end states (no outgoing transitions): {', '.join(dead_ends)}",
+                level="warning",
+                code="dead_end_state",
+                state_ids=dead_ends,
+            )
+        )
+
+    # Достижимое состояние может вернуться в начальное только если лежит
+    # с ним в одной компоненте сильной связности.
+    component = graph.strongly_connected_components()
+    home = component[graph.initial[0]]
+    non_returning = [
+        sid
+        for idx, sid in enumerate(graph.state_ids)
+        if reachable[idx]
+        and component[idx] != home
+        and graph.successors[idx]
+        and not final[idx]
+    ]
+    if non_returning:
+        issues.append(
+            ValidationIssue(
+                "States that cannot return to the initial state: "
+                f"{', '.join(non_returning)}",
+                level="warning",
+                code="non_returning_state",
+                state_ids=non_returning,
+            )
+        )
+
+    return issues
+
+
+def _overlapping(group: List[FSMTransition]) -> List[FSMTransition]:
+    """
+    Переходы группы, которые могут сработать на одно и то же событие:
+    безусловный переход перекрывается со всеми, условные — с такими же условиями.
+    """
+    if len(group) < 2:
+        return []
+    if any(normalize_condition(tr.condition) in UNCONDITIONAL for tr in group):
+        return group
+    by_condition: Dict[str, List[FSMTransition]] = defaultdict(list)
+    for tr in group:
+        by_condition[normalize_condition(tr.condition)].append(tr)
+    return [tr for same in by_condition.values() if len(same) > 1 for tr in same]
+
+
+def _nondeterminism_issues(fsm: FSMDefinition, graph: FSMGraph) -> List[ValidationIssue]:
+    issues: List[ValidationIssue] = []
+    for idx, state_id in enumerate(graph.state_ids):
+        out = graph.out_transitions[idx]
+        if len(out) < 2:
+            continue
+
+        # event_type = None реагирует на любое событие
+        buckets: Dict[Optional[str], List[FSMTransition]] = defaultdict(list)
+        for tr_idx in out:
+            tr = fsm.transitions[tr_idx]
+            buckets[tr.event_type.value if tr.event_type is not None else None].append(tr)
+        wildcard = buckets.get(None, [])
+
+        for event_type, group in buckets.items():
+            candidates = group if event_type is None else group + wildcard
+            overlap = _overlapping(candidates)
+            # конфликты только между wildcard-переходами уже учтены в группе None
+            if event_type is not None and all(tr.event_type is None for tr in overlap):
+                continue
+            if overlap:
+                ids = [tr.id for tr in overlap]
+                issues.append(
+                    ValidationIssue(
+                        f"Nondeterministic transitions from {state_id} on "
+                        f"{event_type or 'any event'}: {', '.join(ids)} "
+                        "(the first one wins)",
+                        level="warning",
+                        code="nondeterministic_transitions",
+                        state_ids=[state_id],
+                        transition_ids=ids,
+                    )
+                )
+
+    return issues
+
+
 def validate_fsm_for_export(fsm: FSMDefinition) -> None:
     errors: List[str] = []
 
@@ -1,111 +1,241 @@
 from __future__ import annotations
 
 import math
-from typing import Dict, List, Set
+import re
+from typing import Any, Dict, Iterator, List, Optional, Set, TextIO, Tuple
 
-from app.schemas.fsm import FSMDefinition, FSMState, FSMTransition
+from app.schemas.fsm import FSMDefinition, FSMTransition, StateEncoding
 from app.services.fsm_validation import SUPPORTED_SIGNALS
 
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_RESERVED_PORTS = {"clk", "rst", "state", "curr_state", "next_state"}
+
+# Версия формата генерируемого текста: входит в ETag экспорта, чтобы после
+# изменения генератора клиенты не получали 304 на старый текст
+VERILOG_FORMAT_VERSION = 2
+
 
 def _state_bits(num_states: int) -> int:
     return max(1, math.ceil(math.log2(max(num_states, 1))))
 
 
-def generate_verilog_from_fsm(
+def state_encoding_width(num_states: int, encoding: StateEncoding = StateEncoding.BINARY) -> int:
+    """
+    Разрядность регистра состояния: log2(S) для binary/gray, S для one-hot.
+    """
+    if encoding == StateEncoding.ONE_HOT:
+        return max(1, num_states)
+    return _state_bits(num_states)
+
+
+def state_encoding(
+    fsm: FSMDefinition,
+    encoding: StateEncoding = StateEncoding.BINARY,
+) -> Dict[str, int]:
+    """
+    Код каждого состояния в сгенерированном Verilog (id -> значение регистра).
+    Порядковый номер состояния — индекс в fsm.states.
+    """
+    codes: Dict[str, int] = {}
+    for idx, st in enumerate(fsm.states):
+        if encoding == StateEncoding.ONE_HOT:
+            codes[st.id] = 1 << idx
+        elif encoding == StateEncoding.GRAY:
+            codes[st.id] = idx ^ (idx >> 1)
+        else:
+            codes[st.id] = idx
+    return codes
+
+
+def _literal(code: int, width: int, encoding: StateEncoding) -> str:
+    if encoding == StateEncoding.BINARY:
+        return f"{width}'d{code}"
+    return f"{width}'b{code:0{width}b}"
+
+
+def _output_value(value: Any) -> Optional[int]:
+    """
+    Значение выхода/действия как неотрицательное целое (bool -> 0/1).
+    Нечисловые значения в Verilog не переносятся.
+    """
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, int) and value >= 0:
+        return value
+    return None
+
+
+def _assignments(values: Optional[dict[str, Any]], widths: Dict[str, int]) -> List[Tuple[str, int]]:
+    if not values:
+        return []
+    result: List[Tuple[str, int]] = []
+    for name, value in values.items():
+        number = _output_value(value)
+        if name in widths and number is not None:
+            result.append((name, number))
+    return result
+
+
+def collect_output_signals(fsm: FSMDefinition, inputs: Set[str]) -> Dict[str, int]:
+    """
+    Выходные сигналы: ключи outputs состояний (Мур) и actions переходов (Мили).
+    Возвращает имя -> разрядность (по максимальному значению).
+    """
+    widths: Dict[str, int] = {}
+    sources = [st.outputs for st in fsm.states] + [tr.actions for tr in fsm.transitions]
+    for values in sources:
+        if not values:
+            continue
+        for name, value in values.items():
+            number = _output_value(value)
+            if number is None or not _IDENTIFIER.match(name):
+                continue
+            if name in _RESERVED_PORTS or name in inputs:
+                continue
+            widths[name] = max(widths.get(name, 1), number.bit_length())
+    return widths
+
+
+def _port(direction: str, width: int, name: str) -> str:
+    if width == 1:
+        return f"{direction}        {name}"
+    return f"{direction} [{width - 1}:0]  {name}"
+
+
+def iter_verilog(
     fsm: FSMDefinition,
     module_name: str = "elevator_fsm",
-) -> str:
+    encoding: StateEncoding = StateEncoding.BINARY,
+) -> Iterator[str]:
+    """
+    Генерирует Verilog-модуль по кусочкам (для потоковой записи).
+
+    Переходы группируются по исходному состоянию за один проход,
+    так что генерация линейна по S + T. Выходы состояний (outputs)
+    и действия переходов (actions) становятся выходными портами,
+    которые вычисляются в том же комбинационном блоке, что и next_state.
+
+    One-hot: localparam — номера битов, ветви — case (1'b1) с curr_state[бит]
+    (синтез видит декодирование по одному биту), значения — W'd1 << бит;
+    текст линеен по S, а не S².
+    """
     state_ids: List[str] = [st.id for st in fsm.states]
     initial_state = next((st.id for st in fsm.states if st.is_initial), state_ids[0])
-    bits = _state_bits(len(state_ids))
+    bits = state_encoding_width(len(state_ids), encoding)
+    codes = state_encoding(fsm, encoding)
+    one_hot = encoding == StateEncoding.ONE_HOT
 
-    state_map: Dict[str, int] = {sid: idx for idx, sid in enumerate(state_ids)}
+    def state_value(state_id: str) -> str:
+        return f"{bits}'d1 << {state_id.upper()}" if one_hot else state_id.upper()
 
     signals_used: Set[str] = set()
+    by_source: Dict[str, List[FSMTransition]] = {}
     for tr in fsm.transitions:
+        by_source.setdefault(tr.from_state_id, []).append(tr)
         cond = (tr.condition or "").strip().lower()
         if cond in ("", "*", "always"):
             continue
         if cond in SUPPORTED_SIGNALS:
             signals_used.add(cond)
 
+    outputs = collect_output_signals(fsm, signals_used)
+
     ports: List[str] = [
         "input  wire        clk",
         "input  wire        rst",
     ]
     ports.extend([f"input  wire        {sig}" for sig in sorted(signals_used)])
     ports.append(f"output reg [{bits - 1}:0]  state")
-    ports_block = ",\n    ".join(ports)
-
-    localparams = ",\n    ".join(
-        [
-            f"{sid.upper():<12} = {bits}'d{idx}"
-            for sid, idx in state_map.items()
-        ]
+    ports.extend(_port("output reg", width, name) for name, width in outputs.items())
+
+    yield "// Auto-generated by Smart Elevator FSM backend.\n"
+    yield f"// States: {', '.join(state_ids)}\n"
+    if encoding != StateEncoding.BINARY:
+        yield f"// Encoding: {encoding.value}\n"
+    yield f"\nmodule {module_name} (\n    "
+    yield ",\n    ".join(ports)
+    if one_hot:
+        yield "\n);\n\n  // state encoding (one-hot: bit index)\n  localparam\n    "
+        yield ",\n    ".join(f"{sid.upper():<12} = {idx}" for idx, sid in enumerate(state_ids))
+    else:
+        yield "\n);\n\n  // state encoding\n  localparam\n    "
+        yield ",\n    ".join(
+            f"{sid.upper():<12} = {_literal(code, bits, encoding)}" for sid, code in codes.items()
+        )
+    yield ";\n\n"
+    yield f"  reg [{bits - 1}:0] curr_state;\n"
+    yield f"  reg [{bits - 1}:0] next_state;\n"
+    yield (
+        "\n"
+        "  always @(posedge clk or posedge rst) begin\n"
+        "    if (rst)\n"
+        f"      curr_state <= {state_value(initial_state)};\n"
+        "    else\n"
+        "      curr_state <= next_state;\n"
+        "  end\n"
+        "\n"
+        "  always @(*) begin\n"
+        "    next_state = curr_state;\n"
     )
-
-    def render_transition_block(state: FSMState) -> str:
-        trs = [tr for tr in fsm.transitions if tr.from_state_id == state.id]
+    for name, width in outputs.items():
+        yield f"    {name} = {width}'d0;\n"
+    yield "    case (1'b1) // synopsys parallel_case\n" if one_hot else "    case (curr_state)\n"
+
+    for pos, st in enumerate(fsm.states):
+        if pos:
+            yield "\n"
+        label = f"curr_state[{st.id.upper()}]" if one_hot else st.id.upper()
+        yield f"    {label}: begin\n"
+        for name, number in _assignments(st.outputs, outputs):
+            yield f"      {name} = {outputs[name]}'d{number};\n"
+        trs = by_source.get(st.id)
         if not trs:
-            return "      // no transitions\n"
-        lines: List[str] = []
-        for idx, tr in enumerate(trs):
-            cond = (tr.condition or "").strip().lower()
-            if cond in ("", "*", "always"):
-                cond_expr = "1'b1"
-            else:
-                cond_expr = cond
-            prefix = "if" if idx == 0 else "else if"
-            lines.append(
-                f"      {prefix} ({cond_expr}) begin\n"
-                f"        next_state = {tr.to_state_id.upper()};\n"
-                f"      end"
-            )
-        return "\n".join(lines) + "\n"
-
-    case_items: List[str] = []
-    for st in fsm.states:
-        case_items.append(
-            f"    {st.id.upper()}: begin\n"
-            f"{render_transition_block(st)}"
-            f"    end"
-        )
-
-    case_block = "\n".join(case_items)
-
-    verilog = f"""// Auto-generated by Smart Elevator FSM backend.
-// States: {', '.join(state_ids)}
-
-module {module_name} (
-    {ports_block}
-);
-
-  // state encoding
-  localparam
-    {localparams};
-
-  reg [{bits - 1}:0] curr_state;
-  reg [{bits - 1}:0] next_state;
+            yield "      // no transitions\n"
+        else:
+            for idx, tr in enumerate(trs):
+                cond = (tr.condition or "").strip().lower()
+                cond_expr = "1'b1" if cond in ("", "*", "always") else cond
+                prefix = "if" if idx == 0 else "else if"
+                if idx:
+                    yield "\n"
+                yield (
+                    f"      {prefix} ({cond_expr}) begin\n"
+                    f"        next_state = {state_value(tr.to_state_id)};\n"
+                )
+                for name, number in _assignments(tr.actions, outputs):
+                    yield f"        {name} = {outputs[name]}'d{number};\n"
+                yield "      end"
+            yield "\n"
+        yield "    end"
+
+    yield (
+        "\n"
+        f"      default: next_state = {state_value(initial_state)};\n"
+        "    endcase\n"
+        "  end\n"
+        "\n"
+        "  always @(*) begin\n"
+        "    state = curr_state;\n"
+        "  end\n"
+        "\n"
+        "endmodule\n"
+    )
 
-  always @(posedge clk or posedge rst) begin
-    if (rst)
-      curr_state <= {initial_state.upper()};
-    else
-      curr_state <= next_state;
-  end
 
-  always @(*) begin
-    next_state = curr_state;
-    case (curr_state)
-{case_block}
-      default: next_state = {initial_state.upper()};
-    endcase
-  end
+def write_verilog(
+    fsm: FSMDefinition,
+    out: TextIO,
+    module_name: str = "elevator_fsm",
+    encoding: StateEncoding = StateEncoding.BINARY,
+) -> None:
+    """Записывает Verilog-модуль в текстовый поток без сборки всей строки."""
+    for chunk in iter_verilog(fsm, module_name, encoding):
+        out.write(chunk)
 
-  always @(*) begin
-    state = curr_state;
-  end
 
-endmodule
-"""
-    return verilog
+def generate_verilog_from_fsm(
+    fsm: FSMDefinition,
+    module_name: str = "elevator_fsm",
+    encoding: StateEncoding = StateEncoding.BINARY,
+) -> str:
+    return "".join(iter_verilog(fsm, module_name, encoding))
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import json
+import re
+import zipfile
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from app.schemas.project import ProjectImport
+from app.services.fsm_export import export_verilog
+from app.services.fsm_validation import FSMValidationError
+
+# (метка для сообщений об ошибках: "строка 12" / "p1.json", сырой JSON);
+# None вместо JSON — документ больше лимита и не читался
+RawDocument = Tuple[str, Optional[bytes]]
+
+
+# ---------- импорт ----------
+
+
+@dataclass
+class ImportBatch:
+    """Строки для executemany и ошибки разбора одной пачки документов."""
+
+    rows: List[Dict[str, Any]] = field(default_factory=list)
+    labels: List[str] = field(default_factory=list)
+    errors: List[Tuple[str, str]] = field(default_factory=list)
+
+
+def parse_import_batch(documents: List[RawDocument], owner_id: int, allow_owner: bool) -> ImportBatch:
+    """
+    Разбирает пачку документов ProjectImport в строки для insert(Project).
+    Владелец — как у POST /projects/import: студент всегда сам,
+    преподаватель может указать owner_id в документе (allow_owner).
+    Выполняется в потоке: валидация больших config — чистый CPU.
+    """
+    batch = ImportBatch()
+    for label, raw in documents:
+        if raw is None:
+            batch.errors.append((label, "Документ больше допустимого размера"))
+            continue
+        try:
+            project = ProjectImport.model_validate_json(raw)
+        except ValidationError as exc:
+            first = exc.errors()[0]
+            location = ".".join(str(part) for part in first["loc"])
+            batch.errors.append((label, f"{location}: {first['msg']}" if location else first["msg"]))
+            continue
+        batch.rows.append({
+            "name": project.name,
+            "description": project.description,
+            "status": project.status.value,
+            "config": project.config.model_dump() if project.config is not None else None,
+            "owner_id": project.owner_id if allow_owner and project.owner_id is not None else owner_id,
+        })
+        batch.labels.append(label)
+    return batch
+
+
+def iter_zip_documents(file: IO[bytes], max_bytes: int) -> Iterator[RawDocument]:
+    """
+    Документы из zip: каждый *.json — один ProjectImport, каждый *.ndjson —
+    по документу на строку. Члены архива читаются по одному, целиком
+    в памяти только текущий документ.
+    """
+    with zipfile.ZipFile(file) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            name = info.filename
+            if name.endswith(".ndjson"):
+                with archive.open(info) as member:
+                    for number, line in enumerate(member, start=1):
+                        if line.strip():
+                            yield f"{name}:{number}", line if len(line) <= max_bytes else None
+            elif name.endswith(".json"):
+                if info.file_size > max_bytes:
+                    yield name, None
+                    continue
+                with archive.open(info) as member:
+                    yield name, member.read()
+
+
+def take(iterator: Iterator[RawDocument], size: int) -> List[RawDocument]:
+    return list(islice(iterator, size))
+
+
+# ---------- экспорт ----------
+
+
+class ZipStream:
+    """
+    Файлоподобный приёмник для zipfile без seek: архив пишется
+    последовательно (размеры — в data descriptor после каждого файла),
+    а готовые байты забираются drain() и сразу отдаются клиенту.
+    """
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+_SLUG_RE = re.compile(r"[^0-9A-Za-z_-]+")
+
+
+def _folder(project_id: int, name: Optional[str]) -> str:
+    slug = _SLUG_RE.sub("_", name or "").strip("_")[:40]
+    return f"{project_id}_{slug}" if slug else str(project_id)
+
+
+def write_project_entry(archive: zipfile.ZipFile, row: Any) -> None:
+    """
+    Папка проекта в архиве: project.json (формат GET /export, годится для
+    импорта) и fsm.v — Verilog, либо fsm_errors.txt, если FSM не экспортируется.
+    """
+    folder = _folder(row.id, row.name)
+    document = {
+        "name": row.name,
+        "description": row.description,
+        "status": row.status.value if hasattr(row.status, "value") else row.status,
+        "config": row.config,
+    }
+    archive.writestr(
+        f"{folder}/project.json",
+        json.dumps(document, ensure_ascii=False, indent=2),
+        compress_type=zipfile.ZIP_DEFLATED,
+    )
+
+    raw_fsm = row.config.get("fsm") if isinstance(row.config, dict) else None
+    if raw_fsm is None:
+        return
+    try:
+        _, verilog = export_verilog(raw_fsm, f"project_{row.id}_fsm")
+    except FSMValidationError as exc:
+        archive.writestr(f"{folder}/fsm_errors.txt", "\n".join(exc.errors), compress_type=zipfile.ZIP_DEFLATED)
+        return
+    archive.writestr(f"{folder}/fsm.v", verilog, compress_type=zipfile.ZIP_DEFLATED)
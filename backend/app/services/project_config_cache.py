@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from datetime import datetime
+from functools import cached_property
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.schemas.fsm import FSMDefinition
+from app.schemas.project_config import ProjectConfig
+from app.schemas.scenario import Scenario
+from app.services.fsm_export import prepare_fsm_for_export
+from app.utils.cache import LRUCache
+from app.utils.etag import content_hash
+
+
+class ParsedProjectConfig:
+    """
+    Разобранный config проекта. Всё считается лениво и один раз на версию
+    проекта: ProjectConfig для симуляции, FSM, проверенный для экспорта,
+    хэш FSM для ETag. Ошибки разбора тоже запоминаются и бросаются повторно.
+    """
+
+    def __init__(self, raw: Any) -> None:
+        self.raw = raw
+        self._export_fsm: Dict[bool, Any] = {}
+
+    @property
+    def raw_fsm(self) -> Any:
+        return self.raw.get("fsm") if isinstance(self.raw, dict) else None
+
+    @cached_property
+    def _project_config(self) -> Tuple[Optional[ProjectConfig], Optional[Exception]]:
+        try:
+            return ProjectConfig.model_validate(self.raw), None
+        except Exception as exc:  # noqa: BLE001
+            return None, exc
+
+    @property
+    def project_config(self) -> ProjectConfig:
+        """Полный ProjectConfig; бросает исключение валидации pydantic."""
+        config, error = self._project_config
+        if error is not None:
+            raise error
+        return config
+
+    @cached_property
+    def fsm_hash(self) -> str:
+        return content_hash(self.raw_fsm)
+
+    @cached_property
+    def default_scenario(self) -> Optional[Scenario]:
+        raw_scenario = self.raw.get("default_scenario") if isinstance(self.raw, dict) else None
+        return Scenario.model_validate(raw_scenario) if raw_scenario else None
+
+    def export_fsm(self, minimize: bool = False) -> FSMDefinition:
+        """prepare_fsm_for_export(config["fsm"]); бросает FSMValidationError."""
+        result = self._export_fsm.get(minimize)
+        if result is None:
+            try:
+                result = prepare_fsm_for_export(self.raw_fsm, minimize)
+            except Exception as exc:  # noqa: BLE001
+                result = exc
+            self._export_fsm[minimize] = result
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+# (project_id, updated_at) -> разобранный config. updated_at меняется при
+# каждом сохранении, поэтому старая версия просто перестаёт находиться;
+# update/delete дополнительно чистят записи проекта, чтобы не занимать память.
+_config_cache: LRUCache[ParsedProjectConfig] = LRUCache(maxsize=settings.PROJECT_CONFIG_CACHE_SIZE)
+
+
+def get_parsed_config(project_id: int, updated_at: datetime) -> Optional[ParsedProjectConfig]:
+    return _config_cache.get((project_id, updated_at))
+
+
+def store_parsed_config(project_id: int, updated_at: datetime, raw: Any) -> ParsedProjectConfig:
+    parsed = ParsedProjectConfig(raw)
+    _config_cache.set((project_id, updated_at), parsed)
+    return parsed
+
+
+def invalidate_project_config(project_id: int) -> int:
+    return _config_cache.pop_where(lambda key: key[0] == project_id)
+
+
+def project_config_cache_stats() -> Dict[str, float]:
+    return _config_cache.stats()
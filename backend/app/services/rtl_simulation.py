@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional
+
+import numpy as np
+
+from app.schemas.fsm import FSMDefinition, StateEncoding
+from app.schemas.scenario import Scenario
+from app.schemas.project import ElevatorConfig
+from app.schemas.simulation import RTLCrossCheckMismatch, RTLCrossCheckResult
+from app.services.fsm_validation import SUPPORTED_SIGNALS, UNCONDITIONAL
+from app.services.fsm_verilog import state_encoding
+from app.services.simulation import (
+    CompiledFSM,
+    _SimulationEngine,
+    _is_condition_satisfied,
+    _ordered_events,
+    choose_transition,
+    compile_fsm,
+)
+
+# Входные сигналы в порядке портов модуля (как в fsm_verilog)
+RTL_SIGNALS: List[str] = sorted(SUPPORTED_SIGNALS - UNCONDITIONAL)
+
+
+@dataclass
+class RTLModel:
+    """
+    Семантика сгенерированного Verilog в виде таблицы переходов.
+
+    table[s, p] — состояние после такта из состояния s при входном векторе p
+    (бит i вектора — сигнал signals[i]). Таблица повторяет case/if-else if:
+    срабатывает первый переход, условие которого 1'b1 или активный сигнал;
+    event_type в железе не виден и игнорируется. Неизвестные условия
+    в Verilog — неподключённые провода, они никогда не срабатывают.
+    Индексы состояний совпадают с compile_fsm().
+    """
+    fsm: FSMDefinition
+    compiled: CompiledFSM
+    signals: List[str]
+    table: np.ndarray
+    initial_index: int
+
+    @property
+    def patterns(self) -> int:
+        return self.table.shape[1]
+
+    def register_codes(self, encoding: StateEncoding = StateEncoding.BINARY) -> np.ndarray:
+        """Значение регистра state для каждого индекса состояния."""
+        codes = state_encoding(self.fsm, encoding)
+        return np.array([codes[st.id] for st in self.compiled.states], dtype=np.int64)
+
+
+def compile_rtl(fsm: FSMDefinition) -> RTLModel:
+    compiled = compile_fsm(fsm)
+    used = {
+        (tr.condition or "").strip().lower()
+        for tr in compiled.transitions
+    }
+    signals = [sig for sig in RTL_SIGNALS if sig in used]
+    bit = {sig: 1 << i for i, sig in enumerate(signals)}
+    patterns = np.arange(1 << len(signals), dtype=np.int64)
+
+    table = np.empty((len(compiled.states), len(patterns)), dtype=np.int32)
+    for s, outgoing in enumerate(compiled.outgoing):
+        row = table[s]
+        row.fill(s)
+        # идём от младшего приоритета к старшему: первый переход перезапишет остальные
+        for tr_idx in reversed(outgoing):
+            tr = compiled.transitions[tr_idx]
+            target = compiled.state_index.get(tr.to_state_id)
+            if target is None:
+                continue
+            cond = (tr.condition or "").strip().lower()
+            if cond in UNCONDITIONAL:
+                row.fill(target)
+            elif cond in bit:
+                row[(patterns & bit[cond]) != 0] = target
+
+    return RTLModel(
+        fsm=fsm,
+        compiled=compiled,
+        signals=signals,
+        table=table,
+        initial_index=compiled.initial_index,
+    )
+
+
+def pack_inputs(model: RTLModel, values: Mapping[str, np.ndarray]) -> np.ndarray:
+    """
+    Упаковывает булевы массивы сигналов (одинаковой формы, обычно
+    cycles × lanes) в номера входных векторов. Отсутствующие сигналы — 0.
+    """
+    shape = next(iter(values.values())).shape if values else (0,)
+    packed = np.zeros(shape, dtype=np.int32)
+    for i, sig in enumerate(model.signals):
+        if sig in values:
+            packed |= np.asarray(values[sig], dtype=np.int32) << i
+    return packed
+
+
+def run_rtl(
+    model: RTLModel,
+    inputs: np.ndarray,
+    reset: Optional[np.ndarray] = None,
+    initial: Optional[np.ndarray] = None,
+    record: bool = True,
+) -> np.ndarray:
+    """
+    Потактовая симуляция lanes независимых копий автомата.
+
+    inputs — номера входных векторов формы (cycles, lanes), reset — булев
+    массив той же формы (синхронно с тактом возвращает в начальное
+    состояние). Возвращает состояния после каждого такта (cycles, lanes)
+    или, при record=False, только состояния после последнего такта.
+    """
+    inputs = np.asarray(inputs)
+    if inputs.ndim == 1:
+        inputs = inputs[:, None]
+    cycles, lanes = inputs.shape
+    flat = model.table.ravel().astype(np.int64)
+    stride = model.patterns
+
+    if initial is None:
+        state = np.full(lanes, model.initial_index, dtype=np.int64)
+    else:
+        state = np.asarray(initial, dtype=np.int64).copy()
+    index = np.empty(lanes, dtype=np.int64)
+    trace = np.empty((cycles, lanes), dtype=np.int32) if record else None
+
+    for t in range(cycles):
+        np.multiply(state, stride, out=index)
+        index += inputs[t]
+        np.take(flat, index, out=state)
+        if reset is not None:
+            state[reset[t]] = model.initial_index
+        if trace is not None:
+            trace[t] = state
+
+    return trace if trace is not None else state.astype(np.int32)
+
+
+def event_input_pattern(model: RTLModel, event_type: str, floor: int, direction: str) -> int:
+    """
+    Входной вектор, соответствующий событию сценария: сигнал активен,
+    если simulate() считает выполненным условие с его именем.
+    """
+    context: Dict[str, object] = {"floor": floor, "direction": direction, "event_type": event_type}
+    pattern = 0
+    for i, sig in enumerate(model.signals):
+        if _is_condition_satisfied(sig, context):
+            pattern |= 1 << i
+    return pattern
+
+
+def cross_check_with_simulation(
+    fsm: FSMDefinition,
+    config: ElevatorConfig,
+    scenarios: List[Scenario],
+    max_mismatches: int = 100,
+) -> RTLCrossCheckResult:
+    """
+    Сверка решений RTL-семантики с simulate(): движок симуляции проходит
+    сценарии событие за событием, и на каждом событии переход, выбранный
+    Python-движком, сравнивается с тактом RTL из того же состояния при
+    соответствующем входном векторе. Все такты считаются одним
+    векторизованным обращением к таблице.
+    """
+    model = compile_rtl(fsm)
+    compiled = model.compiled
+
+    states: List[int] = []
+    patterns: List[int] = []
+    expected: List[int] = []
+    meta: List[tuple] = []
+
+    for scenario_index, scenario in enumerate(scenarios):
+        engine = _SimulationEngine(fsm, config, record_timeline=False)
+        for event_index, ev in enumerate(_ordered_events(scenario.events)):
+            s = compiled.state_index[engine.current_state.id]
+            context: Dict[str, object] = {
+                "floor": ev.floor,
+                "direction": ev.direction.value,
+                "event_type": ev.type.value,
+            }
+            tr_idx = choose_transition(compiled, s, ev.type.value, context)
+            target = s
+            if tr_idx >= 0:
+                target = compiled.state_index.get(compiled.transitions[tr_idx].to_state_id, s)
+            states.append(s)
+            patterns.append(event_input_pattern(model, ev.type.value, ev.floor, ev.direction.value))
+            expected.append(target)
+            meta.append((scenario_index, event_index, ev))
+            engine.step(ev)
+
+    if not states:
+        return RTLCrossCheckResult(signals=model.signals)
+
+    rtl = model.table[np.asarray(states), np.asarray(patterns)]
+    diff = np.flatnonzero(rtl != np.asarray(expected))
+
+    mismatches: List[RTLCrossCheckMismatch] = []
+    for pos in diff[:max_mismatches]:
+        scenario_index, event_index, ev = meta[pos]
+        mismatches.append(
+            RTLCrossCheckMismatch(
+                scenario_index=scenario_index,
+                event_index=event_index,
+                time=ev.time,
+                event_type=ev.type,
+                state_id=compiled.states[states[pos]].id,
+                simulation_state_id=compiled.states[expected[pos]].id,
+                rtl_state_id=compiled.states[int(rtl[pos])].id,
+            )
+        )
+
+    return RTLCrossCheckResult(
+        signals=model.signals,
+        events=len(states),
+        mismatches_total=int(diff.size),
+        mismatches=mismatches,
+    )
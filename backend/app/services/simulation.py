@@ -1,16 +1,28 @@
 ﻿from __future__ import annotations
 
-from typing import List, Dict, Any
+from dataclasses import dataclass
+from itertools import pairwise
+from typing import List, Dict, Any, Optional
 
 from app.schemas.simulation import (
     SimulationRequest,
     SimulationResult,
     TimelineItem,
     SimulationMetrics,
+    CoverageReport,
+    SimulationBatchRequest,
+    SimulationBatchResult,
 )
-from app.schemas.scenario import Direction, ScenarioEventType
+from app.schemas.scenario import Direction, ScenarioEvent, ScenarioEventType
 from app.schemas.fsm import FSMDefinition, FSMState, FSMTransition
-from app.services.fsm_validation import validate_fsm_structure, ValidationIssue
+from app.schemas.project import ElevatorConfig
+from app.services.fsm_validation import DOOR_OPEN_STATES, MOVING_STATES, validate_fsm_structure, ValidationIssue
+from app.services.fsm_minimization import minimize_fsm
+from app.services.simulation_metrics import (
+    CoverageCounters,
+    WaitTimeMetrics,
+    merge_coverage_reports,
+)
 
 
 class SimulationValidationError(Exception):
@@ -19,9 +31,14 @@ class SimulationValidationError(Exception):
         self.message = message
         super().__init__(message)
 
+    def __reduce__(self):
+        # ошибка из воркера пула процессов должна пережить pickle
+        return (self.__class__, (self.errors, self.message))
+
 
-ALLOWED_MOVING_STATES = {"moving_up", "moving_down"}
-OPEN_STATES = {"doors_open", "doors_opening"}
+# правило безопасности — то же, что в validate_fsm_structure
+ALLOWED_MOVING_STATES = MOVING_STATES
+OPEN_STATES = DOOR_OPEN_STATES
 
 
 def _get_initial_state(fsm: FSMDefinition) -> FSMState:
@@ -49,20 +66,23 @@ def _resolve_state_id(state_map: Dict[str, FSMState], preferred_ids: List[str])
     return preferred_ids[0]
 
 
+# Входной сигнал FSM -> тип события сценария, при котором он считается активным
+CONDITION_EVENTS: Dict[str, str] = {
+    "call_received": "call",
+    "arrived_at_floor": "sensor",
+    "door_timer_expired": "timer",
+    "tick": "timer",
+    "obstacle_detected": "sensor",
+}
+
+
 def _is_condition_satisfied(condition: str, context: Dict[str, object]) -> bool:
     cond = (condition or "").strip().lower()
     if cond in ("", "*", "always"):
         return True
     # Поддержка строковых условий из SUPPORTED_SIGNALS через сопоставление с event_type
     evt = str(context.get("event_type", "")).lower()
-    cond_to_event = {
-        "call_received": "call",
-        "arrived_at_floor": "sensor",
-        "door_timer_expired": "timer",
-        "tick": "timer",
-        "obstacle_detected": "sensor",
-    }
-    target_evt = cond_to_event.get(cond, cond)
+    target_evt = CONDITION_EVENTS.get(cond, cond)
     if evt and target_evt == evt:
         return True
     # Если условие совпадает с именем ключа контекста — проверяем его truthy.
@@ -71,20 +91,103 @@ def _is_condition_satisfied(condition: str, context: Dict[str, object]) -> bool:
     return False
 
 
-def _choose_transition(
-    transitions: List[FSMTransition],
-    current_state: FSMState,
+@dataclass
+class CompiledFSM:
+    """
+    FSM, разложенный по целочисленным индексам:
+    state_index — id состояния -> индекс в states,
+    outgoing[i] — индексы переходов из states[i] в порядке приоритета,
+    *_id — id служебных состояний цикла дверей (как их видит симуляция).
+    """
+    states: List[FSMState]
+    state_index: Dict[str, int]
+    transitions: List[FSMTransition]
+    outgoing: List[List[int]]
+    initial_index: int
+    door_opening_id: str
+    door_open_id: str
+    door_closing_id: str
+    idle_id: str
+
+
+def compile_fsm(fsm: FSMDefinition) -> CompiledFSM:
+    state_map = _build_state_map(fsm)
+    states = list(state_map.values())
+    state_index = {st.id: idx for idx, st in enumerate(states)}
+    outgoing: List[List[int]] = [[] for _ in states]
+    for tr_idx, tr in enumerate(fsm.transitions):
+        from_idx = state_index.get(tr.from_state_id)
+        if from_idx is not None:
+            outgoing[from_idx].append(tr_idx)
+    return CompiledFSM(
+        states=states,
+        state_index=state_index,
+        transitions=list(fsm.transitions),
+        outgoing=outgoing,
+        initial_index=state_index[_get_initial_state(fsm).id],
+        door_opening_id=_resolve_state_id(state_map, ["DOOR_OPENING", "doors_opening"]),
+        door_open_id=_resolve_state_id(state_map, ["DOOR_OPEN", "doors_open"]),
+        door_closing_id=_resolve_state_id(state_map, ["DOOR_CLOSING", "doors_closing"]),
+        idle_id=_resolve_state_id(state_map, ["IDLE_CLOSED", "idle_closed"]),
+    )
+
+
+def choose_transition(
+    compiled: CompiledFSM,
+    state_idx: int,
     event_type: str,
     context: Dict[str, object],
-) -> FSMTransition | None:
-    for tr in transitions:
-        if tr.from_state_id != current_state.id:
-            continue
+) -> int:
+    """
+    Возвращает индекс первого подходящего перехода из состояния state_idx или -1.
+    """
+    transitions = compiled.transitions
+    for tr_idx in compiled.outgoing[state_idx]:
+        tr = transitions[tr_idx]
         if tr.event_type is not None and tr.event_type.value != event_type:
             continue
         if _is_condition_satisfied(tr.condition, context):
-            return tr
-    return None
+            return tr_idx
+    return -1
+
+
+# Входной символ для таблицы переходов: (тип события, floor != 0).
+# Условия переходов зависят только от них, поэтому выбор перехода —
+# функция (состояние, символ), и её можно свести в плотную таблицу.
+EVENT_TYPES: List[ScenarioEventType] = list(ScenarioEventType)
+EVENT_CODES: Dict[ScenarioEventType, int] = {ev: code for code, ev in enumerate(EVENT_TYPES)}
+NUM_SYMBOLS = len(EVENT_TYPES) * 2
+
+
+def event_symbol(event_type: ScenarioEventType, floor: int) -> int:
+    return EVENT_CODES[event_type] * 2 + (1 if floor else 0)
+
+
+def transition_lut(compiled: CompiledFSM) -> List[int]:
+    """
+    Плотная таблица выбора перехода: lut[state * NUM_SYMBOLS + symbol] —
+    индекс перехода (как вернул бы choose_transition) или -1.
+    """
+    lut: List[int] = []
+    for state_idx in range(len(compiled.states)):
+        for ev_type in EVENT_TYPES:
+            for nonzero in (0, 1):
+                context: Dict[str, object] = {
+                    "floor": nonzero,
+                    "direction": Direction.NONE.value,
+                    "event_type": ev_type.value,
+                }
+                lut.append(choose_transition(compiled, state_idx, ev_type.value, context))
+    return lut
+
+
+def _ordered_events(events: List[ScenarioEvent]) -> List[ScenarioEvent]:
+    """
+    Обычно события сценария уже идут по времени — тогда сортировку пропускаем.
+    """
+    if all(prev.time <= nxt.time for prev, nxt in pairwise(events)):
+        return events
+    return sorted(events, key=lambda e: e.time)
 
 
 def _validate_or_raise(fsm: FSMDefinition) -> None:
@@ -94,144 +197,154 @@ def _validate_or_raise(fsm: FSMDefinition) -> None:
 
 # ===== Основная симуляция =====
 
-def simulate(request: SimulationRequest) -> SimulationResult:
-    events = sorted(request.scenario.events, key=lambda e: e.time)
-    fsm = request.fsm
-    config = request.config
+class SimulationListener:
+    """
+    Наблюдатель за движком симуляции (например, запись VCD).
+    on_event — перед обработкой события сценария,
+    on_state — при каждой записи состояния лифта (как в таймлайн).
+    """
 
-    _validate_or_raise(fsm)
+    def on_event(self, ev: ScenarioEvent) -> None:
+        pass
 
-    if not events:
-        return SimulationResult(
-            timeline=[],
-            metrics=SimulationMetrics(
-                avg_wait_time=0.0,
-                total_moves=0,
-                stops=0,
-            ),
-        )
+    def on_state(
+        self,
+        time: float,
+        floor: int,
+        state_id: str,
+        doors_open: bool,
+        direction: Direction,
+    ) -> None:
+        pass
 
-    state_map = _build_state_map(fsm)
-    current_state = _get_initial_state(fsm)
-
-    current_floor = 0
-    current_time: float = 0.0
-
-    total_moves = 0
-    total_wait_time = 0.0
-    stops = 0
-
-    timeline: List[TimelineItem] = [
-        TimelineItem(
-          time=int(round(current_time)),
-          floor=current_floor,
-          state_id=current_state.id,
-          doors_open=False,
-          direction=Direction.NONE,
-        )
-    ]
 
-    move_time = float(config.move_time)
-    door_time = float(config.door_time)
+class _SimulationEngine:
+    """
+    Пошаговый движок симуляции: одно событие сценария -> step().
 
-    for ev in events:
-        context: Dict[str, object] = {
-            "floor": ev.floor,
-            "direction": ev.direction.value,
-            "event_type": ev.type.value,
-        }
-
-        transition = _choose_transition(fsm.transitions, current_state, ev.type.value, context)
-        if transition is None:
+    Состояние (время, этаж, текущее состояние FSM) и накопители метрик
+    живут в самом движке, таймлайн пополняется через _emit().
+    При record_timeline=False таймлайн не строится вовсе — остаются
+    только накопители, память не зависит от длины сценария.
+    """
+
+    def __init__(
+        self,
+        fsm: FSMDefinition,
+        config: ElevatorConfig,
+        record_timeline: bool = True,
+        listener: Optional[SimulationListener] = None,
+    ) -> None:
+        self.compiled = compile_fsm(fsm)
+        self.lut = transition_lut(self.compiled)
+        self.listener = listener
+        self.state_map = {st.id: st for st in self.compiled.states}
+        self.current_state = _get_initial_state(fsm)
+        self.current_floor = 0
+        self.current_time: float = 0.0
+
+        self.move_time = float(config.move_time)
+        self.door_time = float(config.door_time)
+
+        self.door_opening_id = self.compiled.door_opening_id
+        self.door_open_id = self.compiled.door_open_id
+        self.door_closing_id = self.compiled.door_closing_id
+        self.idle_id = self.compiled.idle_id
+
+        self.total_moves = 0
+        self.waits = WaitTimeMetrics(config.floors)
+        self.coverage = CoverageCounters(len(self.compiled.states), len(self.compiled.transitions))
+
+        self.timeline: Optional[List[TimelineItem]] = [] if record_timeline else None
+        self._emit(self.current_time, self.current_state.id, False, Direction.NONE)
+
+    def _emit(self, time: float, state_id: str, doors_open: bool, direction: Direction) -> None:
+        self.coverage.enter(self.compiled.state_index.get(state_id, -1), time)
+        if self.listener is not None:
+            self.listener.on_state(time, self.current_floor, state_id, doors_open, direction)
+        if self.timeline is None:
+            return
+        self.timeline.append(
+            TimelineItem(
+                time=int(round(time)),
+                floor=self.current_floor,
+                state_id=state_id,
+                doors_open=doors_open,
+                direction=direction,
+            )
+        )
+
+    def _serve_call(self, ev: ScenarioEvent, wait_time: float) -> None:
+        self.waits.add(max(wait_time, 0.0), ev.floor, ev.direction)
+
+    def _arrive_and_cycle_doors(self, target_floor: int, fallback_state: FSMState) -> None:
+        """
+        Прибытие на этаж: открыть/закрыть двери (через стандартные состояния)
+        и остаться в idle (если оно определено), иначе в fallback_state.
+        """
+        self.current_floor = target_floor
+
+        opening_time = self.current_time
+        self._emit(opening_time, self.door_opening_id, False, Direction.NONE)
+        open_time = opening_time + self.door_time * 0.25
+        self._emit(open_time, self.door_open_id, True, Direction.NONE)
+        closing_time = open_time + self.door_time * 0.5
+        self._emit(closing_time, self.door_closing_id, False, Direction.NONE)
+        idle_time = closing_time + self.door_time * 0.25
+        self._emit(idle_time, self.idle_id, False, Direction.NONE)
+
+        self.current_time = idle_time
+        self.current_state = self.state_map.get(self.idle_id, fallback_state)
+
+    def step(self, ev: ScenarioEvent) -> None:
+        current_state = self.current_state
+        self.coverage.events += 1
+        if self.listener is not None:
+            self.listener.on_event(ev)
+        # O(1) выбор перехода по таблице вместо перебора условий
+        tr_idx = self.lut[
+            self.compiled.state_index[current_state.id] * NUM_SYMBOLS
+            + EVENT_CODES[ev.type] * 2
+            + (1 if ev.floor else 0)
+        ]
+        if tr_idx < 0:
             # Мягкий режим: если нет подходящего перехода,
             # а событие = вызов/cabin -> выполняем движение к этажу и цикл дверей.
             if ev.type in (ScenarioEventType.CALL, ScenarioEventType.CABIN):
+                self.coverage.soft_mode_hits += 1
                 target_floor = ev.floor
-                floor_diff = abs(target_floor - current_floor)
-                travel_time = floor_diff * move_time
+                floor_diff = abs(target_floor - self.current_floor)
+                travel_time = floor_diff * self.move_time
                 direction = Direction.NONE
-                if target_floor > current_floor:
+                if target_floor > self.current_floor:
                     direction = Direction.UP
-                elif target_floor < current_floor:
+                elif target_floor < self.current_floor:
                     direction = Direction.DOWN
-                timeline.append(
-                    TimelineItem(
-                        time=int(round(current_time)),
-                        floor=current_floor,
-                        state_id=current_state.id,
-                        doors_open=current_state.id.lower() == "doors_open",
-                        direction=direction,
-                    )
-                )
-                total_moves += floor_diff
-                wait_time = (current_time - ev.time) + travel_time
-                total_wait_time += max(wait_time, 0.0)
-                stops += 1
-                current_time = max(current_time, float(ev.time)) + travel_time
-                current_floor = target_floor
-
-                # открыть/закрыть двери на этаже
-                opening_time = current_time
-                door_opening_id = _resolve_state_id(state_map, ["DOOR_OPENING", "doors_opening"])
-                timeline.append(
-                    TimelineItem(
-                        time=int(round(opening_time)),
-                        floor=current_floor,
-                        state_id=door_opening_id,
-                        doors_open=False,
-                        direction=Direction.NONE,
-                    )
+                self._emit(
+                    self.current_time,
+                    current_state.id,
+                    current_state.id.lower() == "doors_open",
+                    direction,
                 )
-                open_time = opening_time + door_time * 0.25
-                door_open_id = _resolve_state_id(state_map, ["DOOR_OPEN", "doors_open"])
-                timeline.append(
-                    TimelineItem(
-                        time=int(round(open_time)),
-                        floor=current_floor,
-                        state_id=door_open_id,
-                        doors_open=True,
-                        direction=Direction.NONE,
-                    )
-                )
-                closing_time = open_time + door_time * 0.5
-                door_closing_id = _resolve_state_id(state_map, ["DOOR_CLOSING", "doors_closing"])
-                timeline.append(
-                    TimelineItem(
-                        time=int(round(closing_time)),
-                        floor=current_floor,
-                        state_id=door_closing_id,
-                        doors_open=False,
-                        direction=Direction.NONE,
-                    )
-                )
-                idle_time = closing_time + door_time * 0.25
-                idle_id = _resolve_state_id(state_map, ["IDLE_CLOSED", "idle_closed"])
-                timeline.append(
-                    TimelineItem(
-                        time=int(round(idle_time)),
-                        floor=current_floor,
-                        state_id=idle_id,
-                        doors_open=False,
-                        direction=Direction.NONE,
-                    )
-                )
-                current_time = idle_time
-                current_state = state_map.get(idle_id, current_state)
-                continue
+                self.total_moves += floor_diff
+                self._serve_call(ev, (self.current_time - ev.time) + travel_time)
+                self.current_time = max(self.current_time, float(ev.time)) + travel_time
+                self._arrive_and_cycle_doors(target_floor, current_state)
             else:
                 # фиксируем состояние и идём дальше
-                timeline.append(
-                    TimelineItem(
-                        time=int(round(current_time)),
-                        floor=current_floor,
-                        state_id=current_state.id,
-                        doors_open=current_state.id.lower() == "doors_open",
-                        direction=Direction.NONE,
-                    )
+                self.coverage.unhandled_events += 1
+                self._emit(
+                    self.current_time,
+                    current_state.id,
+                    current_state.id.lower() == "doors_open",
+                    Direction.NONE,
                 )
-                continue
+            return
+
+        transition = self.compiled.transitions[tr_idx]
+        self.coverage.transition_hits[tr_idx] += 1
 
-        if transition.to_state_id not in state_map:
+        if transition.to_state_id not in self.state_map:
             raise SimulationValidationError([
                 {
                     "detail": f"Transition {transition.id} указывает на неизвестное состояние",
@@ -239,7 +352,7 @@ def simulate(request: SimulationRequest) -> SimulationResult:
                 }
             ])
 
-        new_state = state_map[transition.to_state_id]
+        new_state = self.state_map[transition.to_state_id]
 
         # Safety: запрещаем doors_open/doors_opening -> moving
         if current_state.id.lower() in OPEN_STATES and new_state.id.lower() in ALLOWED_MOVING_STATES:
@@ -250,8 +363,7 @@ def simulate(request: SimulationRequest) -> SimulationResult:
                 }
             ])
 
-        event_time = float(ev.time)
-        current_time = max(current_time, event_time)
+        self.current_time = max(self.current_time, float(ev.time))
 
         direction = Direction.NONE
         if new_state.id.lower() == "moving_up":
@@ -261,98 +373,101 @@ def simulate(request: SimulationRequest) -> SimulationResult:
 
         if new_state.id.lower() in ALLOWED_MOVING_STATES:
             target_floor = ev.floor
-            floor_diff = abs(target_floor - current_floor)
-            travel_time = floor_diff * move_time
-
-            timeline.append(
-                TimelineItem(
-                    time=int(round(current_time)),
-                    floor=current_floor,
-                    state_id=new_state.id,
-                    doors_open=False,
-                    direction=direction,
-                )
-            )
+            floor_diff = abs(target_floor - self.current_floor)
+            travel_time = floor_diff * self.move_time
 
-            total_moves += floor_diff
-            wait_time = (current_time - ev.time) + travel_time
-            total_wait_time += max(wait_time, 0.0)
-            stops += 1
-
-            current_time += travel_time
-            current_floor = target_floor
-
-            # после прибытия: открыть/закрыть двери (через стандартные состояния)
-            opening_time = current_time
-            door_opening_id = _resolve_state_id(state_map, ["DOOR_OPENING", "doors_opening"])
-            timeline.append(
-                TimelineItem(
-                    time=int(round(opening_time)),
-                    floor=current_floor,
-                    state_id=door_opening_id,
-                    doors_open=False,
-                    direction=Direction.NONE,
-                )
-            )
-            open_time = opening_time + door_time * 0.25
-            door_open_id = _resolve_state_id(state_map, ["DOOR_OPEN", "doors_open"])
-            timeline.append(
-                TimelineItem(
-                    time=int(round(open_time)),
-                    floor=current_floor,
-                    state_id=door_open_id,
-                    doors_open=True,
-                    direction=Direction.NONE,
-                )
-            )
-            closing_time = open_time + door_time * 0.5
-            door_closing_id = _resolve_state_id(state_map, ["DOOR_CLOSING", "doors_closing"])
-            timeline.append(
-                TimelineItem(
-                    time=int(round(closing_time)),
-                    floor=current_floor,
-                    state_id=door_closing_id,
-                    doors_open=False,
-                    direction=Direction.NONE,
-                )
-            )
-            idle_time = closing_time + door_time * 0.25
-            idle_id = _resolve_state_id(state_map, ["IDLE_CLOSED", "idle_closed"])
-            timeline.append(
-                TimelineItem(
-                    time=int(round(idle_time)),
-                    floor=current_floor,
-                    state_id=idle_id,
-                    doors_open=False,
-                    direction=Direction.NONE,
-                )
-            )
-            current_time = idle_time
+            self._emit(self.current_time, new_state.id, False, direction)
+
+            self.total_moves += floor_diff
+            self._serve_call(ev, (self.current_time - ev.time) + travel_time)
 
-            # остаёмся в состоянии idle (если оно определено) иначе moving
-            current_state = state_map.get(idle_id, new_state)
+            self.current_time += travel_time
+            self._arrive_and_cycle_doors(target_floor, new_state)
         else:
             doors_open = new_state.id.lower() == "doors_open"
-            timeline.append(
-                TimelineItem(
-                    time=int(round(current_time)),
-                    floor=current_floor,
-                    state_id=new_state.id,
-                    doors_open=doors_open,
-                    direction=direction,
-                )
-            )
-            current_state = new_state
+            self._emit(self.current_time, new_state.id, doors_open, direction)
+            self.current_state = new_state
 
-    avg_wait_time = total_wait_time / stops if stops > 0 else 0.0
+    def metrics(self) -> SimulationMetrics:
+        return self.waits.to_schema(self.total_moves)
 
-    metrics = SimulationMetrics(
-        avg_wait_time=avg_wait_time,
-        total_moves=total_moves,
-        stops=stops,
-    )
+    def coverage_report(self) -> CoverageReport:
+        return self.coverage.to_schema(
+            self.compiled.states,
+            self.compiled.transitions,
+            idle_index=self.compiled.state_index.get(self.idle_id, -1),
+        )
+
+    def result(self) -> SimulationResult:
+        return SimulationResult(
+            timeline=self.timeline or [],
+            metrics=self.metrics(),
+            coverage=self.coverage_report(),
+        )
+
+
+def simulate(
+    request: SimulationRequest,
+    metrics_only: bool = False,
+    minimize: bool = False,
+) -> SimulationResult:
+    """
+    metrics_only=True — не строить таймлайн (для прогонов, где нужны
+    только метрики и покрытие: оценивание, перебор параметров и т.п.).
+    minimize=True — симулировать минимизированный автомат
+    (покрытие считается по его состояниям и переходам).
+    """
+    events = _ordered_events(request.scenario.events)
+    fsm = request.fsm
+
+    _validate_or_raise(fsm)
+    if minimize:
+        fsm = minimize_fsm(fsm).fsm
+
+    if not events:
+        return SimulationResult(
+            timeline=[],
+            metrics=SimulationMetrics(
+                avg_wait_time=0.0,
+                total_moves=0,
+                stops=0,
+            ),
+            coverage=CoverageReport(),
+        )
+
+    engine = _SimulationEngine(fsm, request.config, record_timeline=not metrics_only)
+    for ev in events:
+        engine.step(ev)
+
+    return engine.result()
+
+
+def simulate_batch(request: SimulationBatchRequest, minimize: bool = False) -> SimulationBatchResult:
+    """
+    Прогоняет FSM по всем сценариям и складывает отчёты покрытия.
+    """
+    fsm = request.fsm
+    if minimize:
+        _validate_or_raise(fsm)
+        fsm = minimize_fsm(fsm).fsm
+
+    metrics: List[SimulationMetrics] = []
+    reports: List[CoverageReport] = []
+    for scenario in request.scenarios:
+        result = simulate(
+            SimulationRequest(
+                project_id=request.project_id,
+                config=request.config,
+                fsm=fsm,
+                scenario=scenario,
+            ),
+            metrics_only=True,
+        )
+        metrics.append(result.metrics)
+        if result.coverage is not None:
+            reports.append(result.coverage)
 
-    return SimulationResult(timeline=timeline, metrics=metrics)
+    return SimulationBatchResult(metrics=metrics, coverage=merge_coverage_reports(reports))
 
 
 def enrich_timeline_with_fsm_states(
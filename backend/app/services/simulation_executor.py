@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import multiprocessing
+import os
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Hashable, Optional, TypeVar
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.schemas.fsm import FSMDefinition
+from app.schemas.scenario import Scenario
+
+T = TypeVar("T")
+
+
+class SimulationRejected(Exception):
+    """
+    Симуляция не принята: 429 — у пользователя уже слишком много прогонов,
+    503 — общая очередь заполнена. retry_after — подсказка клиенту, секунды.
+    """
+
+    def __init__(self, status_code: int, detail: str, retry_after: int) -> None:
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+        super().__init__(detail)
+
+
+def estimate_simulation_cost(fsm: FSMDefinition, *scenarios: Optional[Scenario]) -> int:
+    """Грубая оценка стоимости прогона: события × переходы."""
+    events = sum(len(sc.events) for sc in scenarios if sc is not None)
+    return events * max(1, len(fsm.transitions))
+
+
+@dataclass(eq=False)
+class SimulationReservation:
+    """
+    Место, занятое admit(): учтено в лимите пользователя и в очереди, пока
+    его не заберёт slot() или не вернёт release().
+    """
+
+    user: Hashable
+    cost: int
+    queued: bool = True
+    released: bool = False
+
+
+@dataclass
+class _Ticket:
+    user: Hashable
+    cost: int
+    granted: asyncio.Future = field(repr=False)
+
+
+class SimulationExecutor:
+    """
+    Отдельный пул процессов для симуляций с контролем допуска.
+
+    Симуляция — чистый CPU и держит GIL, поэтому тяжёлые прогоны уходят
+    в процессы (spawn), а не в threadpool, где они тормозили бы дешёвые
+    эндпоинты. Одновременно выполняется не больше workers прогонов;
+    остальные ждут в очереди, из которой слоты раздаются по кругу между
+    пользователями (один пользователь с пачкой прогонов не задерживает
+    остальных). Переполнение очереди (по числу или суммарной стоимости) —
+    503, слишком много прогонов одного пользователя — 429. Дешёвые прогоны
+    (cost <= inline_cost) дешевле выполнить в потоке, чем гонять через процесс.
+
+    Состояние очереди меняется только из цикла событий, блокировки не нужны.
+    Лимиты действуют на процесс веб-сервера.
+    """
+
+    def __init__(
+        self,
+        workers: int = 0,
+        queue_limit: int = 64,
+        queue_max_cost: int = 0,
+        per_user_limit: int = 2,
+        inline_cost: int = 0,
+    ) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_limit = queue_limit
+        self.queue_max_cost = queue_max_cost
+        self.per_user_limit = per_user_limit
+        self.inline_cost = inline_cost
+
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._running = 0
+        self._waiting: Dict[Hashable, Deque[_Ticket]] = {}
+        self._order: Deque[Hashable] = deque()
+        self._queued = 0
+        self._queued_cost = 0
+        self._per_user: Counter[Hashable] = Counter()
+        self._reserved = 0
+        self._reserved_cost = 0
+        self._avg_seconds = 1.0
+
+        self.completed = 0
+        self.inline = 0
+        self.rejected_busy = 0
+        self.rejected_user = 0
+
+    # --- пул процессов ---
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    # --- допуск и очередь ---
+
+    def _retry_after(self) -> int:
+        return max(1, math.ceil(self._avg_seconds * (self._queued + 1) / self.workers))
+
+    def _admit(self, user: Hashable, cost: int) -> None:
+        if self._per_user[user] >= self.per_user_limit:
+            self.rejected_user += 1
+            raise SimulationRejected(
+                429,
+                f"Слишком много одновременных симуляций (не больше {self.per_user_limit})",
+                self._retry_after(),
+            )
+        # зарезервированные admit() места ещё не в очереди, но займут её
+        if self._running + self._reserved < self.workers and not self._queued:
+            return
+        queued = self._queued + max(0, self._running + self._reserved - self.workers)
+        over_cost = self.queue_max_cost and self._queued_cost + self._reserved_cost + cost > self.queue_max_cost
+        if queued >= self.queue_limit or over_cost:
+            self.rejected_busy += 1
+            raise SimulationRejected(503, "Очередь симуляций заполнена, повторите позже", self._retry_after())
+
+    async def _acquire(self, user: Hashable, cost: int) -> None:
+        if self._running < self.workers and not self._queued:
+            self._running += 1
+            return
+        ticket = _Ticket(user=user, cost=cost, granted=asyncio.get_running_loop().create_future())
+        queue = self._waiting.get(user)
+        if queue is None:
+            queue = self._waiting[user] = deque()
+            self._order.append(user)
+        queue.append(ticket)
+        self._queued += 1
+        self._queued_cost += cost
+        try:
+            await ticket.granted
+        except asyncio.CancelledError:
+            if ticket.granted.done() and not ticket.granted.cancelled():
+                self._release()  # слот уже выдан, но не нужен
+            else:
+                self._drop(ticket)
+            raise
+
+    def _drop(self, ticket: _Ticket) -> None:
+        queue = self._waiting.get(ticket.user)
+        if queue is None or ticket not in queue:
+            return
+        queue.remove(ticket)
+        self._queued -= 1
+        self._queued_cost -= ticket.cost
+        if not queue:
+            del self._waiting[ticket.user]
+            self._order.remove(ticket.user)
+
+    def _release(self) -> None:
+        self._running -= 1
+        while self._running < self.workers and self._order:
+            # по кругу: пользователь уходит в конец очереди после каждого слота
+            user = self._order.popleft()
+            queue = self._waiting[user]
+            ticket = queue.popleft()
+            if queue:
+                self._order.append(user)
+            else:
+                del self._waiting[user]
+            self._queued -= 1
+            self._queued_cost -= ticket.cost
+            if ticket.granted.done():
+                continue
+            self._running += 1
+            ticket.granted.set_result(None)
+
+    def admit(self, user: Hashable, cost: int) -> Optional[SimulationReservation]:
+        """
+        Допуск с резервированием места: для потоковых ответов отказ
+        (SimulationRejected) должен прозвучать до того, как ответ начат, а
+        между admit() и slot() место не должен занять параллельный запрос.
+        Резерв передаётся в slot(); если до slot() дело не дошло (клиент
+        отключился раньше), его возвращают через release().
+        Для дешёвых прогонов (cost <= inline_cost) — None.
+        """
+        if cost <= self.inline_cost:
+            return None
+        self._admit(user, cost)
+        self._per_user[user] += 1
+        self._reserved += 1
+        self._reserved_cost += cost
+        return SimulationReservation(user=user, cost=cost)
+
+    def _unqueue(self, reservation: SimulationReservation) -> None:
+        if reservation.queued:
+            reservation.queued = False
+            self._reserved -= 1
+            self._reserved_cost -= reservation.cost
+
+    def release(self, reservation: Optional[SimulationReservation]) -> None:
+        """Вернуть резерв admit(); повторный вызов ничего не делает."""
+        if reservation is None or reservation.released:
+            return
+        self._unqueue(reservation)
+        reservation.released = True
+        self._per_user[reservation.user] -= 1
+        if not self._per_user[reservation.user]:
+            del self._per_user[reservation.user]
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        user: Hashable,
+        cost: int,
+        reservation: Optional[SimulationReservation] = None,
+    ) -> AsyncIterator[None]:
+        """
+        Слот исполнителя для прогона, который идёт не в пуле процессов
+        (потоковый VCD): те же очередь, справедливость и лимиты, что у run().
+        reservation — резерв из admit(); без него допуск проверяется здесь.
+        Резерв возвращается при любом выходе.
+        """
+        if cost <= self.inline_cost:
+            self.inline += 1
+            yield
+            return
+        if reservation is None:
+            reservation = self.admit(user, cost)
+        elif reservation.released:
+            raise RuntimeError("Резерв симуляции уже возвращён")
+        try:
+            self._unqueue(reservation)
+            await self._acquire(user, cost)
+            try:
+                yield
+            finally:
+                self._release()
+        finally:
+            self.release(reservation)
+
+    async def run(self, user: Hashable, cost: int, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Выполнить fn(*args, **kwargs) (функция уровня модуля, аргументы —
+        pickle-совместимые) с учётом очереди. Бросает SimulationRejected.
+        """
+        if cost <= self.inline_cost:
+            self.inline += 1
+            return await run_in_threadpool(fn, *args, **kwargs)
+
+        async with self.slot(user, cost):
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            try:
+                result = await loop.run_in_executor(self._get_pool(), partial(fn, *args, **kwargs))
+            except BrokenProcessPool:
+                # воркер упал (например, OOM) — пересоздаём пул при следующем вызове
+                self._pool = None
+                raise SimulationRejected(503, "Исполнитель симуляций перезапускается", 1) from None
+            self.completed += 1
+            self._avg_seconds += 0.2 * (loop.time() - started - self._avg_seconds)
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "running": self._running,
+            "queued": self._queued,
+            "queued_cost": self._queued_cost,
+            "completed": self.completed,
+            "inline": self.inline,
+            "rejected_busy": self.rejected_busy,
+            "rejected_user": self.rejected_user,
+            "avg_seconds": round(self._avg_seconds, 3),
+        }
+
+
+simulation_executor = SimulationExecutor(
+    workers=settings.SIMULATION_WORKERS,
+    queue_limit=settings.SIMULATION_QUEUE_LIMIT,
+    queue_max_cost=settings.SIMULATION_QUEUE_MAX_COST,
+    per_user_limit=settings.SIMULATION_MAX_PER_USER,
+    inline_cost=settings.SIMULATION_INLINE_COST,
+)
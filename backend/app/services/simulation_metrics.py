@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import math
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from app.schemas.fsm import FSMState, FSMTransition
+from app.schemas.scenario import Direction
+from app.schemas.simulation import (
+    CoverageReport,
+    DirectionWaitStats,
+    FloorWaitStats,
+    SimulationMetrics,
+    StateResidency,
+    TransitionCoverage,
+)
+
+
+class QuantileSketch:
+    """
+    Потоковый скетч квантилей с относительной точностью (в духе DDSketch).
+
+    Значения раскладываются по логарифмическим корзинам, поэтому память
+    не зависит от числа наблюдений: при точности 1% и времени ожидания
+    от миллисекунд до суток корзин — несколько сотен. На всякий случай
+    число корзин ограничено max_bins: младшие корзины схлопываются пачкой
+    до 7/8 лимита, а всё, что ниже границы схлопывания, сразу попадает
+    в её корзину — сортировка ключей бывает раз на max_bins / 8 вставок.
+    Скетчи можно объединять через merge().
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 2048) -> None:
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._min_value = 1e-9
+        self._bins: Dict[int, int] = {}
+        # корзины с ключом ниже этого уже схлопнуты в неё
+        self._floor_key: float = -math.inf
+        self._zero_count = 0
+        self.count = 0
+        self.min: float = math.inf
+        self.max: float = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if value <= self._min_value:
+            self._zero_count += 1
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        if key < self._floor_key:
+            key = self._floor_key
+        bins = self._bins
+        bins[key] = bins.get(key, 0) + 1
+        if len(bins) > self.max_bins:
+            self._collapse()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if other._gamma != self._gamma:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for key, cnt in other._bins.items():
+            key = max(key, self._floor_key)
+            self._bins[key] = self._bins.get(key, 0) + cnt
+        self._zero_count += other._zero_count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if len(self._bins) > self.max_bins:
+            self._collapse()
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = self._zero_count
+        if seen > rank:
+            return max(self.min, 0.0)
+        for key in sorted(self._bins):
+            seen += self._bins[key]
+            if seen > rank:
+                estimate = 2 * self._gamma ** key / (self._gamma + 1)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+    def _collapse(self) -> None:
+        # младшие корзины сливаются в одну, пока не останется 7/8 лимита
+        keys = sorted(self._bins)
+        excess = len(keys) - (self.max_bins - self.max_bins // 8)
+        target = keys[excess]
+        for key in keys[:excess]:
+            self._bins[target] += self._bins.pop(key)
+        self._floor_key = target
+
+
+class _WaitAccumulator:
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def avg(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class WaitTimeMetrics:
+    """
+    Накопитель метрик ожидания для движка симуляции.
+
+    Всё считается на лету и занимает O(floors) памяти:
+    - общий скетч квантилей (p50/p90/p99) + точный максимум;
+    - массив аккумуляторов по этажам (0..floors включительно,
+      чтобы подходила и нумерация с нуля, и с единицы); вызовы с этажей
+      вне здания считаются отдельно (outside_floors);
+    - аккумуляторы по направлению вызова.
+    """
+
+    def __init__(self, floors: int) -> None:
+        self.sketch = QuantileSketch()
+        self.total = _WaitAccumulator()
+        self.by_floor: List[_WaitAccumulator] = [_WaitAccumulator() for _ in range(floors + 1)]
+        self.by_direction: Dict[Direction, _WaitAccumulator] = {d: _WaitAccumulator() for d in Direction}
+        self.outside_floors = 0
+
+    def add(self, wait_time: float, floor: int, direction: Direction) -> None:
+        self.sketch.add(wait_time)
+        self.total.add(wait_time)
+        if 0 <= floor < len(self.by_floor):
+            self.by_floor[floor].add(wait_time)
+        else:
+            self.outside_floors += 1
+        self.by_direction[direction].add(wait_time)
+
+    def to_schema(self, total_moves: int) -> SimulationMetrics:
+        return SimulationMetrics(
+            avg_wait_time=self.total.avg,
+            total_moves=total_moves,
+            stops=self.total.count,
+            p50_wait_time=self.sketch.quantile(0.5),
+            p90_wait_time=self.sketch.quantile(0.9),
+            p99_wait_time=self.sketch.quantile(0.99),
+            max_wait_time=self.total.max,
+            wait_by_floor=[
+                FloorWaitStats(
+                    floor=floor,
+                    calls=acc.count,
+                    avg_wait_time=acc.avg,
+                    max_wait_time=acc.max,
+                )
+                for floor, acc in enumerate(self.by_floor)
+                if acc.count
+            ],
+            calls_outside_floors=self.outside_floors,
+            wait_by_direction=[
+                DirectionWaitStats(
+                    direction=direction,
+                    calls=acc.count,
+                    avg_wait_time=acc.avg,
+                    max_wait_time=acc.max,
+                )
+                for direction, acc in self.by_direction.items()
+                if acc.count
+            ],
+        )
+
+
+class CoverageCounters:
+    """
+    Счётчики покрытия FSM, индексированные как states/transitions движка:
+    срабатывания переходов, время и число заходов в состояния,
+    срабатывания мягкого режима.
+    """
+
+    def __init__(self, num_states: int, num_transitions: int) -> None:
+        self.transition_hits: List[int] = [0] * num_transitions
+        self.state_time: List[float] = [0.0] * num_states
+        self.state_visits: List[int] = [0] * num_states
+        self.events = 0
+        self.soft_mode_hits = 0
+        self.unhandled_events = 0
+        self._state = -1
+        self._since: Optional[float] = None
+        self._start = 0.0
+
+    def enter(self, state_idx: int, time: float) -> None:
+        """
+        Лифт находится в состоянии state_idx начиная с момента time
+        (-1 — состояние, которого нет в FSM).
+        """
+        if self._since is None:
+            self._start = time
+        elif self._state >= 0:
+            self.state_time[self._state] += time - self._since
+        if state_idx != self._state:
+            if state_idx >= 0:
+                self.state_visits[state_idx] += 1
+            self._state = state_idx
+        self._since = time
+
+    @property
+    def total_time(self) -> float:
+        return 0.0 if self._since is None else self._since - self._start
+
+    def to_schema(
+        self,
+        states: Sequence[FSMState],
+        transitions: Sequence[FSMTransition],
+        idle_index: int = -1,
+    ) -> CoverageReport:
+        total_time = self.total_time
+        idle_time = self.state_time[idle_index] if idle_index >= 0 else 0.0
+        hit = sum(1 for hits in self.transition_hits if hits)
+        return CoverageReport(
+            runs=1,
+            events=self.events,
+            total_time=total_time,
+            idle_time=idle_time,
+            idle_ratio=idle_time / total_time if total_time > 0 else 0.0,
+            soft_mode_hits=self.soft_mode_hits,
+            unhandled_events=self.unhandled_events,
+            transition_coverage=hit / len(transitions) if transitions else 0.0,
+            transitions=[
+                TransitionCoverage(
+                    transition_id=tr.id,
+                    from_state_id=tr.from_state_id,
+                    to_state_id=tr.to_state_id,
+                    hits=hits,
+                )
+                for tr, hits in zip(transitions, self.transition_hits)
+            ],
+            states=[
+                StateResidency(state_id=st.id, visits=visits, time=time)
+                for st, visits, time in zip(states, self.state_visits, self.state_time)
+            ],
+        )
+
+
+def merge_coverage_reports(reports: Iterable[CoverageReport]) -> CoverageReport:
+    """
+    Складывает отчёты покрытия нескольких прогонов (например, пакетной
+    симуляции одного FSM по разным сценариям).
+    """
+    merged = CoverageReport(runs=0)
+    transitions: Dict[str, TransitionCoverage] = {}
+    states: Dict[str, StateResidency] = {}
+
+    for report in reports:
+        merged.runs += report.runs
+        merged.events += report.events
+        merged.total_time += report.total_time
+        merged.idle_time += report.idle_time
+        merged.soft_mode_hits += report.soft_mode_hits
+        merged.unhandled_events += report.unhandled_events
+        for tr in report.transitions:
+            acc = transitions.get(tr.transition_id)
+            if acc is None:
+                transitions[tr.transition_id] = tr.model_copy()
+            else:
+                acc.hits += tr.hits
+        for st in report.states:
+            acc_st = states.get(st.state_id)
+            if acc_st is None:
+                states[st.state_id] = st.model_copy()
+            else:
+                acc_st.visits += st.visits
+                acc_st.time += st.time
+
+    merged.transitions = list(transitions.values())
+    merged.states = list(states.values())
+    merged.idle_ratio = merged.idle_time / merged.total_time if merged.total_time > 0 else 0.0
+    if merged.transitions:
+        merged.transition_coverage = (
+            sum(1 for tr in merged.transitions if tr.hits) / len(merged.transitions)
+        )
+    return merged
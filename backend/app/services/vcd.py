@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.schemas.fsm import FSMDefinition, StateEncoding
+from app.schemas.scenario import Direction, ScenarioEvent
+from app.schemas.simulation import SimulationRequest
+from app.services.fsm_verilog import state_encoding, state_encoding_width
+from app.services.rtl_simulation import RTL_SIGNALS
+from app.services.simulation import (
+    SimulationListener,
+    SimulationValidationError,
+    _SimulationEngine,
+    _is_condition_satisfied,
+    _ordered_events,
+    _validate_or_raise,
+)
+
+# 1 единица времени симуляции = 1 с; в VCD пишем миллисекунды,
+# чтобы не терять доли цикла дверей (door_time * 0.25)
+VCD_TIMESCALE = "1ms"
+_TICKS_PER_UNIT = 1000
+
+DIRECTION_CODES: Dict[Direction, int] = {
+    Direction.NONE: 0,
+    Direction.UP: 1,
+    Direction.DOWN: 2,
+}
+
+
+def _bits(value: int) -> int:
+    return max(1, value.bit_length())
+
+
+class VCDWriter(SimulationListener):
+    """
+    Запись прогона симуляции в формате Value Change Dump.
+
+    Сигналы: state (код состояния, как регистр state в экспортированном
+    Verilog), floor, doors_open, direction (0 — none, 1 — up, 2 — down)
+    и входные сигналы FSM (уровень держится до следующего события).
+    Пишутся только изменения значений; текст копится в небольшом буфере,
+    который забирается через drain(), поэтому весь дамп в памяти не живёт.
+    Время в VCD не убывает: отметки из прошлого прижимаются к последней.
+    """
+
+    def __init__(
+        self,
+        fsm: FSMDefinition,
+        floors: int,
+        module_name: str = "elevator_fsm",
+        encoding: StateEncoding = StateEncoding.BINARY,
+    ) -> None:
+        self.codes = state_encoding(fsm, encoding)
+        self.state_width = state_encoding_width(len(fsm.states), encoding)
+        self.floor_width = _bits(floors)
+        self.module_name = module_name
+
+        # (имя, ширина) -> короткий идентификатор VCD
+        variables: List[Tuple[str, int]] = [
+            ("state", self.state_width),
+            ("floor", self.floor_width),
+            ("doors_open", 1),
+            ("direction", 2),
+        ]
+        variables.extend((sig, 1) for sig in RTL_SIGNALS)
+        self.widths: Dict[str, int] = dict(variables)
+        self.ids: Dict[str, str] = {name: self._identifier(i) for i, (name, _) in enumerate(variables)}
+
+        self._values: Dict[str, Optional[int]] = {name: None for name in self.ids}
+        self._time = -1
+        self._buffer: List[str] = []
+        self._header_written = False
+
+    @staticmethod
+    def _identifier(index: int) -> str:
+        # печатные символы ASCII 33..126, как принято в VCD
+        chars = []
+        index += 1
+        while index:
+            index, rem = divmod(index - 1, 94)
+            chars.append(chr(33 + rem))
+        return "".join(chars)
+
+    def header(self) -> str:
+        lines = [
+            f"$date {datetime.now(timezone.utc).isoformat()} $end",
+            "$version Smart Elevator FSM backend $end",
+            f"$timescale {VCD_TIMESCALE} $end",
+            f"$scope module {self.module_name} $end",
+        ]
+        for name, ident in self.ids.items():
+            kind = "wire" if self.widths[name] == 1 else "reg"
+            lines.append(f"$var {kind} {self.widths[name]} {ident} {name} $end")
+        lines.append("$upscope $end")
+        lines.append("$enddefinitions $end")
+        return "\n".join(lines) + "\n"
+
+    def _set(self, time: float, name: str, value: Optional[int]) -> None:
+        if self._values[name] == value:
+            return
+        ticks = max(int(round(time * _TICKS_PER_UNIT)), self._time)
+        if ticks != self._time:
+            self._buffer.append(f"#{ticks}\n")
+            self._time = ticks
+        self._values[name] = value
+        self._buffer.append(self._format(name, value))
+
+    def _format(self, name: str, value: Optional[int]) -> str:
+        ident = self.ids[name]
+        width = self.widths[name]
+        if width == 1:
+            return f"{'x' if value is None else value}{ident}\n"
+        if value is None:
+            return f"bx {ident}\n"
+        return f"b{value:b} {ident}\n"
+
+    def on_event(self, ev: ScenarioEvent) -> None:
+        context: Dict[str, object] = {
+            "floor": ev.floor,
+            "direction": ev.direction.value,
+            "event_type": ev.type.value,
+        }
+        for sig in RTL_SIGNALS:
+            self._set(ev.time, sig, int(_is_condition_satisfied(sig, context)))
+
+    def on_state(
+        self,
+        time: float,
+        floor: int,
+        state_id: str,
+        doors_open: bool,
+        direction: Direction,
+    ) -> None:
+        values = {
+            "state": self.codes.get(state_id),
+            "floor": floor,
+            "doors_open": int(doors_open),
+            "direction": DIRECTION_CODES[direction],
+        }
+        if not self._header_written:
+            # начальные значения всех переменных
+            self._time = max(int(round(time * _TICKS_PER_UNIT)), 0)
+            self._buffer.append(f"#{self._time}\n$dumpvars\n")
+            values.update((sig, 0) for sig in RTL_SIGNALS)
+            for name, value in values.items():
+                self._values[name] = value
+                self._buffer.append(self._format(name, value))
+            self._buffer.append("$end\n")
+            self._header_written = True
+            return
+        for name, value in values.items():
+            self._set(time, name, value)
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buffer)
+
+    def drain(self) -> str:
+        text = "".join(self._buffer)
+        self._buffer.clear()
+        return text
+
+
+def stream_simulation_vcd(
+    request: SimulationRequest,
+    module_name: str = "elevator_fsm",
+    encoding: StateEncoding = StateEncoding.BINARY,
+    flush_every: int = 4096,
+) -> Iterator[str]:
+    """
+    Прогоняет симуляцию и отдаёт VCD по кусочкам: буфер сбрасывается
+    каждые flush_every записей, таймлайн не строится.
+    Ошибка симуляции посреди прогона (ответ уже начат) записывается
+    в дамп комментарием, и дамп на этом заканчивается.
+    """
+    _validate_or_raise(request.fsm)
+    writer = VCDWriter(request.fsm, request.config.floors, module_name, encoding)
+    engine = _SimulationEngine(request.fsm, request.config, record_timeline=False, listener=writer)
+
+    yield writer.header()
+    for ev in _ordered_events(request.scenario.events):
+        try:
+            engine.step(ev)
+        except SimulationValidationError as exc:
+            details = "; ".join(str(err.get("detail", err)) for err in exc.errors)
+            yield writer.drain()
+            yield f"$comment {exc.message}: {details} $end\n"
+            return
+        if writer.buffered >= flush_every:
+            yield writer.drain()
+    yield writer.drain()
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Optional
+
+
+def content_hash(value: Any) -> str:
+    """
+    Стабильный хэш JSON-совместимого значения (порядок ключей не важен).
+    """
+    payload = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def make_etag(*parts: Any) -> str:
+    """Сильный ETag (в кавычках) по набору частей."""
+    digest = hashlib.sha256("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Проверка заголовка If-None-Match (список тегов, '*', слабые W/-теги).
+    """
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    if "*" in candidates:
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    return any((tag[2:] if tag.startswith("W/") else tag) == bare for tag in candidates)
+
+
+def etag_matches_strong(if_match: Optional[str], etag: str) -> bool:
+    """
+    Проверка заголовка If-Match (RFC 9110): сильное сравнение — слабый
+    W/-тег не совпадает ни с чем; '*' — ресурс существует.
+    """
+    if not if_match:
+        return False
+    candidates = [tag.strip() for tag in if_match.split(",")]
+    if "*" in candidates:
+        return True
+    if etag.startswith("W/"):
+        return False
+    return etag in candidates
@@ -0,0 +1,93 @@
+"""
+Нагрузочное сравнение доступа к БД: sync-сессии в threadpool против async (asyncpg).
+
+Каждый «запрос» берёт соединение из пула, выполняет SELECT pg_sleep(...)
+(имитация медленного запроса / сетевой задержки) и короткий SELECT по projects.
+Sync-вариант ограничен числом потоков (как threadpool FastAPI/anyio, 40 по
+умолчанию), async — только размером пула соединений.
+
+Запуск из backend/ против локального Postgres (настройки из .env / Settings):
+
+    PYTHONPATH=. python scripts/bench_db_pool.py --requests 2000 --concurrency 200 --sleep-ms 20
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, SessionLocal, async_engine, engine
+
+_QUERY_SLEEP = text("SELECT pg_sleep(:seconds)")
+_QUERY_PROJECT = text("SELECT id, name FROM projects ORDER BY id LIMIT 1")
+
+
+def _sync_request(sleep: float) -> float:
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        db.execute(_QUERY_SLEEP, {"seconds": sleep})
+        db.execute(_QUERY_PROJECT).first()
+    return time.perf_counter() - started
+
+
+async def _async_request(sleep: float, limit: asyncio.Semaphore) -> float:
+    async with limit:
+        started = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            await db.execute(_QUERY_SLEEP, {"seconds": sleep})
+            (await db.execute(_QUERY_PROJECT)).first()
+        return time.perf_counter() - started
+
+
+def _report(name: str, latencies: List[float], elapsed: float) -> None:
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{name:<6} {len(latencies) / elapsed:9.1f} req/s  "
+        f"p50 {statistics.median(latencies) * 1000:8.1f} ms  "
+        f"p99 {p99 * 1000:8.1f} ms  "
+        f"total {elapsed:6.2f} s"
+    )
+
+
+def bench_sync(requests: int, threads: int, sleep: float) -> None:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = list(pool.map(_sync_request, [sleep] * requests))
+    _report("sync", latencies, time.perf_counter() - started)
+    engine.dispose()
+
+
+async def bench_async(requests: int, concurrency: int, sleep: float) -> None:
+    limit = asyncio.Semaphore(concurrency)
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(_async_request(sleep, limit) for _ in range(requests)))
+    _report("async", list(latencies), time.perf_counter() - started)
+    await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200, help="одновременных запросов (async)")
+    parser.add_argument("--threads", type=int, default=40, help="размер threadpool для sync")
+    parser.add_argument("--sleep-ms", type=float, default=20.0, help="задержка pg_sleep в каждом запросе")
+    args = parser.parse_args()
+
+    sleep = args.sleep_ms / 1000
+    print(
+        f"pool_size={settings.DB_POOL_SIZE} max_overflow={settings.DB_MAX_OVERFLOW} "
+        f"requests={args.requests} sleep={args.sleep_ms} ms"
+    )
+    bench_sync(args.requests, args.threads, sleep)
+    asyncio.run(bench_async(args.requests, args.concurrency, sleep))
+
+
+if __name__ == "__main__":
+    main()
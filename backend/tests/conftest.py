@@ -0,0 +1,184 @@
+# tests/conftest.py
+"""
+Общие данные для тестов: эталонный проект, генератор случайных FSM и
+сценариев для дифференциальных проверок (два движка / две версии автомата
+должны давать одинаковый результат) и тестовая БД на SQLite для эндпоинтов.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
+
+from app import models, schemas
+from app.core.deps import get_current_user
+from app.db.base import Base
+from app.db.session import get_async_db
+
+SAMPLE_PROJECT = Path(__file__).resolve().parents[2] / "sample_fsm_project.json"
+DATA_DIR = Path(__file__).resolve().parent / "data"
+
+EVENT_TYPES = ["call", "cabin", "timer", "sensor"]
+CONDITIONS = [
+    "", "*", "always", "call_received", "arrived_at_floor", "door_timer_expired",
+    "tick", "obstacle_detected", "floor", "direction", "call",
+]
+STATE_IDS = ["IDLE_CLOSED", "MOVING_UP", "MOVING_DOWN", "DOOR_OPENING", "DOOR_OPEN", "DOOR_CLOSING", "doors_open", "X1"]
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_on_sqlite(type_, compiler, **kw):
+    # тестовая БД — SQLite: jsonb хранится как JSON, индексы Postgres не создаются
+    return "JSON"
+
+
+def random_fsm(rng: random.Random) -> Dict[str, Any]:
+    """FSM со служебными id состояний (их семантику знает симуляция) и случайными переходами."""
+    ids = STATE_IDS[: rng.randint(1, len(STATE_IDS))]
+    states = [{"id": sid, "name": sid, "is_initial": idx == 0} for idx, sid in enumerate(ids)]
+    transitions = [
+        {
+            "id": f"t{k}",
+            "from_state_id": rng.choice(ids),
+            "to_state_id": rng.choice(ids),
+            "condition": rng.choice(CONDITIONS),
+            "event_type": rng.choice(EVENT_TYPES + [None]),
+        }
+        for k in range(rng.randint(0, 14))
+    ]
+    return {"type": "mealy", "states": states, "transitions": transitions}
+
+
+def random_scenario(rng: random.Random, floors: int) -> Dict[str, Any]:
+    time = 0
+    events = []
+    for _ in range(rng.randint(0, 30)):
+        time += rng.choice([0, 0, 1, 3, 7]) if rng.random() < 0.9 else -2
+        events.append({
+            "time": max(time, 0),
+            "floor": rng.randint(0, floors),
+            "direction": rng.choice(["up", "down", "none"]),
+            "type": rng.choice(EVENT_TYPES),
+        })
+    return {"name": "random", "events": events}
+
+
+@pytest.fixture(scope="session")
+def sample_config() -> schemas.ProjectConfig:
+    return schemas.ProjectConfig.model_validate(json.loads(SAMPLE_PROJECT.read_text(encoding="utf-8"))["config"])
+
+
+@pytest.fixture
+def simulation_requests(sample_config) -> Callable[[int, int], list]:
+    """
+    Фабрика: n случайных SimulationRequest (каждый третий — с FSM эталонного
+    проекта), детерминированно по seed.
+    """
+
+    def make(seed: int, n: int) -> list:
+        rng = random.Random(seed)
+        requests = []
+        for i in range(n):
+            fsm = sample_config.fsm.model_dump() if i % 3 == 0 else random_fsm(rng)
+            elevator = {
+                "floors": rng.randint(1, 12),
+                "door_time": rng.choice([1, 2.5, 4, 0.3]),
+                "move_time": rng.choice([1, 1.5, 2, 0.7]),
+                "capacity": 8,
+            }
+            requests.append(schemas.SimulationRequest(
+                project_id=1,
+                config=elevator,
+                fsm=fsm,
+                scenario=schemas.Scenario.model_validate(random_scenario(rng, elevator["floors"])),
+            ))
+        return requests
+
+    return make
+
+
+@pytest.fixture
+def db_engine(tmp_path):
+    """
+    Асинхронный движок SQLite (aiosqlite) со схемой приложения — для
+    эндпоинтов без специфичного для Postgres SQL.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'app.db'}")
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _now(dbapi_connection, record):
+        dbapi_connection.create_function("now", 0, lambda: datetime.now(timezone.utc).isoformat(" "))
+
+    async def create():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create())
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def seed(db_engine) -> Callable[..., list]:
+    """Сохранить ORM-объекты в тестовую БД; возвращает их (detached, с id)."""
+    sessions = async_sessionmaker(db_engine, expire_on_commit=False)
+
+    def add(*objects):
+        async def run():
+            async with sessions() as db:
+                db.add_all(objects)
+                await db.commit()
+
+        asyncio.run(run())
+        return list(objects)
+
+    return add
+
+
+@pytest.fixture
+def api_client(db_engine) -> Callable[..., TestClient]:
+    """
+    Фабрика TestClient: один роутер, БД — db_engine, текущий пользователь
+    подменяется (без токенов и кэша авторизации).
+    """
+    sessions = async_sessionmaker(db_engine, autoflush=False, expire_on_commit=False)
+    clients = []
+
+    async def get_db():
+        async with sessions() as db:
+            yield db
+
+    def make(router, prefix: str, user: models.User) -> TestClient:
+        app = FastAPI()
+        app.include_router(router, prefix=prefix)
+        app.dependency_overrides[get_async_db] = get_db
+        app.dependency_overrides[get_current_user] = lambda: user
+        client = TestClient(app)
+        clients.append(client)
+        return client
+
+    yield make
+    for client in clients:
+        client.close()
+
+
+def make_user(user_id: int, role: str = "student") -> models.User:
+    return models.User(
+        id=user_id,
+        email=f"user{user_id}@example.com",
+        hashed_password="x",
+        full_name=f"User {user_id}",
+        role=models.UserRole[role],
+        is_active=True,
+    )
@@ -0,0 +1,75 @@
+// Auto-generated by Smart Elevator FSM backend.
+// States: idle, moving_up, doors_open, service, halt
+
+module mixed_fsm (
+    input  wire        clk,
+    input  wire        rst,
+    input  wire        arrived_at_floor,
+    input  wire        call_received,
+    input  wire        door_timer_expired,
+    input  wire        obstacle_detected,
+    output reg [2:0]  state
+);
+
+  // state encoding
+  localparam
+    IDLE         = 3'd0,
+    MOVING_UP    = 3'd1,
+    DOORS_OPEN   = 3'd2,
+    SERVICE      = 3'd3,
+    HALT         = 3'd4;
+
+  reg [2:0] curr_state;
+  reg [2:0] next_state;
+
+  always @(posedge clk or posedge rst) begin
+    if (rst)
+      curr_state <= IDLE;
+    else
+      curr_state <= next_state;
+  end
+
+  always @(*) begin
+    next_state = curr_state;
+    case (curr_state)
+    IDLE: begin
+      if (call_received) begin
+        next_state = MOVING_UP;
+      end
+      else if (1'b1) begin
+        next_state = SERVICE;
+      end
+    end
+    MOVING_UP: begin
+      if (arrived_at_floor) begin
+        next_state = DOORS_OPEN;
+      end
+    end
+    DOORS_OPEN: begin
+      if (door_timer_expired) begin
+        next_state = IDLE;
+      end
+      else if (obstacle_detected) begin
+        next_state = DOORS_OPEN;
+      end
+    end
+    SERVICE: begin
+      if (1'b1) begin
+        next_state = HALT;
+      end
+      else if (1'b1) begin
+        next_state = IDLE;
+      end
+    end
+    HALT: begin
+      // no transitions
+    end
+      default: next_state = IDLE;
+    endcase
+  end
+
+  always @(*) begin
+    state = curr_state;
+  end
+
+endmodule
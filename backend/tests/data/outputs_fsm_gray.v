@@ -0,0 +1,86 @@
+// Auto-generated by Smart Elevator FSM backend.
+// States: IDLE_CLOSED, MOVING_UP, MOVING_DOWN, DOOR_OPEN
+// Encoding: gray
+
+module outputs_fsm (
+    input  wire        clk,
+    input  wire        rst,
+    input  wire        arrived_at_floor,
+    input  wire        call_received,
+    input  wire        door_timer_expired,
+    output reg [1:0]  state,
+    output reg        door,
+    output reg [1:0]  motor,
+    output reg        chime,
+    output reg [2:0]  level
+);
+
+  // state encoding
+  localparam
+    IDLE_CLOSED  = 2'b00,
+    MOVING_UP    = 2'b01,
+    MOVING_DOWN  = 2'b11,
+    DOOR_OPEN    = 2'b10;
+
+  reg [1:0] curr_state;
+  reg [1:0] next_state;
+
+  always @(posedge clk or posedge rst) begin
+    if (rst)
+      curr_state <= IDLE_CLOSED;
+    else
+      curr_state <= next_state;
+  end
+
+  always @(*) begin
+    next_state = curr_state;
+    door = 1'd0;
+    motor = 2'd0;
+    chime = 1'd0;
+    level = 3'd0;
+    case (curr_state)
+    IDLE_CLOSED: begin
+      door = 1'd0;
+      motor = 2'd0;
+      if (call_received) begin
+        next_state = MOVING_UP;
+        chime = 1'd1;
+        level = 3'd5;
+      end
+      else if (1'b1) begin
+        next_state = MOVING_DOWN;
+        chime = 1'd0;
+      end
+    end
+    MOVING_UP: begin
+      door = 1'd0;
+      motor = 2'd1;
+      if (arrived_at_floor) begin
+        next_state = DOOR_OPEN;
+        level = 3'd0;
+      end
+    end
+    MOVING_DOWN: begin
+      door = 1'd0;
+      motor = 2'd2;
+      if (arrived_at_floor) begin
+        next_state = DOOR_OPEN;
+      end
+    end
+    DOOR_OPEN: begin
+      door = 1'd1;
+      motor = 2'd0;
+      if (door_timer_expired) begin
+        next_state = IDLE_CLOSED;
+        chime = 1'd1;
+      end
+    end
+      default: next_state = IDLE_CLOSED;
+    endcase
+  end
+
+  always @(*) begin
+    state = curr_state;
+  end
+
+endmodule
@@ -0,0 +1,86 @@
+// Auto-generated by Smart Elevator FSM backend.
+// States: IDLE_CLOSED, MOVING_UP, MOVING_DOWN, DOOR_OPEN
+// Encoding: one_hot
+
+module outputs_fsm (
+    input  wire        clk,
+    input  wire        rst,
+    input  wire        arrived_at_floor,
+    input  wire        call_received,
+    input  wire        door_timer_expired,
+    output reg [3:0]  state,
+    output reg        door,
+    output reg [1:0]  motor,
+    output reg        chime,
+    output reg [2:0]  level
+);
+
+  // state encoding (one-hot: bit index)
+  localparam
+    IDLE_CLOSED  = 0,
+    MOVING_UP    = 1,
+    MOVING_DOWN  = 2,
+    DOOR_OPEN    = 3;
+
+  reg [3:0] curr_state;
+  reg [3:0] next_state;
+
+  always @(posedge clk or posedge rst) begin
+    if (rst)
+      curr_state <= 4'd1 << IDLE_CLOSED;
+    else
+      curr_state <= next_state;
+  end
+
+  always @(*) begin
+    next_state = curr_state;
+    door = 1'd0;
+    motor = 2'd0;
+    chime = 1'd0;
+    level = 3'd0;
+    case (1'b1) // synopsys parallel_case
+    curr_state[IDLE_CLOSED]: begin
+      door = 1'd0;
+      motor = 2'd0;
+      if (call_received) begin
+        next_state = 4'd1 << MOVING_UP;
+        chime = 1'd1;
+        level = 3'd5;
+      end
+      else if (1'b1) begin
+        next_state = 4'd1 << MOVING_DOWN;
+        chime = 1'd0;
+      end
+    end
+    curr_state[MOVING_UP]: begin
+      door = 1'd0;
+      motor = 2'd1;
+      if (arrived_at_floor) begin
+        next_state = 4'd1 << DOOR_OPEN;
+        level = 3'd0;
+      end
+    end
+    curr_state[MOVING_DOWN]: begin
+      door = 1'd0;
+      motor = 2'd2;
+      if (arrived_at_floor) begin
+        next_state = 4'd1 << DOOR_OPEN;
+      end
+    end
+    curr_state[DOOR_OPEN]: begin
+      door = 1'd1;
+      motor = 2'd0;
+      if (door_timer_expired) begin
+        next_state = 4'd1 << IDLE_CLOSED;
+        chime = 1'd1;
+      end
+    end
+      default: next_state = 4'd1 << IDLE_CLOSED;
+    endcase
+  end
+
+  always @(*) begin
+    state = curr_state;
+  end
+
+endmodule
@@ -0,0 +1,76 @@
+// Auto-generated by Smart Elevator FSM backend.
+// States: IDLE_CLOSED, MOVING_UP, MOVING_DOWN, DOOR_OPENING, DOOR_OPEN, DOOR_CLOSING
+
+module elevator_fsm (
+    input  wire        clk,
+    input  wire        rst,
+    input  wire        arrived_at_floor,
+    input  wire        call_received,
+    input  wire        door_timer_expired,
+    output reg [2:0]  state
+);
+
+  // state encoding
+  localparam
+    IDLE_CLOSED  = 3'd0,
+    MOVING_UP    = 3'd1,
+    MOVING_DOWN  = 3'd2,
+    DOOR_OPENING = 3'd3,
+    DOOR_OPEN    = 3'd4,
+    DOOR_CLOSING = 3'd5;
+
+  reg [2:0] curr_state;
+  reg [2:0] next_state;
+
+  always @(posedge clk or posedge rst) begin
+    if (rst)
+      curr_state <= IDLE_CLOSED;
+    else
+      curr_state <= next_state;
+  end
+
+  always @(*) begin
+    next_state = curr_state;
+    case (curr_state)
+    IDLE_CLOSED: begin
+      if (call_received) begin
+        next_state = MOVING_UP;
+      end
+      else if (call_received) begin
+        next_state = MOVING_DOWN;
+      end
+    end
+    MOVING_UP: begin
+      if (arrived_at_floor) begin
+        next_state = DOOR_OPENING;
+      end
+    end
+    MOVING_DOWN: begin
+      if (arrived_at_floor) begin
+        next_state = DOOR_OPENING;
+      end
+    end
+    DOOR_OPENING: begin
+      if (1'b1) begin
+        next_state = DOOR_OPEN;
+      end
+    end
+    DOOR_OPEN: begin
+      if (door_timer_expired) begin
+        next_state = DOOR_CLOSING;
+      end
+    end
+    DOOR_CLOSING: begin
+      if (1'b1) begin
+        next_state = IDLE_CLOSED;
+      end
+    end
+      default: next_state = IDLE_CLOSED;
+    endcase
+  end
+
+  always @(*) begin
+    state = curr_state;
+  end
+
+endmodule
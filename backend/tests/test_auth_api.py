@@ -0,0 +1,161 @@
+# tests/test_auth_api.py
+"""
+Регистрация, вход и refresh-токены. Роутер работает с AsyncSession поверх
+aiosqlite (таблица users создаётся без расширений PostgreSQL).
+"""
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app import models
+from app.api.v1.endpoints import auth
+from app.core import security
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db.session import get_async_db
+
+PASSWORD = "correct horse"
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    # минимальный cost factor: тесты проверяют поток запросов, а не стойкость хеша
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 4)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'auth.db'}")
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _now(dbapi_connection, record):
+        dbapi_connection.create_function("now", 0, lambda: datetime.now(timezone.utc).isoformat())
+
+    async def create():
+        async with engine.begin() as conn:
+            await conn.run_sync(models.User.__table__.create)
+
+    asyncio.run(create())
+    return engine
+
+
+@pytest.fixture
+def client(engine):
+    sessions = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async def get_db():
+        async with sessions() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(auth.router, prefix="/auth")
+    app.dependency_overrides[get_async_db] = get_db
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def _register(client, email="a@example.com"):
+    return client.post("/auth/register", json={
+        "email": email, "full_name": "A", "role": "teacher", "password": PASSWORD, "is_active": True,
+    })
+
+
+def test_register_and_login(client):
+    created = _register(client)
+    assert created.status_code == 201
+    assert created.json()["role"] == "teacher"
+    assert _register(client).status_code == 400
+
+    response = client.post("/auth/login", json={"email": "a@example.com", "password": PASSWORD})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["user"]["email"] == "a@example.com"
+    assert security.decode_token(body["access_token"], security.ACCESS_TOKEN_TYPE)["sub"] == str(body["user"]["id"])
+    assert security.decode_token(body["refresh_token"], security.REFRESH_TOKEN_TYPE)["sub"] == str(body["user"]["id"])
+
+    wrong = client.post("/auth/login", json={"email": "a@example.com", "password": "nope"})
+    missing = client.post("/auth/login", json={"email": "b@example.com", "password": PASSWORD})
+    assert wrong.status_code == missing.status_code == 400
+
+
+def test_connection_is_released_during_bcrypt(client, engine, monkeypatch):
+    _register(client)
+    checked_out = []
+    verify = security.verify_password_async
+
+    async def spy(plain, hashed):
+        checked_out.append(engine.pool.checkedout())
+        return await verify(plain, hashed)
+
+    monkeypatch.setattr(auth, "verify_password_async", spy)
+    assert client.post("/auth/login", json={"email": "a@example.com", "password": PASSWORD}).status_code == 200
+    assert checked_out == [0]
+
+
+def test_login_rehashes_with_new_cost_factor(client, engine, monkeypatch):
+    _register(client)
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+    assert client.post("/auth/login", json={"email": "a@example.com", "password": PASSWORD}).status_code == 200
+
+    async def stored_hash():
+        async with engine.connect() as conn:
+            return await conn.scalar(select(models.User.hashed_password))
+
+    hashed = asyncio.run(stored_hash())
+    assert hashed.startswith("$2b$05$")
+    assert security.verify_password(PASSWORD, hashed)
+
+
+def test_refresh_token_flow(client, engine):
+    _register(client)
+    tokens = client.post("/auth/login", json={"email": "a@example.com", "password": PASSWORD}).json()
+
+    refreshed = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert refreshed.status_code == 200
+    assert security.decode_token(refreshed.json()["access_token"], security.ACCESS_TOKEN_TYPE)
+
+    # access-токен не обменивается
+    assert client.post("/auth/refresh", json={"refresh_token": tokens["access_token"]}).status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": "garbage"}).status_code == 401
+
+    async def deactivate():
+        async with engine.begin() as conn:
+            await conn.execute(update(models.User).values(is_active=False))
+
+    asyncio.run(deactivate())
+    assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+
+
+def test_refresh_token_does_not_authorize_requests():
+    refresh = security.create_refresh_token("1")
+    with pytest.raises(security.JWTError):
+        security.decode_token(refresh, security.ACCESS_TOKEN_TYPE)
+    assert security.decode_token(create_access_token("1"), security.ACCESS_TOKEN_TYPE)["sub"] == "1"
+
+
+def test_bcrypt_concurrency_is_bounded(monkeypatch):
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def slow_hash(password):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.02)
+        with lock:
+            active -= 1
+        return password
+
+    monkeypatch.setattr(security, "get_password_hash", slow_hash)
+
+    async def scenario():
+        return await asyncio.gather(*(security.get_password_hash_async(str(i)) for i in range(8)))
+
+    assert asyncio.run(scenario()) == [str(i) for i in range(8)]
+    assert security._bcrypt_pool._max_workers == max(1, settings.BCRYPT_WORKERS)
+    assert 1 <= peak <= security._bcrypt_pool._max_workers
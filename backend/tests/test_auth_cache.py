@@ -0,0 +1,158 @@
+# tests/test_auth_cache.py
+"""
+Кэш авторизации: get_current_user без SELECT для известного токена
+и инвалидация после COMMIT. События сессии проверяются на SQLite —
+таблица users в нём создаётся без расширений PostgreSQL.
+"""
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event, update
+from sqlalchemy.orm import Session
+
+from app import models
+from app.core import auth_cache
+from app.core.deps import get_current_user
+from app.core.security import create_access_token, create_refresh_token
+from app.models.project import UserRole
+from app.utils.cache import LRUCache
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch):
+    cache = LRUCache(maxsize=16, ttl=60)
+    monkeypatch.setattr(auth_cache, "_user_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+
+    @event.listens_for(engine, "connect")
+    def _now(dbapi_connection, record):
+        dbapi_connection.create_function("now", 0, lambda: NOW.isoformat())
+
+    models.User.__table__.create(engine)
+    with Session(engine) as db:
+        db.add_all([_user(1), _user(2)])
+        db.commit()
+    return engine
+
+
+def _user(user_id, **values):
+    values = {
+        "id": user_id,
+        "email": f"u{user_id}@example.com",
+        "hashed_password": "x",
+        "role": UserRole.student,
+        "is_active": True,
+        "created_at": NOW,
+        "updated_at": NOW,
+        **values,
+    }
+    return models.User(**values)
+
+
+def _cache_from_db(db, user_id, token):
+    auth_cache.cache_user(db.get(models.User, user_id), token, auth_cache.auth_cache_epoch())
+
+
+def test_cached_user_is_a_detached_copy():
+    auth_cache.cache_user(_user(1, role=UserRole.teacher), "t", auth_cache.auth_cache_epoch())
+    cached = auth_cache.get_cached_user(1, "t")
+    assert (cached.id, cached.email, cached.role) == (1, "u1@example.com", UserRole.teacher)
+    assert auth_cache.get_cached_user(1, "other") is None
+    assert auth_cache.get_cached_user(1, "t") is not cached
+
+
+def test_stale_reads_and_inactive_users_are_not_cached():
+    epoch = auth_cache.auth_cache_epoch()
+    auth_cache.invalidate_user(99)  # инвалидация во время чтения из БД
+    auth_cache.cache_user(_user(1), "t", epoch)
+    auth_cache.cache_user(_user(2, is_active=False), "t", auth_cache.auth_cache_epoch())
+    assert auth_cache.get_cached_user(1, "t") is None
+    assert auth_cache.get_cached_user(2, "t") is None
+
+
+def test_invalidation_waits_for_commit(engine):
+    with Session(engine) as db:
+        _cache_from_db(db, 1, "a")
+        _cache_from_db(db, 1, "b")
+        _cache_from_db(db, 2, "a")
+        db.get(models.User, 1).role = UserRole.admin
+        db.flush()
+        # до COMMIT другие запросы видят старую строку — кэш тоже
+        assert auth_cache.get_cached_user(1, "a") is not None
+        db.commit()
+    assert auth_cache.get_cached_user(1, "a") is None
+    assert auth_cache.get_cached_user(1, "b") is None
+    assert auth_cache.get_cached_user(2, "a") is not None
+
+
+def test_rollback_keeps_the_cache(engine):
+    with Session(engine) as db:
+        _cache_from_db(db, 1, "a")
+        db.get(models.User, 1).is_active = False
+        db.flush()
+        db.rollback()
+        db.commit()
+    assert auth_cache.get_cached_user(1, "a") is not None
+
+
+def test_bulk_update_clears_everything(engine):
+    with Session(engine) as db:
+        _cache_from_db(db, 1, "a")
+        _cache_from_db(db, 2, "a")
+        db.execute(update(models.User).where(models.User.id == 2).values(is_active=False))
+        db.commit()
+    assert len(auth_cache._user_cache) == 0
+
+
+class _FakeAsyncSession:
+    """AsyncSession для get_current_user: считает обращения к БД."""
+
+    def __init__(self, users):
+        self.users = users
+        self.gets = 0
+
+    async def get(self, model, user_id):
+        self.gets += 1
+        return self.users.get(user_id)
+
+    async def merge(self, obj, load=True):
+        assert load is False
+        return obj
+
+
+def test_current_user_hits_the_database_once():
+    db = _FakeAsyncSession({1: _user(1)})
+    token = create_access_token("1")
+
+    async def scenario():
+        first = await get_current_user(token, db)
+        second = await get_current_user(token, db)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert db.gets == 1
+    assert second.id == first.id == 1
+    auth_cache.invalidate_user(1)
+    asyncio.run(get_current_user(token, db))
+    assert db.gets == 2
+
+
+@pytest.mark.parametrize("token, users", [
+    ("not-a-jwt", {1: _user(1)}),
+    (create_refresh_token("1"), {1: _user(1)}),
+    (create_access_token("1"), {}),
+    (create_access_token("1"), {1: _user(1, is_active=False)}),
+])
+def test_current_user_rejects(token, users):
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(get_current_user(token, _FakeAsyncSession(users)))
+    assert exc.value.status_code == 401
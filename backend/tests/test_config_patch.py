@@ -0,0 +1,127 @@
+# tests/test_config_patch.py
+"""
+Разбор JSON Patch / merge-patch в шаги и их предусловия. Сам UPDATE
+(jsonb_set / #-) выполняется в PostgreSQL; здесь проверяется, какие шаги
+и условия в него попадают.
+"""
+import pytest
+from sqlalchemy import column
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.schemas.project import JsonPatchOperation
+from app.services.config_patch import (
+    ConfigPatchError,
+    PatchStep,
+    _step_sql,
+    build_patch_statements,
+    describe_step,
+    json_patch_steps,
+    merge_patch_steps,
+    parse_pointer,
+)
+from app.utils.etag import etag_matches, etag_matches_strong, make_etag
+
+
+def _ops(*ops):
+    return [JsonPatchOperation.model_validate(op) for op in ops]
+
+
+def _sql(clause) -> str:
+    return str(clause.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_pointer_unescapes_tokens():
+    assert parse_pointer("") == ()
+    assert parse_pointer("/fsm/states/0/a~1b~0c") == ("fsm", "states", "0", "a/b~c")
+    with pytest.raises(ConfigPatchError):
+        parse_pointer("fsm")
+
+
+def test_merge_patch_steps():
+    steps = merge_patch_steps({"default_scenario": None, "elevator": {"floors": 12, "ghost": None}})
+    assert steps == [
+        PatchStep("delete", ("default_scenario",)),
+        PatchStep("ensure_object", ("elevator",)),
+        PatchStep("set", ("elevator", "floors"), 12),
+        PatchStep("delete", ("elevator", "ghost")),
+    ]
+
+
+def test_merge_patch_delete_has_no_precondition():
+    # RFC 7396: null для отсутствующего ключа — не ошибка
+    doc = column("d", JSONB)
+    new_doc, condition = _step_sql(doc, PatchStep("delete", ("nope",)))
+    assert _sql(condition) == "true"
+    assert "#-" in _sql(new_doc)
+    # а remove из JSON Patch требует, чтобы путь существовал
+    _, condition = _step_sql(doc, json_patch_steps(_ops({"op": "remove", "path": "/nope"}))[0])
+    assert "IS NOT NULL" in _sql(condition)
+
+
+@pytest.mark.parametrize("patch", [
+    {"fsm": None},
+    {"elevator": {"floors": None}},
+    {"elevator": {"floors": "many"}},
+    {"fsm": {"states": [{"id": "x"}]}},
+])
+def test_merge_patch_rejects_invalid_values(patch):
+    with pytest.raises(ConfigPatchError):
+        merge_patch_steps(patch)
+
+
+def test_json_patch_steps():
+    steps = json_patch_steps(_ops(
+        {"op": "test", "path": "/elevator/floors", "value": 10},
+        {"op": "replace", "path": "/elevator/floors", "value": 12},
+        {"op": "add", "path": "/fsm/states/-", "value": {"id": "X", "name": "X"}},
+        {"op": "copy", "from": "/fsm/states/0", "path": "/fsm/states/-"},
+        {"op": "move", "from": "/default_scenario", "path": "/extra"},
+        {"op": "remove", "path": "/fsm/states/1"},
+    ))
+    assert [describe_step(step) for step in steps] == [
+        "test /elevator/floors",
+        "replace /elevator/floors",
+        "add /fsm/states/-",
+        "copy /fsm/states/0 -> /fsm/states/-",
+        "move /default_scenario -> /extra",
+        "remove /fsm/states/1",
+    ]
+
+
+@pytest.mark.parametrize("op", [
+    {"op": "add", "path": "/elevator/floors"},
+    {"op": "replace", "path": "/elevator/floors", "value": -1},
+    {"op": "remove", "path": "/fsm"},
+    {"op": "remove", "path": ""},
+    {"op": "move", "from": "/fsm", "path": "/fsm/states/0"},
+    {"op": "copy", "from": "/elevator", "path": "/fsm"},
+    {"op": "copy", "path": "/fsm"},
+])
+def test_json_patch_rejects_invalid_operations(op):
+    with pytest.raises(ConfigPatchError):
+        json_patch_steps(_ops(op))
+
+
+def test_statement_reports_first_failed_step():
+    steps = merge_patch_steps({"elevator": {"floors": 3}})
+    update_stmt, failed_stmt = build_patch_statements(1, steps)
+    where = lambda stmt: str(stmt.compile(dialect=postgresql.dialect())).rsplit("WHERE", 1)[1]
+    assert "jsonb_set" in str(update_stmt.compile(dialect=postgresql.dialect()))
+    assert "projects.updated_at =" not in where(update_stmt)
+    pinned, _ = build_patch_statements(1, steps, expected_updated_at="2026-01-01")
+    assert "projects.updated_at =" in where(pinned)
+    assert failed_stmt is not None
+
+
+def test_if_match_uses_strong_comparison():
+    etag = make_etag("project", 1)
+    assert etag_matches_strong(etag, etag)
+    assert etag_matches_strong(f'"other", {etag}', etag)
+    assert etag_matches_strong("*", etag)
+    assert not etag_matches_strong(f"W/{etag}", etag)
+    assert not etag_matches_strong(None, etag)
+    assert not etag_matches_strong('"other"', etag)
+    assert not etag_matches_strong(etag, f"W/{etag}")
+    # If-None-Match сравнивает слабо
+    assert etag_matches(f"W/{etag}", etag)
@@ -0,0 +1,117 @@
+# tests/test_cosimulation.py
+import pytest
+
+from app import schemas
+from app.schemas.fsm import StateEncoding
+from app.services.cosimulation import VCDParseError, VCDReader, cosimulate, cosimulate_path
+from app.services.fsm_verilog import state_encoding
+from app.services.simulation import simulate
+from app.services.vcd import stream_simulation_vcd
+
+
+@pytest.fixture
+def request_(sample_config):
+    return schemas.SimulationRequest(
+        project_id=1,
+        config=sample_config.elevator,
+        fsm=sample_config.fsm,
+        scenario=sample_config.default_scenario,
+    )
+
+
+def _simulated(request):
+    states = []
+    for item in simulate(request).timeline:
+        if not states or states[-1] != item.state_id:
+            states.append(item.state_id)
+    return states
+
+
+def _rtl_vcd(path, values, newline="\n"):
+    """
+    VCD «внешнего» прогона: state в tb.dut, рядом шум — сигнал, чей id
+    оканчивается на id state, и clk, меняющийся каждый такт.
+    """
+    lines = [
+        "$timescale 1ns $end",
+        "$scope module tb $end",
+        "$var wire 1 !# clk $end",
+        "$scope module dut $end",
+        "$var reg 3 # state $end",
+        "$var reg 3 ## other $end",
+        "$upscope $end",
+        "$upscope $end",
+        "$enddefinitions $end",
+    ]
+    for t, value in enumerate(values):
+        lines += [f"#{t * 10}", f"{t % 2}!#", f"b{value} #", "b111 ##"]
+    path.write_bytes(newline.join(lines).encode())
+    return path
+
+
+def _binary(request, state_ids):
+    codes = state_encoding(request.fsm, StateEncoding.BINARY)
+    return [format(codes[sid], "b") for sid in state_ids]
+
+
+@pytest.mark.parametrize("encoding", list(StateEncoding))
+def test_own_vcd_is_equivalent(tmp_path, request_, encoding):
+    path = tmp_path / "run.vcd"
+    path.write_text("".join(stream_simulation_vcd(request_, "lift", encoding)), encoding="utf-8")
+    result = cosimulate_path(str(path), request_, "state", encoding)
+    simulated = _simulated(request_)
+    assert result.equivalent
+    assert result.signal == "lift.state"
+    assert result.rtl_changes == result.simulation_changes == result.matched_prefix == len(simulated)
+    assert result.rtl_visits == result.simulation_visits
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_external_vcd_with_noise_signals(tmp_path, request_, newline):
+    simulated = _simulated(request_)
+    path = _rtl_vcd(tmp_path / "rtl.vcd", _binary(request_, simulated), newline)
+    with open(path, "rb") as file:
+        result = cosimulate(file, request_, state_signal="dut.state")
+    assert result.equivalent
+    assert result.signal == "tb.dut.state"
+    assert result.timescale == "1ns"
+    assert result.rtl_changes == len(simulated)
+
+
+def test_first_divergence_is_reported(tmp_path, request_):
+    simulated = _simulated(request_)
+    rtl = list(simulated)
+    rtl[3] = next(sid for sid in ("MOVING_DOWN", "MOVING_UP") if sid not in (rtl[2], rtl[4]))
+    values = _binary(request_, rtl)
+    values.insert(1, "x")
+    path = _rtl_vcd(tmp_path / "rtl.vcd", values)
+    with open(path, "rb") as file:
+        result = cosimulate(file, request_)
+    assert not result.equivalent
+    assert result.unknown_values == 1
+    assert result.matched_prefix == 3
+    assert result.mismatched_positions == 1
+    divergence = result.first_divergence
+    assert (divergence.index, divergence.rtl_time, divergence.rtl_state_id) == (3, 40, rtl[3])
+    assert divergence.simulation_state_id == simulated[3]
+
+
+def test_rtl_ending_early_diverges(tmp_path, request_):
+    simulated = _simulated(request_)
+    path = _rtl_vcd(tmp_path / "rtl.vcd", _binary(request_, simulated[:4]))
+    with open(path, "rb") as file:
+        result = cosimulate(file, request_)
+    assert not result.equivalent
+    assert result.first_divergence.index == 4
+    assert result.first_divergence.rtl_state_id is None
+    assert result.mismatched_positions == len(simulated) - 4
+
+
+def test_reader_errors(tmp_path, request_):
+    path = tmp_path / "bad.vcd"
+    path.write_bytes(b"$scope module tb $end\n$var reg 3 # state $end\n")
+    with open(path, "rb") as file, pytest.raises(VCDParseError):
+        VCDReader(file)
+    path = _rtl_vcd(tmp_path / "rtl.vcd", ["0"])
+    with open(path, "rb") as file, pytest.raises(VCDParseError):
+        cosimulate(file, request_, state_signal="missing")
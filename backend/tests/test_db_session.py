@@ -0,0 +1,77 @@
+# tests/test_db_session.py
+"""
+Настройка движков и зависимостей БД. Соединения не открываются: пул
+и сессии SQLAlchemy создаются лениво.
+"""
+import asyncio
+import inspect
+
+import pytest
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.v1.endpoints import auth, projects, users
+from app.core.config import Settings, settings
+from app.db import session
+
+
+@pytest.mark.parametrize("url, expected", [
+    (None, "postgresql+asyncpg://u:p%40ss@db:6543/lift"),
+    ("postgresql://u:p%40ss@db:6543/lift", "postgresql+asyncpg://u:p%40ss@db:6543/lift"),
+    ("postgresql+psycopg2://u:p%40ss@db:6543/lift?sslmode=require", "postgresql+asyncpg://u:p%40ss@db:6543/lift?sslmode=require"),
+])
+def test_async_uri_keeps_the_address(url, expected):
+    config = Settings(
+        DATABASE_URL=url,
+        POSTGRES_USER="u",
+        POSTGRES_PASSWORD="p@ss",
+        POSTGRES_SERVER="db",
+        POSTGRES_PORT=6543,
+        POSTGRES_DB="lift",
+    )
+    assert config.SQLALCHEMY_ASYNC_DATABASE_URI == expected
+    assert make_url(config.SQLALCHEMY_DATABASE_URI).password == "p@ss"
+
+
+@pytest.mark.parametrize("engine", [session.engine, session.async_engine.sync_engine])
+def test_engines_share_pool_settings(engine):
+    pool = engine.pool
+    assert pool.size() == settings.DB_POOL_SIZE
+    assert pool._max_overflow == settings.DB_MAX_OVERFLOW
+    assert pool._timeout == settings.DB_POOL_TIMEOUT
+    assert pool._recycle == settings.DB_POOL_RECYCLE
+    assert pool._pre_ping == settings.DB_POOL_PRE_PING
+
+
+def test_statement_timeout_is_set_on_connect():
+    timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+    assert session._sync_connect_args["options"] == f"-c statement_timeout={timeout}"
+    assert session._async_connect_args["server_settings"] == {"statement_timeout": timeout}
+    assert session.async_engine.dialect.driver == "asyncpg"
+
+
+def test_get_async_db_closes_the_session(monkeypatch):
+    closed = []
+    monkeypatch.setattr(AsyncSession, "close", lambda self: closed.append(self) or asyncio.sleep(0))
+
+    async def scenario():
+        dependency = session.get_async_db()
+        db = await anext(dependency)
+        assert isinstance(db, AsyncSession)
+        assert db.sync_session.expire_on_commit is False
+        with pytest.raises(StopAsyncIteration):
+            await anext(dependency)
+        return db
+
+    db = asyncio.run(scenario())
+    assert closed == [db]
+
+
+@pytest.mark.parametrize("module", [auth, projects, users])
+def test_database_routes_are_async(module):
+    # эндпоинт с AsyncSession не должен уходить в threadpool
+    for route in module.router.routes:
+        dependencies = [dep.call for dep in route.dependant.dependencies]
+        if session.get_async_db in dependencies:
+            assert inspect.iscoroutinefunction(route.endpoint), route.path
+        assert session.get_db not in dependencies, route.path
@@ -0,0 +1,118 @@
+# tests/test_fsm_codegen.py
+import ast
+import builtins
+
+import pytest
+
+from app import schemas
+from app.services.fsm_codegen import compile_simulation, generate_simulation_source, simulate_compiled
+from app.services.fsm_validation import DOOR_OPEN_STATES
+from app.services.simulation import SimulationValidationError, simulate
+
+MODES = [{}, {"metrics_only": True}, {"minimize": True}]
+
+
+def _run(fn, request, **kwargs):
+    try:
+        return fn(request, **kwargs).model_dump()
+    except Exception as exc:  # ошибки (небезопасный переход и т.п.) тоже должны совпадать
+        return type(exc).__name__, str(getattr(exc, "errors", exc))
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("kwargs", MODES, ids=["timeline", "metrics_only", "minimize"])
+def test_compiled_simulation_matches_interpreter(simulation_requests, seed, kwargs):
+    for request in simulation_requests(seed, 80):
+        assert _run(simulate_compiled, request, **kwargs) == _run(simulate, request, **kwargs)
+
+
+@pytest.mark.parametrize("open_state", sorted(DOOR_OPEN_STATES))
+@pytest.mark.parametrize("kwargs", MODES, ids=["timeline", "metrics_only", "minimize"])
+def test_unsafe_transition_fails_the_same_way(open_state, kwargs):
+    request = schemas.SimulationRequest(
+        project_id=1,
+        config={"floors": 5, "door_time": 2, "move_time": 1, "capacity": 8},
+        fsm={
+            "type": "mealy",
+            "states": [
+                {"id": "idle", "name": "idle", "is_initial": True},
+                {"id": open_state, "name": open_state},
+                {"id": "moving_up", "name": "moving_up"},
+            ],
+            "transitions": [
+                {"id": "t1", "from_state_id": "idle", "to_state_id": open_state, "condition": "*", "event_type": "call"},
+                {"id": "t2", "from_state_id": open_state, "to_state_id": "moving_up", "condition": "*", "event_type": "timer"},
+            ],
+        },
+        scenario={"name": "unsafe", "events": [
+            {"time": 0, "floor": 2, "direction": "up", "type": "call"},
+            {"time": 3, "floor": 2, "direction": "none", "type": "timer"},
+        ]},
+    )
+    with pytest.raises(SimulationValidationError) as expected:
+        simulate(request, **kwargs)
+    with pytest.raises(SimulationValidationError) as actual:
+        simulate_compiled(request, **kwargs)
+    assert actual.value.errors == expected.value.errors
+    assert actual.value.errors[0]["transition_id"] == "t2"
+
+
+def test_compiled_program_is_cached(sample_config):
+    first = compile_simulation(sample_config.fsm)
+    assert compile_simulation(sample_config.fsm.model_copy(deep=True)) is first
+    assert first.source == generate_simulation_source(sample_config.fsm)
+    compile(first.source, "<test>", "exec")
+
+
+HOSTILE = [
+    "IDLE\nimport builtins; builtins.INJECTED = 1\n#",
+    "x\rimport builtins; builtins.INJECTED = 2\r#",
+    "q'''\"\"\"\\\nimport builtins; builtins.INJECTED = 3\n",
+    "}{\x00 import builtins; builtins.INJECTED = 4",
+]
+
+
+def _hostile_request(open_state: str = "doors_open") -> schemas.SimulationRequest:
+    """FSM, где враждебные строки — id и имена состояний, id переходов и условия."""
+    states = [{"id": sid, "name": sid, "is_initial": idx == 0} for idx, sid in enumerate(HOSTILE)]
+    states += [{"id": open_state, "name": HOSTILE[0]}, {"id": "moving_up", "name": HOSTILE[1]}]
+    # переходы с враждебными условиями не срабатывают, но проходят через генератор
+    transitions = [
+        {"id": f"c{idx}", "from_state_id": sid, "to_state_id": HOSTILE[0], "condition": sid, "event_type": "call"}
+        for idx, sid in enumerate(HOSTILE)
+    ]
+    transitions += [
+        {"id": HOSTILE[idx], "from_state_id": src, "to_state_id": dst, "condition": "*", "event_type": event}
+        for idx, (src, dst, event) in enumerate([
+            (HOSTILE[0], HOSTILE[1], "call"),
+            (HOSTILE[1], HOSTILE[2], None),
+            (HOSTILE[2], open_state, "sensor"),
+            (open_state, "moving_up", "timer"),
+        ])
+    ]
+    transitions.append({"id": "back", "from_state_id": HOSTILE[2], "to_state_id": HOSTILE[3], "condition": "*"})
+    return schemas.SimulationRequest(
+        project_id=1,
+        config={"floors": 5, "door_time": 2, "move_time": 1, "capacity": 8},
+        fsm={"type": "mealy", "states": states, "transitions": transitions},
+        scenario={"name": HOSTILE[0], "events": [
+            {"time": t, "floor": t % 4, "direction": "up", "type": event}
+            for t, event in enumerate(["call", "cabin", "sensor", "timer"])
+        ]},
+    )
+
+
+def test_hostile_ids_never_become_code():
+    request = _hostile_request()
+    source = generate_simulation_source(request.fsm)
+    tree = ast.parse(source)
+    assert not [node for node in ast.walk(tree) if isinstance(node, (ast.Import, ast.ImportFrom))]
+    assert source.startswith("# Auto-generated simulation code\n")
+
+    for kwargs in MODES:
+        assert _run(simulate_compiled, request, **kwargs) == _run(simulate, request, **kwargs)
+    assert not hasattr(builtins, "INJECTED")
+    # прогон дошёл до недопустимого перехода с враждебным id
+    with pytest.raises(SimulationValidationError) as exc:
+        simulate_compiled(request)
+    assert exc.value.errors[0]["transition_id"] == HOSTILE[3]
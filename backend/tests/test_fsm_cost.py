@@ -0,0 +1,106 @@
+# tests/test_fsm_cost.py
+import random
+
+import pytest
+
+from app import schemas
+from app.schemas.fsm import StateEncoding
+from app.services.fsm_cost import FLIP_FLOP_AREA, estimate_fsm_cost
+
+from tests.conftest import random_fsm
+
+SMALL_FSM = {
+    "type": "mealy",
+    "states": [
+        {"id": "a", "name": "a", "is_initial": True},
+        {"id": "b", "name": "b"},
+        {"id": "c", "name": "c"},
+    ],
+    "transitions": [
+        {"id": "t1", "from_state_id": "a", "to_state_id": "b", "condition": "tick"},
+        {"id": "t2", "from_state_id": "a", "to_state_id": "c", "condition": "*"},
+        {"id": "t3", "from_state_id": "a", "to_state_id": "a", "condition": "tick"},
+        {"id": "t4", "from_state_id": "b", "to_state_id": "c", "condition": "call_received"},
+    ],
+}
+
+
+def _by_encoding(report):
+    return {cost.encoding: cost for cost in report.encodings}
+
+
+def test_small_fsm_by_hand():
+    report = estimate_fsm_cost(schemas.FSMDefinition.model_validate(SMALL_FSM))
+    costs = _by_encoding(report)
+    # binary a=00 b=01 c=10; one-hot по биту на состояние; gray a=00 b=01 c=11
+    assert [(c.flip_flops, c.next_state_terms, c.next_state_literals, c.max_term_literals) for c in (
+        costs[StateEncoding.BINARY], costs[StateEncoding.ONE_HOT], costs[StateEncoding.GRAY],
+    )] == [(2, 5, 14, 3), (3, 5, 9, 2), (2, 8, 22, 3)]
+    assert [(arm.chain_depth, arm.shadowed_transitions, arm.holds_state) for arm in report.arms] == [
+        (2, 1, False), (1, 0, True), (0, 0, True),
+    ]
+    assert report.input_signals == ["call_received", "tick"]
+    assert report.max_chain_depth == 2
+    assert report.recommended_encoding == StateEncoding.BINARY
+    assert "one_hot" in report.reason
+
+
+def _fsms(seed, n=60):
+    rng = random.Random(seed)
+    return [schemas.FSMDefinition.model_validate(random_fsm(rng)) for _ in range(n)]
+
+
+def test_encoding_widths_and_recommendation():
+    for fsm in _fsms(39):
+        report = estimate_fsm_cost(fsm)
+        costs = _by_encoding(report)
+        states = len(fsm.states)
+        assert costs[StateEncoding.ONE_HOT].flip_flops == states
+        assert costs[StateEncoding.BINARY].flip_flops == costs[StateEncoding.GRAY].flip_flops
+        assert 2 ** costs[StateEncoding.BINARY].flip_flops >= states
+        for cost in report.encodings:
+            assert cost.estimated_area == cost.flip_flops * FLIP_FLOP_AREA + cost.next_state_literals
+            assert cost.next_state_terms <= cost.next_state_literals
+        best = min(cost.estimated_area for cost in report.encodings)
+        assert costs[report.recommended_encoding].estimated_area == best
+
+
+def test_cost_never_drops_when_conditional_transitions_are_added():
+    rng = random.Random(40)
+    for fsm in _fsms(41):
+        data = fsm.model_dump()
+        before_report = estimate_fsm_cost(fsm)
+        before = _by_encoding(before_report)
+        source = rng.randrange(len(data["states"]))
+        # новый переход — младший по приоритету в своей ветке
+        data["transitions"].append({
+            "id": "extra",
+            "from_state_id": data["states"][source]["id"],
+            "to_state_id": rng.choice(data["states"])["id"],
+            "condition": rng.choice(["tick", "call_received"]),
+        })
+        after = _by_encoding(estimate_fsm_cost(schemas.FSMDefinition.model_validate(data)))
+        for encoding in StateEncoding:
+            if before_report.arms[source].holds_state:
+                assert after[encoding].next_state_literals >= before[encoding].next_state_literals
+                assert after[encoding].estimated_area >= before[encoding].estimated_area
+            else:
+                # ветка уже закрыта безусловным переходом — новый не достижим
+                assert after[encoding] == before[encoding]
+
+
+@pytest.mark.parametrize("states", [2, 5, 9, 17])
+def test_one_hot_grows_linearly(states):
+    fsm = schemas.FSMDefinition.model_validate({
+        "type": "mealy",
+        "states": [{"id": f"s{i}", "name": f"s{i}", "is_initial": i == 0} for i in range(states)],
+        "transitions": [
+            {"id": f"t{i}", "from_state_id": f"s{i}", "to_state_id": f"s{(i + 1) % states}", "condition": "tick"}
+            for i in range(states)
+        ],
+    })
+    costs = _by_encoding(estimate_fsm_cost(fsm))
+    one_hot = costs[StateEncoding.ONE_HOT]
+    # кольцо: по терму перехода и терму удержания на состояние, в каждом два литерала
+    assert (one_hot.next_state_terms, one_hot.next_state_literals) == (2 * states, 4 * states)
+    assert costs[StateEncoding.BINARY].flip_flops == (states - 1).bit_length()
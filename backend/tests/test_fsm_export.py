@@ -0,0 +1,97 @@
+# tests/test_fsm_export.py
+import pytest
+
+from app.core.config import settings
+from app.schemas.fsm import StateEncoding
+from app.services import fsm_export
+from app.services.fsm_export import export_verilog, stream_verilog, verilog_export_etag
+from app.services.fsm_validation import FSMValidationError
+from app.services.fsm_verilog import iter_verilog
+from app.utils.cache import LRUCache
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = LRUCache(maxsize=8)
+    monkeypatch.setattr(fsm_export, "_verilog_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def raw_fsm(sample_config):
+    return sample_config.fsm.model_dump(mode="json")
+
+
+def test_repeated_export_skips_parsing(cache, raw_fsm, sample_config, monkeypatch):
+    etag, verilog = export_verilog(raw_fsm, "lift")
+    assert verilog == "".join(iter_verilog(sample_config.fsm, "lift", StateEncoding.BINARY))
+
+    def fail(*args):
+        raise AssertionError("FSM разобран повторно")
+
+    monkeypatch.setattr(fsm_export, "prepare_fsm_for_export", fail)
+    assert export_verilog(raw_fsm, "lift") == (etag, verilog)
+    assert "".join(stream_verilog(raw_fsm, "lift")[1]) == verilog
+    assert cache.stats()["hits"] == 2
+
+
+def test_etag_depends_on_every_export_parameter(raw_fsm):
+    base = verilog_export_etag(raw_fsm, "lift")
+    reordered = dict(reversed(list(raw_fsm.items())))
+    assert verilog_export_etag(reordered, "lift") == base
+    changed = dict(raw_fsm, states=raw_fsm["states"][:-1])
+    variants = {
+        verilog_export_etag(changed, "lift"),
+        verilog_export_etag(raw_fsm, "lift2"),
+        verilog_export_etag(raw_fsm, "lift", StateEncoding.ONE_HOT),
+        verilog_export_etag(raw_fsm, "lift", minimize=True),
+    }
+    assert base not in variants and len(variants) == 4
+
+
+def test_stream_caches_only_after_full_read(cache, raw_fsm):
+    etag, chunks = stream_verilog(raw_fsm, "lift", StateEncoding.GRAY)
+    next(chunks)
+    chunks.close()
+    assert cache.get(etag) is None
+
+    etag, chunks = stream_verilog(raw_fsm, "lift", StateEncoding.GRAY)
+    text = "".join(chunks)
+    assert cache.get(etag) == text == export_verilog(raw_fsm, "lift", StateEncoding.GRAY)[1]
+
+
+def test_large_modules_stream_without_caching(cache, raw_fsm, monkeypatch):
+    monkeypatch.setattr(settings, "VERILOG_EXPORT_CACHE_MAX_CHARS", 100)
+    etag, chunks = stream_verilog(raw_fsm, "lift")
+    assert len("".join(chunks)) > 100
+    export_verilog(raw_fsm, "lift")
+    assert len(cache) == 0
+
+
+def test_malformed_fsm_is_a_validation_error(cache):
+    with pytest.raises(FSMValidationError) as exc:
+        export_verilog({"type": "mealy", "states": "nope"}, "lift")
+    assert any(error.startswith("FSM states") for error in exc.value.errors)
+    with pytest.raises(FSMValidationError):
+        stream_verilog({"type": "mealy", "states": [], "transitions": []}, "lift")
+
+
+def test_lru_cache_evicts_and_expires(monkeypatch):
+    cache = LRUCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)  # вытесняет b — к a обращались позже
+    assert cache.get("b") is None
+    assert cache.pop_where(lambda key: key == "c") == 1
+
+    now = [0.0]
+    monkeypatch.setattr("app.utils.cache.time.monotonic", lambda: now[0])
+    cache.set("d", 4)
+    now[0] = 11.0
+    assert cache.get("d") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 2, 1)
+    disabled = LRUCache(maxsize=0)
+    disabled.set("x", 1)
+    assert len(disabled) == 0
@@ -0,0 +1,101 @@
+# tests/test_fsm_lut.py
+import io
+import random
+import shutil
+import subprocess
+import zipfile
+
+import numpy as np
+import pytest
+
+from app import schemas
+from app.schemas.scenario import Direction
+from app.services.fsm_lut import build_lookup_table, export_lookup_table_zip
+from app.services.simulation import EVENT_TYPES, NUM_SYMBOLS, _ordered_events, choose_transition, event_symbol
+
+from tests.conftest import random_fsm, random_scenario
+
+
+def _fsms(sample_config, seed=0, n=40):
+    rng = random.Random(seed)
+    return [sample_config.fsm] + [schemas.FSMDefinition.model_validate(random_fsm(rng)) for _ in range(n)]
+
+
+def test_table_matches_choose_transition(sample_config):
+    for fsm in _fsms(sample_config):
+        table = build_lookup_table(fsm)
+        compiled = table.compiled
+        assert table.transition.shape == table.next_state.shape == (len(compiled.states), NUM_SYMBOLS)
+        for state_idx in range(len(compiled.states)):
+            for ev_type in EVENT_TYPES:
+                for floor in (0, 1, 5):
+                    for direction in Direction:
+                        context = {"floor": floor, "direction": direction.value, "event_type": ev_type.value}
+                        expected = choose_transition(compiled, state_idx, ev_type.value, context)
+                        symbol = event_symbol(ev_type, floor)
+                        assert table.transition[state_idx, symbol] == expected
+                        target = -1 if expected < 0 else compiled.state_index[compiled.transitions[expected].to_state_id]
+                        assert table.next_state[state_idx, symbol] == target
+
+
+def test_zip_contains_npy_with_next_state(sample_config):
+    table = build_lookup_table(sample_config.fsm)
+    archive = zipfile.ZipFile(io.BytesIO(export_lookup_table_zip(sample_config.fsm, name="lift-1")))
+    assert sorted(archive.namelist()) == ["lift_1.c", "lift_1.h", "lift_1_harness.c", "lift_1_next.npy"]
+    loaded = np.load(io.BytesIO(archive.read("lift_1_next.npy")), allow_pickle=False)
+    assert loaded.dtype == np.int16
+    assert np.array_equal(loaded, table.next_state)
+
+
+def _replay(table, scenario):
+    """Эталон для C-харнесса: тот же проход по таблице на Python."""
+    state = table.compiled.initial_index
+    lines = [f"0 {table.state_ids[state]}"]
+    for ev in _ordered_events(scenario.events):
+        nxt = int(table.next_state[state, event_symbol(ev.type, ev.floor)])
+        state = nxt if nxt >= 0 else state
+        lines.append(f"{int(ev.time)} {table.state_ids[state]}")
+    return lines
+
+
+@pytest.mark.skipif(shutil.which("cc") is None, reason="C compiler is not available")
+@pytest.mark.parametrize("seed", range(3))
+def test_c_harness_replays_like_table(sample_config, tmp_path, seed):
+    rng = random.Random(seed)
+    fsm = sample_config.fsm if seed == 0 else schemas.FSMDefinition.model_validate(random_fsm(rng))
+    scenario = schemas.Scenario.model_validate(random_scenario(rng, 6))
+    zipfile.ZipFile(io.BytesIO(export_lookup_table_zip(fsm, scenario, name="lift"))).extractall(tmp_path)
+
+    binary = tmp_path / "harness"
+    subprocess.run(
+        ["cc", "-std=c99", "-Wall", "-Werror", "-o", str(binary), "lift.c", "lift_harness.c"],
+        cwd=tmp_path, check=True, capture_output=True,
+    )
+    output = subprocess.run([str(binary)], check=True, capture_output=True, text=True).stdout
+    assert output.splitlines() == _replay(build_lookup_table(fsm), scenario)
+
+
+@pytest.mark.skipif(shutil.which("cc") is None, reason="C compiler is not available")
+def test_c_harness_handles_hostile_state_ids(sample_config, tmp_path):
+    suffixes = ["\n#error injected", '"\\', "\t??=0", "этаж 1", "\x1b[0m7"]
+    data = sample_config.fsm.model_dump()
+    renamed = {
+        state["id"]: state["id"] + suffixes[i % len(suffixes)]
+        for i, state in enumerate(data["states"])
+    }
+    for state in data["states"]:
+        state["id"] = renamed[state["id"]]
+    for transition in data["transitions"]:
+        transition["from_state_id"] = renamed[transition["from_state_id"]]
+        transition["to_state_id"] = renamed[transition["to_state_id"]]
+    fsm = schemas.FSMDefinition.model_validate(data)
+    scenario = schemas.Scenario.model_validate(random_scenario(random.Random(1), 6))
+    zipfile.ZipFile(io.BytesIO(export_lookup_table_zip(fsm, scenario, name="lift"))).extractall(tmp_path)
+
+    binary = tmp_path / "harness"
+    subprocess.run(
+        ["cc", "-std=c99", "-Wall", "-Werror", "-o", str(binary), "lift.c", "lift_harness.c"],
+        cwd=tmp_path, check=True, capture_output=True,
+    )
+    output = subprocess.run([str(binary)], check=True, capture_output=True).stdout.decode("utf-8")
+    assert output == "\n".join(_replay(build_lookup_table(fsm), scenario)) + "\n"
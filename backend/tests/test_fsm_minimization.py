@@ -0,0 +1,114 @@
+# tests/test_fsm_minimization.py
+import random
+
+import pytest
+
+from app import schemas
+from app.services.fsm_minimization import check_fsm_equivalence, minimize_fsm
+from app.services.simulation import simulate
+
+from tests.conftest import CONDITIONS, EVENT_TYPES, random_fsm, random_scenario
+
+
+def _fsm_with_twins(rng: random.Random) -> schemas.FSMDefinition:
+    """Случайный FSM плюс два состояния с одинаковыми исходящими переходами."""
+    fsm = random_fsm(rng)
+    ids = [st["id"] for st in fsm["states"]]
+    out = [
+        (rng.choice(ids + ["twin_a"]), rng.choice(CONDITIONS), rng.choice(EVENT_TYPES + [None]))
+        for _ in range(rng.randint(1, 4))
+    ]
+    for twin in ("twin_a", "twin_b"):
+        fsm["states"].append({"id": twin, "name": twin})
+        for k, (dst, condition, event_type) in enumerate(out):
+            fsm["transitions"].append({
+                "id": f"{twin}_{k}",
+                "from_state_id": twin,
+                "to_state_id": dst,
+                "condition": condition,
+                "event_type": event_type,
+            })
+    for tr in fsm["transitions"]:
+        if rng.random() < 0.4:
+            tr["to_state_id"] = rng.choice(["twin_a", "twin_b"])
+    return schemas.FSMDefinition.model_validate(fsm)
+
+
+def _run(request, **kwargs):
+    try:
+        return simulate(request, **kwargs)
+    except Exception as exc:  # ошибки валидации тоже должны совпадать
+        return type(exc).__name__, str(exc)
+
+
+def test_sample_fsm_is_already_minimal(sample_config):
+    result = minimize_fsm(sample_config.fsm)
+    assert result.original_states == result.minimized_states == len(sample_config.fsm.states)
+    assert result.merged_states == {}
+    assert check_fsm_equivalence(sample_config.fsm, result.fsm).equivalent
+
+
+def test_twins_are_merged():
+    fsm = schemas.FSMDefinition.model_validate({
+        "type": "mealy",
+        "states": [
+            {"id": "idle", "name": "idle", "is_initial": True},
+            {"id": "a", "name": "a"},
+            {"id": "b", "name": "b"},
+        ],
+        "transitions": [
+            {"id": "t1", "from_state_id": "idle", "to_state_id": "a", "condition": "*", "event_type": "call"},
+            {"id": "t2", "from_state_id": "idle", "to_state_id": "b", "condition": "*", "event_type": "cabin"},
+            {"id": "t3", "from_state_id": "a", "to_state_id": "idle", "condition": "*", "event_type": "timer"},
+            {"id": "t4", "from_state_id": "b", "to_state_id": "idle", "condition": "*", "event_type": "timer"},
+        ],
+    })
+    result = minimize_fsm(fsm)
+    assert result.minimized_states == 2
+    assert result.merged_states == {"b": "a"}
+    assert {tr.to_state_id for tr in result.fsm.transitions} == {"a", "idle"}
+    assert check_fsm_equivalence(fsm, result.fsm).equivalent
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_minimized_fsm_simulates_like_original(seed):
+    rng = random.Random(seed)
+    merged = 0
+    for _ in range(60):
+        fsm = _fsm_with_twins(rng)
+        minimized = minimize_fsm(fsm)
+        merged += bool(minimized.merged_states)
+        assert check_fsm_equivalence(fsm, minimized.fsm).equivalent
+
+        floors = rng.randint(1, 8)
+        request = schemas.SimulationRequest(
+            project_id=1,
+            config={"floors": floors, "door_time": 2, "move_time": 1, "capacity": 8},
+            fsm=fsm,
+            scenario=schemas.Scenario.model_validate(random_scenario(rng, floors)),
+        )
+        original = _run(request)
+        reduced = _run(request, minimize=True)
+        if isinstance(original, tuple):
+            assert reduced == original
+            continue
+
+        assert reduced.metrics == original.metrics
+        # склеенные состояния в таймлайне заменяются представителем
+        rename = minimized.merged_states
+        assert [item.model_copy(update={"state_id": rename.get(item.state_id, item.state_id)})
+                for item in original.timeline] == reduced.timeline
+    assert merged
+
+
+def test_equivalence_reports_distinguishing_word(sample_config):
+    fsm = sample_config.fsm
+    changed = fsm.model_copy(update={
+        "transitions": [
+            tr.model_copy(update={"to_state_id": "IDLE_CLOSED"}) if tr.to_state_id == "DOOR_OPEN" else tr
+            for tr in fsm.transitions
+        ]
+    })
+    result = check_fsm_equivalence(fsm, changed)
+    assert not result.equivalent
+    assert result.counterexample
@@ -0,0 +1,142 @@
+# tests/test_fsm_model_check.py
+import tracemalloc
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import fsm as fsm_endpoints
+from app.core.config import settings
+from app.schemas.fsm import FSMDefinition
+from app.schemas.scenario import ScenarioEventType
+from app.services.fsm_model_check import (
+    INVARIANT_DOORS,
+    INVARIANT_SERVICE,
+    INVARIANT_SERVICE_POSSIBLE,
+    ModelCheckLimitError,
+    check_fsm_invariants,
+)
+from app.services.fsm_validation import DOOR_OPEN_STATES
+
+
+def _fsm(states, transitions):
+    return FSMDefinition.model_validate({
+        "type": "mealy",
+        "states": [{"id": sid, "name": sid, "is_initial": idx == 0} for idx, sid in enumerate(states)],
+        "transitions": [
+            {"id": tid, "from_state_id": src, "to_state_id": dst, "condition": cond, "event_type": event}
+            for tid, src, dst, cond, event in transitions
+        ],
+    })
+
+
+def _invariants(fsm, floors=3):
+    return {inv.name: inv for inv in check_fsm_invariants(fsm, floors).invariants}
+
+
+@pytest.mark.parametrize("floors", [1, 4, 20])
+def test_sample_fsm_satisfies_all_invariants(sample_config, floors):
+    result = check_fsm_invariants(sample_config.fsm, floors)
+    assert result.floors == floors
+    assert result.explored_states > 0
+    assert all(inv.holds for inv in result.invariants), result.invariants
+
+
+@pytest.mark.parametrize("open_state", sorted(DOOR_OPEN_STATES))
+def test_moving_with_doors_open_has_counterexample(open_state):
+    fsm = _fsm(
+        ["idle", open_state, "moving_up"],
+        [
+            ("t1", "idle", open_state, "*", "call"),
+            ("t2", open_state, "moving_up", "*", "timer"),
+            ("t3", "moving_up", "idle", "*", "timer"),
+        ],
+    )
+    doors = _invariants(fsm)[INVARIANT_DOORS]
+    assert not doors.holds
+    assert [step.state_id for step in doors.counterexample] == ["idle", open_state, "moving_up"]
+    assert doors.counterexample[-1].transition_id == "t2"
+    assert doors.counterexample[-1].event_type == ScenarioEventType.TIMER
+
+
+def test_call_that_can_never_be_served():
+    fsm = _fsm(
+        ["idle", "a"],
+        [
+            ("t1", "idle", "a", "*", "call"),
+            ("t2", "a", "a", "*", None),
+        ],
+    )
+    invariants = _invariants(fsm)
+    assert not invariants[INVARIANT_SERVICE_POSSIBLE].holds
+    assert not invariants[INVARIANT_SERVICE].holds
+    stuck = invariants[INVARIANT_SERVICE_POSSIBLE].counterexample[-1]
+    assert (stuck.state_id, stuck.pending_floor) == ("a", 0)
+
+
+def test_servable_call_can_still_starve_under_fair_events():
+    # вызов можно обслужить (EF), но справедливое окружение может вечно
+    # возвращать лифт в idle через timer и sensor, не давая ему доехать
+    fsm = _fsm(
+        ["IDLE_CLOSED", "A", "MOVING_UP"],
+        [
+            ("t1", "IDLE_CLOSED", "A", "call_received", "call"),
+            ("t2", "IDLE_CLOSED", "A", "*", "cabin"),
+            ("t3", "A", "IDLE_CLOSED", "obstacle_detected", "sensor"),
+            ("t5", "A", "A", "call_received", "call"),
+            ("t6", "A", "A", "*", "cabin"),
+            ("t4", "A", "MOVING_UP", "door_timer_expired", "timer"),
+        ],
+    )
+    invariants = _invariants(fsm)
+    assert invariants[INVARIANT_DOORS].holds
+    assert invariants[INVARIANT_SERVICE_POSSIBLE].holds
+    service = invariants[INVARIANT_SERVICE]
+    assert not service.holds
+    assert service.counterexample[0].state_id == "IDLE_CLOSED"
+    assert service.counterexample[-1].pending_floor is not None
+
+
+def test_large_building_is_checked_exhaustively(sample_config):
+    result = check_fsm_invariants(sample_config.fsm, 200)
+    assert all(inv.holds for inv in result.invariants)
+    assert result.explored_transitions >= result.explored_states
+
+
+def test_memory_follows_reachable_states():
+    # недостижимые состояния не должны стоить S·F·(F+1) памяти
+    # (плотные массивы здесь заняли бы больше 100 МБ)
+    states = ["idle", "moving_up"] + [f"dead{i}" for i in range(400)]
+    transitions = [("t1", "idle", "moving_up", "*", "call"), ("t2", "moving_up", "idle", "*", "timer")]
+    transitions += [(f"d{i}", f"dead{i}", "idle", "*", None) for i in range(400)]
+    fsm = _fsm(states, transitions)
+
+    tracemalloc.start()
+    try:
+        result = check_fsm_invariants(fsm, 100)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert result.explored_states <= 2 * 100
+    assert all(inv.holds for inv in result.invariants)
+    assert peak < 32 * 1024 * 1024
+
+
+def test_transition_limit(sample_config):
+    result = check_fsm_invariants(sample_config.fsm, 20)
+    assert check_fsm_invariants(sample_config.fsm, 20, max_transitions=result.explored_transitions) == result
+    with pytest.raises(ModelCheckLimitError):
+        check_fsm_invariants(sample_config.fsm, 20, max_transitions=result.explored_transitions - 1)
+
+
+def test_endpoint_rejects_too_large_models(sample_config, monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_CHECK_MAX_TRANSITIONS", 1000)
+    app = FastAPI()
+    app.include_router(fsm_endpoints.router, prefix="/fsm")
+    client = TestClient(app)
+    body = {"fsm": sample_config.fsm.model_dump(mode="json"), "floors": 4}
+    assert client.post("/fsm/model-check", json=body).status_code == 200
+    body["floors"] = 200
+    response = client.post("/fsm/model-check", json=body)
+    assert response.status_code == 422
+    assert "1000" in response.json()["detail"]
@@ -0,0 +1,83 @@
+# tests/test_fsm_validation.py
+import pytest
+
+from app.schemas.fsm import FSMDefinition
+from app.services.fsm_validation import DOOR_OPEN_STATES, validate_fsm_structure
+from app.services.simulation import OPEN_STATES
+
+
+def _fsm(states, transitions, initial="idle"):
+    return FSMDefinition.model_validate({
+        "type": "mealy",
+        "states": [{"id": sid, "name": sid, "is_initial": sid == initial} for sid in states],
+        "transitions": [
+            {"id": f"t{k}", "from_state_id": src, "to_state_id": dst, "condition": cond, "event_type": event}
+            for k, (src, dst, cond, event) in enumerate(transitions)
+        ],
+    })
+
+
+def _codes(fsm):
+    return sorted({issue.code for issue in validate_fsm_structure(fsm)})
+
+
+def test_simulation_uses_the_same_door_open_set():
+    assert OPEN_STATES is DOOR_OPEN_STATES
+
+
+@pytest.mark.parametrize("open_state", sorted(DOOR_OPEN_STATES))
+def test_unsafe_transition_from_every_door_open_state(open_state):
+    fsm = _fsm(
+        ["idle", open_state, "moving_up"],
+        [
+            ("idle", open_state, "*", "call"),
+            (open_state, "moving_up", "*", "timer"),
+            ("moving_up", "idle", "*", "timer"),
+        ],
+    )
+    issues = [issue for issue in validate_fsm_structure(fsm) if issue.code == "unsafe_transition"]
+    assert len(issues) == 1
+    assert issues[0].transition_ids == ["t1"]
+
+
+def test_clean_cycle_has_no_issues():
+    fsm = _fsm(
+        ["idle", "doors_open", "moving_up"],
+        [
+            ("idle", "moving_up", "*", "call"),
+            ("moving_up", "doors_open", "*", "timer"),
+            ("doors_open", "idle", "*", "timer"),
+        ],
+    )
+    assert _codes(fsm) == []
+
+
+def test_graph_issues():
+    fsm = _fsm(
+        ["idle", "a", "sink", "orphan"],
+        [
+            ("idle", "a", "*", "call"),
+            ("a", "idle", "*", "timer"),
+            ("a", "sink", "*", "sensor"),
+            ("orphan", "idle", "*", "timer"),
+        ],
+    )
+    issues = {issue.code: issue for issue in validate_fsm_structure(fsm)}
+    assert issues["unreachable_state"].state_ids == ["orphan"]
+    assert issues["dead_end_state"].state_ids == ["sink"]
+    assert "non_returning_state" not in issues
+
+
+def test_non_returning_and_nondeterministic_states():
+    fsm = _fsm(
+        ["idle", "a", "b"],
+        [
+            ("idle", "a", "call_received", "call"),
+            ("idle", "b", "*", None),
+            ("a", "b", "*", "timer"),
+            ("b", "a", "*", "timer"),
+        ],
+    )
+    issues = {issue.code: issue for issue in validate_fsm_structure(fsm)}
+    assert sorted(issues["non_returning_state"].state_ids) == ["a", "b"]
+    assert issues["nondeterministic_transitions"].transition_ids == ["t0", "t1"]
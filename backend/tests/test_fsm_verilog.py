@@ -0,0 +1,99 @@
+# tests/test_fsm_verilog.py
+import io
+import json
+import re
+
+import pytest
+
+from app.schemas.fsm import FSMDefinition, StateEncoding
+from app.services.fsm_export import export_verilog, stream_verilog
+from app.services.fsm_verilog import (
+    generate_verilog_from_fsm,
+    state_encoding,
+    state_encoding_width,
+    write_verilog,
+)
+
+from tests.conftest import DATA_DIR
+
+# Эталоны sample_fsm_binary.v и mixed_fsm_binary.v сгенерированы исходной
+# (строковой) версией генератора: binary-кодирование без выходов должно
+# совпадать с ней побайтно. outputs_fsm_*.v — выходы состояний и действия
+# переходов во всех кодировках (проверены вручную).
+
+
+def _load(name: str) -> dict:
+    return json.loads((DATA_DIR / name).read_text(encoding="utf-8"))
+
+
+def _mixed_fsm() -> FSMDefinition:
+    return FSMDefinition.model_validate(_load("mixed_fsm.json"))
+
+
+def _golden(name: str) -> str:
+    return (DATA_DIR / name).read_text(encoding="utf-8")
+
+
+def test_binary_matches_baseline_for_sample(sample_config):
+    assert generate_verilog_from_fsm(sample_config.fsm) == _golden("sample_fsm_binary.v")
+
+
+def test_binary_matches_baseline_for_mixed_fsm():
+    assert generate_verilog_from_fsm(_mixed_fsm(), module_name="mixed_fsm") == _golden("mixed_fsm_binary.v")
+
+
+@pytest.mark.parametrize("encoding", list(StateEncoding))
+def test_outputs_and_actions_match_golden(encoding):
+    fsm = FSMDefinition.model_validate(_load("outputs_fsm.json"))
+    text = generate_verilog_from_fsm(fsm, module_name="outputs_fsm", encoding=encoding)
+    assert text == _golden(f"outputs_fsm_{encoding.value}.v")
+    # нечисловые, отрицательные, зарезервированные имена и имена входов не становятся портами
+    for skipped in ("label", "bad", "output reg        state", "output reg        call_received"):
+        assert skipped not in text
+
+
+@pytest.mark.parametrize("encoding", list(StateEncoding))
+def test_export_of_fsm_with_outputs(encoding):
+    raw = _load("outputs_fsm.json")
+    etag, text = export_verilog(raw, "outputs_fsm", encoding)
+    assert text == _golden(f"outputs_fsm_{encoding.value}.v")
+    stream_etag, chunks = stream_verilog(raw, "outputs_fsm", encoding, minimize=True)
+    assert stream_etag != etag
+    assert "output reg [2:0]  level" in "".join(chunks)
+
+
+@pytest.mark.parametrize("encoding", list(StateEncoding))
+def test_streaming_writer_matches_string(sample_config, encoding):
+    out = io.StringIO()
+    write_verilog(sample_config.fsm, out, encoding=encoding)
+    assert out.getvalue() == generate_verilog_from_fsm(sample_config.fsm, encoding=encoding)
+
+
+def test_one_hot_uses_parallel_case_on_state_bits():
+    fsm = _mixed_fsm()
+    text = generate_verilog_from_fsm(fsm, module_name="mixed_fsm", encoding=StateEncoding.ONE_HOT)
+    n = len(fsm.states)
+
+    assert state_encoding_width(n, StateEncoding.ONE_HOT) == n
+    assert f"output reg [{n - 1}:0]  state" in text
+    assert "case (1'b1) // synopsys parallel_case" in text
+    assert "case (curr_state)" not in text
+    # localparam — индекс бита, ветки case проверяют один бит регистра
+    for idx, st in enumerate(fsm.states):
+        assert re.search(rf"^\s+{st.id.upper()}\s+= {idx}[,;]$", text, re.M)
+        assert f"    curr_state[{st.id.upper()}]: begin\n" in text
+    assert f"curr_state <= {n}'d1 << IDLE;" in text
+    assert f"next_state = {n}'d1 << MOVING_UP;" in text
+    assert f"default: next_state = {n}'d1 << IDLE;" in text
+
+
+def test_gray_codes_differ_in_one_bit():
+    fsm = _mixed_fsm()
+    codes = list(state_encoding(fsm, StateEncoding.GRAY).values())
+    assert len(set(codes)) == len(codes)
+    assert max(codes) < 1 << state_encoding_width(len(codes), StateEncoding.GRAY)
+    for prev, nxt in zip(codes, codes[1:]):
+        assert bin(prev ^ nxt).count("1") == 1
+    text = generate_verilog_from_fsm(fsm, encoding=StateEncoding.GRAY)
+    assert "// Encoding: gray" in text
+    assert "DOORS_OPEN   = 3'b011" in text
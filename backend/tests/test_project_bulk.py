@@ -0,0 +1,176 @@
+import asyncio
+import copy
+import io
+import json
+import zipfile
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app import models
+from app.api.v1.endpoints import projects
+from app.core.config import settings
+from app.schemas.project import ProjectConfig
+from app.services.project_bulk import iter_zip_documents, parse_import_batch
+
+from tests.conftest import make_user
+
+
+@pytest.fixture
+def configs(sample_config):
+    good = sample_config.model_dump(mode="json")
+    good["fsm"]["states"][0]["outputs"] = {"door_open": 1, "motor": 0}
+    broken = copy.deepcopy(good)
+    broken["fsm"]["transitions"][0]["to_state_id"] = "NOWHERE"
+    return good, broken
+
+
+@pytest.fixture
+def stored(db_engine, seed, monkeypatch):
+    """Экспорт открывает свои сессии — направляем их в тестовую БД."""
+    monkeypatch.setattr(projects, "AsyncSessionLocal", async_sessionmaker(db_engine, expire_on_commit=False))
+    seed(make_user(2), make_user(3), make_user(7, role="teacher"))
+    sessions = async_sessionmaker(db_engine)
+
+    def load(owner_id):
+        async def run():
+            async with sessions() as db:
+                return (
+                    await db.scalars(
+                        select(models.Project).where(models.Project.owner_id == owner_id).order_by(models.Project.id)
+                    )
+                ).all()
+
+        return asyncio.run(run())
+
+    return load
+
+
+def _zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def test_export_round_trips_through_import(api_client, seed, stored, configs, monkeypatch):
+    good, broken = configs
+    monkeypatch.setattr(settings, "PROJECT_BULK_EXPORT_BATCH_SIZE", 2)
+    seed(
+        models.Project(id=1, name="Лифт / v1", description="d", owner_id=2, config=good),
+        models.Project(id=2, name="broken", owner_id=2, config=broken),
+        models.Project(id=3, name="empty", owner_id=2, status=models.ProjectStatus.submitted),
+        models.Project(id=4, name="foreign", owner_id=3, config=good),
+    )
+    owner = api_client(projects.router, "/projects", make_user(2))
+
+    response = owner.get("/projects/export/bulk")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    assert sorted(archive.namelist()) == [
+        "1_v1/fsm.v", "1_v1/project.json",
+        "2_broken/fsm_errors.txt", "2_broken/project.json",
+        "3_empty/project.json",
+    ]
+    verilog = archive.read("1_v1/fsm.v").decode()
+    assert "module project_1_fsm" in verilog and "output reg        door_open" in verilog
+    assert "NOWHERE" in archive.read("2_broken/fsm_errors.txt").decode()
+    assert json.loads(archive.read("1_v1/project.json")) == {
+        "name": "Лифт / v1", "description": "d", "status": "draft", "config": good,
+    }
+
+    other = api_client(projects.router, "/projects", make_user(3))
+    result = other.post(
+        "/projects/import/bulk", content=response.content, headers={"Content-Type": "application/zip"}
+    ).json()
+    assert result["imported"] == 2 and result["failed"] == 1
+    assert [e["document"] for e in result["errors"]] == ["2_broken/project.json"]
+    assert "NOWHERE" in result["errors"][0]["detail"]
+
+    imported = stored(3)[1:]
+    assert [(p.name, p.status) for p in imported] == [
+        ("Лифт / v1", models.ProjectStatus.draft), ("empty", models.ProjectStatus.submitted),
+    ]
+    assert imported[0].config == ProjectConfig.model_validate(good).model_dump()
+    assert imported[0].config["fsm"]["states"][0]["outputs"] == {"door_open": 1, "motor": 0}
+    assert imported[1].config is None
+
+
+def test_ndjson_import_skips_bad_documents(api_client, stored, configs, monkeypatch):
+    good, _ = configs
+    monkeypatch.setattr(settings, "PROJECT_BULK_IMPORT_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "PROJECT_BULK_MAX_DOCUMENT_BYTES", 64 * 1024)
+    lines = [
+        json.dumps({"name": "a", "config": good, "owner_id": 3}),
+        "{not json",
+        "",
+        json.dumps({"name": "b", "status": "nope"}),
+        json.dumps({"name": "x" * 70_000}),
+        json.dumps({"name": "c"}),
+    ]
+    body = "\n".join(lines).encode()
+    student = api_client(projects.router, "/projects", make_user(2))
+
+    # тело приходит кусками, строки режутся на границах чанков
+    chunks = (body[i:i + 1000] for i in range(0, len(body), 1000))
+    result = student.post(
+        "/projects/import/bulk", content=chunks, headers={"Content-Type": "application/x-ndjson"}
+    ).json()
+    assert result["imported"] == 2 and result["failed"] == 3
+    errors = {e["document"]: e["detail"] for e in result["errors"]}
+    assert set(errors) == {"строка 2", "строка 4", "строка 5"}
+    assert errors["строка 4"].startswith("status:")
+    assert errors["строка 5"] == "Документ больше допустимого размера"
+    # студент не выбирает владельца
+    assert [p.name for p in stored(2)] == ["a", "c"]
+    assert stored(3) == []
+
+
+def test_teacher_owner_ids_are_checked(api_client, stored):
+    teacher = api_client(projects.router, "/projects", make_user(7, role="teacher"))
+    body = "\n".join(
+        json.dumps({"name": name, "owner_id": owner}) for name, owner in [("a", 3), ("b", 99), ("c", None)]
+    )
+    result = teacher.post("/projects/import/bulk", content=body).json()
+    assert result["imported"] == 2
+    assert result["errors"] == [{"document": "строка 2", "detail": "owner_id: пользователь 99 не найден"}]
+    assert [p.name for p in stored(3)] == ["a"]
+    assert [p.name for p in stored(7)] == ["c"]
+
+
+def test_bad_zip_is_rejected(api_client, stored):
+    client = api_client(projects.router, "/projects", make_user(2))
+    response = client.post("/projects/import/bulk", content=b"PK-nope", headers={"Content-Type": "application/zip"})
+    assert response.status_code == 400
+
+
+def test_zip_documents_are_labelled_and_limited():
+    data = _zip({
+        "dir/": b"",
+        "a.json": b'{"name": "a"}',
+        "big.json": b'{"name": "' + b"x" * 100 + b'"}',
+        "many.ndjson": b'{"name": "b"}\n\n{"name": "' + b"y" * 100 + b'"}\n{"name": "c"}',
+        "notes.txt": b"ignored",
+    })
+    documents = list(iter_zip_documents(io.BytesIO(data), max_bytes=50))
+    assert documents == [
+        ("a.json", b'{"name": "a"}'),
+        ("big.json", None),
+        ("many.ndjson:1", b'{"name": "b"}\n'),
+        ("many.ndjson:3", None),
+        ("many.ndjson:4", b'{"name": "c"}'),
+    ]
+
+
+def test_parse_import_batch_owner_rules():
+    documents = [("1", b'{"name": "a", "owner_id": 5}'), ("2", b'{"name": "b"}'), ("3", None)]
+    student = parse_import_batch(documents, owner_id=2, allow_owner=False)
+    teacher = parse_import_batch(documents, owner_id=7, allow_owner=True)
+    assert [row["owner_id"] for row in student.rows] == [2, 2]
+    assert [row["owner_id"] for row in teacher.rows] == [5, 7]
+    assert teacher.labels == ["1", "2"]
+    assert teacher.errors == [("3", "Документ больше допустимого размера")]
+    assert teacher.rows[1] == {"name": "b", "description": None, "status": "draft", "config": None, "owner_id": 7}
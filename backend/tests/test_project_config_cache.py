@@ -0,0 +1,102 @@
+# tests/test_project_config_cache.py
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import event
+
+from app import models
+from app.api.v1.endpoints import projects
+from app.services import fsm_export, project_config_cache
+from app.services.fsm_validation import FSMValidationError
+from app.services.project_config_cache import (
+    ParsedProjectConfig,
+    get_parsed_config,
+    invalidate_project_config,
+    store_parsed_config,
+)
+from app.utils.cache import LRUCache
+
+from tests.conftest import make_user
+
+T1 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+T2 = datetime(2026, 1, 2, tzinfo=timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def caches(monkeypatch):
+    monkeypatch.setattr(project_config_cache, "_config_cache", LRUCache(maxsize=8))
+    monkeypatch.setattr(fsm_export, "_verilog_cache", LRUCache(maxsize=8))
+
+
+def test_parsing_happens_once_per_version(sample_config, monkeypatch):
+    calls = []
+    prepare = project_config_cache.prepare_fsm_for_export
+
+    def counting(raw_fsm, minimize=False):
+        calls.append(minimize)
+        return prepare(raw_fsm, minimize)
+
+    monkeypatch.setattr(project_config_cache, "prepare_fsm_for_export", counting)
+    parsed = ParsedProjectConfig(sample_config.model_dump(mode="json"))
+    assert parsed.export_fsm() is parsed.export_fsm()
+    parsed.export_fsm(minimize=True)
+    assert calls == [False, True]
+    assert parsed.project_config is parsed.project_config
+    assert parsed.default_scenario == sample_config.default_scenario
+    assert parsed.fsm_hash == fsm_export.content_hash(parsed.raw_fsm)
+
+
+def test_errors_are_remembered(monkeypatch):
+    calls = []
+
+    def failing(raw_fsm, minimize=False):
+        calls.append(minimize)
+        raise FSMValidationError(["broken"])
+
+    monkeypatch.setattr(project_config_cache, "prepare_fsm_for_export", failing)
+    parsed = ParsedProjectConfig({"fsm": {"states": "nope"}})
+    for _ in range(2):
+        with pytest.raises(FSMValidationError):
+            parsed.export_fsm()
+        with pytest.raises(Exception):
+            parsed.project_config
+    assert calls == [False]
+    assert ParsedProjectConfig(None).raw_fsm is None
+
+
+def test_cache_is_keyed_by_version():
+    parsed = store_parsed_config(1, T1, {"fsm": None})
+    store_parsed_config(2, T1, {"fsm": None})
+    assert get_parsed_config(1, T1) is parsed
+    assert get_parsed_config(1, T2) is None
+    assert invalidate_project_config(1) == 1
+    assert get_parsed_config(1, T1) is None
+    assert get_parsed_config(2, T1) is not None
+
+
+def test_export_reads_config_once_until_update(api_client, seed, db_engine, sample_config):
+    seed(make_user(2))
+    seed(models.Project(id=5, name="lift", owner_id=2, config=sample_config.model_dump(mode="json")))
+    client = api_client(projects.router, "/projects", make_user(2))
+    reads = []
+
+    @event.listens_for(db_engine.sync_engine, "before_cursor_execute")
+    def _log(conn, cursor, statement, parameters, context, executemany):
+        if "projects.config" in statement:
+            reads.append(statement)
+
+    first = client.post("/projects/5/fsm/export")
+    second = client.post("/projects/5/fsm/export")
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    assert len(reads) == 1
+
+    config = sample_config.model_dump(mode="json")
+    config["fsm"]["transitions"] = config["fsm"]["transitions"][:-1]
+    assert client.put("/projects/5", json={"config": config}).status_code == 200
+    assert len(project_config_cache._config_cache) == 0
+    reads.clear()
+    third = client.post("/projects/5/fsm/export")
+    assert third.status_code == 200
+    assert third.json()["verilog"] != first.json()["verilog"]
+    assert len(reads) == 1
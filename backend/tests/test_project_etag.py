@@ -0,0 +1,130 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import event
+
+from app import models
+from app.api.v1.endpoints import projects
+from app.main import app as main_app
+from app.services import project_config_cache
+from app.utils.cache import LRUCache
+
+from tests.conftest import make_user
+
+# SQLite пишет onupdate=now() как CURRENT_TIMESTAMP с точностью до секунды,
+# поэтому исходные версии заведомо старше
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def config_cache(monkeypatch):
+    monkeypatch.setattr(project_config_cache, "_config_cache", LRUCache(maxsize=8))
+
+
+def _user(user_id, role="student"):
+    user = make_user(user_id, role)
+    user.created_at = user.updated_at = T0
+    return user
+
+
+@pytest.fixture
+def project(seed, sample_config):
+    seed(_user(2), _user(7, role="teacher"))
+    seed(models.Project(id=5, name="lift", owner_id=2, updated_at=T0,
+                        config=sample_config.model_dump(mode="json")))
+
+
+@pytest.fixture
+def statements(db_engine):
+    captured = []
+
+    @event.listens_for(db_engine.sync_engine, "before_cursor_execute")
+    def _log(conn, cursor, statement, parameters, context, executemany):
+        captured.append(statement)
+
+    return captured
+
+
+def _revalidate(client, url, statements):
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    statements.clear()
+    for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        cached = client.get(url, headers={"If-None-Match": header})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["ETag"] == etag
+        assert cached.headers["Cache-Control"] == "private, no-cache"
+    not_modified = list(statements)
+    assert client.get(url, headers={"If-None-Match": '"other"'}).status_code == 200
+    return etag, not_modified
+
+
+@pytest.mark.parametrize("url", ["/projects/5", "/projects/5/export"])
+def test_project_revalidation_skips_config(api_client, project, statements, url):
+    client = api_client(projects.router, "/projects", make_user(2))
+    _, not_modified = _revalidate(client, url, statements)
+    assert not_modified and not any("projects.config" in s for s in not_modified)
+    assert any("projects.config" in s for s in statements[len(not_modified):])
+
+
+@pytest.mark.parametrize("url", ["/projects/5", "/projects/5/export"])
+def test_etag_changes_after_update(api_client, project, url):
+    client = api_client(projects.router, "/projects", make_user(2))
+    etag = client.get(url).headers["ETag"]
+    assert client.put("/projects/5", json={"description": "v2"}).status_code == 200
+    fresh = client.get(url, headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["ETag"] != etag
+
+
+def test_project_etag_follows_owner(api_client, project, db_engine):
+    client = api_client(projects.router, "/projects", make_user(2))
+    etag = client.get("/projects/5").headers["ETag"]
+    export_etag = client.get("/projects/5/export").headers["ETag"]
+
+    async def rename():
+        async with db_engine.begin() as conn:
+            await conn.exec_driver_sql("UPDATE users SET full_name = 'Renamed', updated_at = now() WHERE id = 2")
+
+    asyncio.run(rename())
+
+    fresh = client.get("/projects/5", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.json()["owner"]["full_name"] == "Renamed"
+    # экспорт владельца не содержит — его тег не меняется
+    assert client.get("/projects/5/export", headers={"If-None-Match": export_etag}).status_code == 304
+
+
+def test_reviews_etag_tracks_new_reviews(api_client, project, statements):
+    teacher = api_client(projects.router, "/projects", _user(7, role="teacher"))
+    student = api_client(projects.router, "/projects", make_user(2))
+    empty, not_modified = _revalidate(student, "/projects/5/reviews", statements)
+    assert not any("project_reviews.comment" in s for s in not_modified)
+
+    assert teacher.post("/projects/5/reviews", json={"comment": "ok"}).status_code == 201
+    first = student.get("/projects/5/reviews", headers={"If-None-Match": empty})
+    assert first.status_code == 200
+    assert [r["comment"] for r in first.json()] == ["ok"]
+    assert first.headers["ETag"] != empty
+
+    assert teacher.post("/projects/5/reviews", json={"comment": "again"}).status_code == 201
+    second = student.get("/projects/5/reviews", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert len(second.json()) == 2
+
+
+def test_foreign_project_is_checked_before_etag(api_client, project):
+    client = api_client(projects.router, "/projects", make_user(3))
+    for url in ("/projects/5", "/projects/5/export", "/projects/5/reviews"):
+        assert client.get(url, headers={"If-None-Match": "*"}).status_code == 403
+    assert client.get("/projects/6", headers={"If-None-Match": "*"}).status_code == 404
+
+
+def test_cors_exposes_etag():
+    cors = next(m for m in main_app.user_middleware if "expose_headers" in m.kwargs)
+    assert "ETag" in cors.kwargs["expose_headers"]
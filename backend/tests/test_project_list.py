@@ -0,0 +1,94 @@
+# tests/test_project_list.py
+import pytest
+from sqlalchemy import event
+
+from app import models
+from app.api.v1.endpoints import projects
+from app.core.config import settings
+
+from tests.conftest import make_user
+
+TEACHER = make_user(1, "teacher")
+STUDENT = make_user(2)
+OTHER = make_user(3)
+
+
+@pytest.fixture
+def statements(db_engine):
+    """SQL-запросы, выполненные за время теста."""
+    executed = []
+
+    @event.listens_for(db_engine.sync_engine, "before_cursor_execute")
+    def _log(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    return executed
+
+
+@pytest.fixture
+def project_ids(seed, sample_config):
+    seed(make_user(1, "teacher"), make_user(2), make_user(3))
+    config = sample_config.model_dump(mode="json")
+    owners = [2, 3, 2, 2, 3, 2, 2]
+    seed(*(
+        models.Project(id=10 + i, name=f"p{i}", owner_id=owner, config=config)
+        for i, owner in enumerate(owners)
+    ))
+    return {owner: [10 + i for i, o in enumerate(owners) if o == owner] for owner in set(owners)}
+
+
+def _pages(client, path, limit, **params):
+    ids, after, cursors = [], None, []
+    while True:
+        query = {"limit": limit, **params}
+        if after is not None:
+            query["after_id"] = after
+        response = client.get(path, params=query)
+        assert response.status_code == 200
+        ids += [item["id"] for item in response.json()]
+        after = response.headers.get("X-Next-After-Id")
+        cursors.append(after)
+        if after is None:
+            return ids, cursors
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 5, 100])
+def test_keyset_pages_cover_the_list_once(api_client, project_ids, limit):
+    client = api_client(projects.router, "/projects", TEACHER)
+    everything = sorted(sum(project_ids.values(), []))
+    ids, cursors = _pages(client, "/projects/", limit)
+    assert ids == everything
+    assert [item["id"] for item in client.get("/projects/").json()] == everything
+    assert cursors[-1] is None
+    assert all(int(cursor) in everything for cursor in cursors[:-1])
+
+
+def test_visibility_rules_apply_to_pages(api_client, project_ids):
+    student = api_client(projects.router, "/projects", STUDENT)
+    teacher = api_client(projects.router, "/projects", TEACHER)
+    assert _pages(student, "/projects/", 2)[0] == project_ids[2]
+    assert _pages(student, "/projects/", 2, student_id=3)[0] == project_ids[2]
+    assert _pages(teacher, "/projects/", 2, student_id=3)[0] == project_ids[3]
+    assert _pages(teacher, "/projects/", 2, own_only=True)[0] == []
+    assert _pages(api_client(projects.router, "/projects", OTHER), "/projects/my", 1)[0] == project_ids[3]
+
+
+def test_summary_does_not_read_config(api_client, project_ids, statements):
+    client = api_client(projects.router, "/projects", TEACHER)
+    full = client.get("/projects/", params={"limit": 4}).json()
+    statements.clear()
+    summary = client.get("/projects/", params={"limit": 4, "fields": "summary"}).json()
+
+    assert all(item["config"] for item in full)
+    assert [item["config"] for item in summary] == [None] * 4
+    assert [item["owner"]["id"] for item in summary] == [item["owner"]["id"] for item in full]
+    # проекты + владельцы одним selectin, независимо от размера страницы
+    assert len(statements) == 2
+    assert "config" not in statements[0]
+
+
+def test_limit_is_bounded(api_client, project_ids):
+    client = api_client(projects.router, "/projects", TEACHER)
+    assert client.get("/projects/", params={"limit": 0}).status_code == 422
+    too_many = settings.PROJECT_LIST_MAX_LIMIT + 1
+    assert client.get("/projects/", params={"limit": too_many}).status_code == 422
@@ -0,0 +1,109 @@
+import importlib.util
+import re
+from pathlib import Path
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.api.v1.endpoints import projects
+from app.models import project as project_model
+from app.services.fsm_validation import SUPPORTED_SIGNALS, normalize_condition
+
+from tests.conftest import make_user
+
+MIGRATION = Path(__file__).resolve().parents[1] / "alembic" / "versions" / "2f6a9c1d7e34_add_project_search_indexes.py"
+
+
+def _migration():
+    spec = importlib.util.spec_from_file_location("search_migration", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def search(api_client, monkeypatch):
+    """GET /projects/search без БД: запрос перехватывается и компилируется под Postgres."""
+    captured = []
+
+    async def list_page(db, query, response, after_id, limit, fields):
+        captured.append(str(query.compile(dialect=postgresql.dialect())))
+        return []
+
+    monkeypatch.setattr(projects, "_list_page", list_page)
+    client = api_client(projects.router, "/projects", make_user(2))
+
+    def run(**params):
+        response = client.get("/projects/search", params=params)
+        assert response.status_code == 200, response.text
+        return captured.pop()
+
+    return run
+
+
+def test_migration_matches_model_expressions():
+    migration = _migration()
+    assert migration.SEARCH_DOCUMENT == project_model.PROJECT_SEARCH_DOCUMENT_SQL
+    assert migration.STATE_COUNT == project_model.PROJECT_STATE_COUNT_SQL
+    assert migration.TRANSITION_COUNT == project_model.PROJECT_TRANSITION_COUNT_SQL
+    assert migration.UNSUPPORTED_CONDITION == project_model.PROJECT_UNSUPPORTED_CONDITION_SQL
+
+
+@pytest.mark.parametrize("params, expression", [
+    ({"q": "лифт"}, project_model.PROJECT_SEARCH_DOCUMENT_SQL),
+    ({"min_states": 2}, project_model.PROJECT_STATE_COUNT_SQL),
+    ({"max_states": 9}, project_model.PROJECT_STATE_COUNT_SQL),
+    ({"min_transitions": 1}, project_model.PROJECT_TRANSITION_COUNT_SQL),
+    ({"max_transitions": 5}, project_model.PROJECT_TRANSITION_COUNT_SQL),
+    ({"unsupported_conditions": "true"}, project_model.PROJECT_UNSUPPORTED_CONDITION_SQL),
+])
+def test_filters_use_index_expressions_verbatim(search, params, expression):
+    assert expression in search(**params)
+
+
+def test_query_shapes(search):
+    sql = search(q="лифт OR кабина")
+    assert "@@ websearch_to_tsquery('russian'::regconfig, %(websearch_to_tsquery_1)s" in sql
+
+    sql = search(min_states=2, max_states=9)
+    assert f"{project_model.PROJECT_STATE_COUNT_SQL} >= %(" in sql
+    assert f"{project_model.PROJECT_STATE_COUNT_SQL} <= %(" in sql
+
+    # state_id / condition — containment по config (GIN jsonb_path_ops)
+    assert "projects.config @> %(config_1)s" in search(state_id="IDLE_CLOSED")
+    assert "projects.config @> %(config_1)s" in search(condition="tick")
+
+    assert "projects.status = %(status_1)s" in search(status="submitted")
+
+    # false — не частичный индекс, а его отрицание (и проекты без config)
+    sql = search(unsupported_conditions="false")
+    # NOT в Postgres слабее @?, скобки не нужны
+    assert f"projects.config IS NULL OR NOT {project_model.PROJECT_UNSUPPORTED_CONDITION_SQL}" in sql
+
+    # студент видит только свои проекты
+    assert "projects.owner_id = %(owner_id_1)s" in search()
+
+
+def test_validation(api_client):
+    client = api_client(projects.router, "/projects", make_user(2))
+    assert client.get("/projects/search", params={"q": ""}).status_code == 422
+    assert client.get("/projects/search", params={"min_states": -1}).status_code == 422
+    assert client.get("/projects/search", params={"status": "lost"}).status_code == 422
+
+
+def _unsupported_regex() -> re.Pattern:
+    """Регулярное выражение из jsonpath like_regex, в синтаксисе Python."""
+    body = re.search(r'like_regex "(.*?)" flag', project_model.PROJECT_UNSUPPORTED_CONDITION_SQL).group(1)
+    return re.compile(body.replace("\\\\", "\\"), re.IGNORECASE)
+
+
+def test_unsupported_condition_regex_follows_supported_signals():
+    supported = _unsupported_regex()
+    alternatives = set(re.search(r"\((.*)\)\?", supported.pattern).group(1).split("|"))
+    assert {a.replace("\\", "") for a in alternatives} | {""} == SUPPORTED_SIGNALS
+
+    conditions = ["tick", " TICK ", "\tAlways\n", "*", "", "  ", "Door_Timer_Expired",
+                  "call", "tick2", "floor == 2", "**", "always tick"]
+    for condition in conditions:
+        expected = normalize_condition(condition) in SUPPORTED_SIGNALS
+        assert bool(supported.search(condition)) == expected, condition
@@ -0,0 +1,124 @@
+# tests/test_rtl_simulation.py
+import random
+
+import numpy as np
+import pytest
+
+from app import schemas
+from app.schemas.project import ElevatorConfig
+from app.services.fsm_validation import UNCONDITIONAL
+from app.services.rtl_simulation import (
+    RTL_SIGNALS,
+    compile_rtl,
+    cross_check_with_simulation,
+    pack_inputs,
+    run_rtl,
+)
+from app.services.simulation import SimulationValidationError
+
+from tests.conftest import random_fsm, random_scenario
+
+
+def _rtl_fsm(rng, event_types=(None,)):
+    """FSM, условия которого — входные сигналы модуля или безусловные переходы."""
+    data = random_fsm(rng)
+    for tr in data["transitions"]:
+        tr["condition"] = rng.choice(RTL_SIGNALS + ["*", "", "unknown_wire"])
+        tr["event_type"] = rng.choice(event_types)
+    return schemas.FSMDefinition.model_validate(data)
+
+
+def _reference_step(model, state, active):
+    """Один такт по Verilog-семантике: первый сработавший переход в порядке приоритета."""
+    compiled = model.compiled
+    for tr_idx in compiled.outgoing[state]:
+        tr = compiled.transitions[tr_idx]
+        cond = (tr.condition or "").strip().lower()
+        if cond in UNCONDITIONAL or cond in active:
+            return compiled.state_index.get(tr.to_state_id, state)
+    return state
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_vectorized_run_matches_scalar_reference(seed):
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(seed)
+    for _ in range(20):
+        model = compile_rtl(_rtl_fsm(rng))
+        cycles, lanes = 30, 16
+        values = {sig: np_rng.random((cycles, lanes)) < 0.3 for sig in model.signals}
+        inputs = pack_inputs(model, values) if values else np.zeros((cycles, lanes), dtype=np.int32)
+        reset = np_rng.random((cycles, lanes)) < 0.05
+
+        trace = run_rtl(model, inputs, reset=reset)
+        assert trace.shape == (cycles, lanes)
+        assert np.array_equal(run_rtl(model, inputs, reset=reset, record=False), trace[-1])
+
+        for lane in range(lanes):
+            state = model.initial_index
+            for t in range(cycles):
+                active = {sig for sig in model.signals if values[sig][t, lane]}
+                state = _reference_step(model, state, active)
+                if reset[t, lane]:
+                    state = model.initial_index
+                assert trace[t, lane] == state
+
+
+def test_only_used_signals_become_ports():
+    fsm = schemas.FSMDefinition.model_validate({
+        "type": "mealy",
+        "states": [{"id": "a", "name": "a", "is_initial": True}, {"id": "b", "name": "b"}],
+        "transitions": [
+            {"id": "t1", "from_state_id": "a", "to_state_id": "b", "condition": "tick"},
+            {"id": "t2", "from_state_id": "b", "to_state_id": "a", "condition": "Call_Received"},
+        ],
+    })
+    model = compile_rtl(fsm)
+    assert model.signals == ["call_received", "tick"]
+    assert model.table.tolist() == [[0, 0, 1, 1], [1, 0, 1, 0]]
+    assert pack_inputs(model, {"tick": np.array([1, 0, 1])}).tolist() == [2, 0, 2]
+    assert model.register_codes().tolist() == [0, 1]
+
+
+def test_cross_check_agrees_when_event_types_are_not_used():
+    rng = random.Random(35)
+    config = ElevatorConfig(floors=6, door_time=1, move_time=1, capacity=8)
+    checked = 0
+    for _ in range(40):
+        fsm = _rtl_fsm(rng)
+        scenarios = [schemas.Scenario.model_validate(random_scenario(rng, 6)) for _ in range(3)]
+        try:
+            result = cross_check_with_simulation(fsm, config, scenarios)
+        except SimulationValidationError:
+            continue
+        checked += 1
+        assert result.events == sum(len(sc.events) for sc in scenarios)
+        assert result.mismatches_total == 0
+    assert checked > 10
+
+
+def test_cross_check_reports_event_type_mismatches():
+    # event_type в железе не виден: на таймере RTL уйдёт в moving_up, симуляция — нет
+    fsm = schemas.FSMDefinition.model_validate({
+        "type": "mealy",
+        "states": [
+            {"id": "idle", "name": "idle", "is_initial": True},
+            {"id": "moving_up", "name": "moving_up"},
+        ],
+        "transitions": [
+            {"id": "t1", "from_state_id": "idle", "to_state_id": "moving_up", "condition": "*", "event_type": "call"},
+        ],
+    })
+    config = ElevatorConfig(floors=3, door_time=1, move_time=1, capacity=8)
+    scenario = schemas.Scenario.model_validate({"events": [
+        {"time": 0, "floor": 1, "direction": "none", "type": "timer"},
+        {"time": 0, "floor": 0, "direction": "none", "type": "sensor"},
+        {"time": 1, "floor": 2, "direction": "up", "type": "call"},
+    ]})
+    result = cross_check_with_simulation(fsm, config, [scenario], max_mismatches=1)
+    assert result.events == 3
+    assert result.mismatches_total == 2
+    [first] = result.mismatches
+    assert (first.scenario_index, first.event_index, first.time) == (0, 0, 0)
+    assert (first.state_id, first.simulation_state_id, first.rtl_state_id) == ("idle", "idle", "moving_up")
+    assert cross_check_with_simulation(fsm, config, []).events == 0
@@ -0,0 +1,68 @@
+# tests/test_simulation_api.py
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import simulation
+
+UNSAFE_FSM = {
+    "type": "mealy",
+    "states": [
+        {"id": "idle", "name": "idle", "is_initial": True},
+        {"id": "doors_open", "name": "doors_open"},
+        {"id": "moving_up", "name": "moving_up"},
+    ],
+    "transitions": [
+        {"id": "t1", "from_state_id": "idle", "to_state_id": "doors_open", "condition": "*", "event_type": "call"},
+        {"id": "t2", "from_state_id": "doors_open", "to_state_id": "moving_up", "condition": "*", "event_type": "timer"},
+    ],
+}
+EVENTS = [
+    {"time": 0, "floor": 2, "direction": "up", "type": "call"},
+    {"time": 3, "floor": 2, "direction": "none", "type": "timer"},
+]
+ELEVATOR = {"floors": 5, "door_time": 2, "move_time": 1, "capacity": 8}
+
+
+@pytest.fixture(scope="module")
+def client():
+    # только роутер симуляции: эндпоинты без авторизации и без БД
+    app = FastAPI()
+    app.include_router(simulation.router, prefix="/simulation")
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.mark.parametrize("compiled", ["false", "true"])
+def test_unsafe_fsm_is_422(client, compiled):
+    body = {"project_id": 1, "config": ELEVATOR, "fsm": UNSAFE_FSM, "scenario": {"events": EVENTS}}
+    response = client.post(f"/simulation/?compiled={compiled}", json=body)
+    assert response.status_code == 422
+    assert response.json()["detail"]["errors"][0]["transition_id"] == "t2"
+
+
+@pytest.mark.parametrize("path", ["/simulation/batch", "/simulation/rtl-check"])
+def test_unsafe_fsm_in_batch_is_422(client, path):
+    body = {"project_id": 1, "config": ELEVATOR, "fsm": UNSAFE_FSM, "scenarios": [{"events": EVENTS}]}
+    response = client.post(path, json=body)
+    assert response.status_code == 422
+    assert response.json()["detail"]["errors"][0]["transition_id"] == "t2"
+
+
+def test_compiled_endpoint_matches_interpreter(client, simulation_requests):
+    for request in simulation_requests(7, 10):
+        body = request.model_dump(mode="json")
+        interpreted = client.post("/simulation/", json=body)
+        compiled = client.post("/simulation/?compiled=true", json=body)
+        assert compiled.status_code == interpreted.status_code
+        assert compiled.json() == interpreted.json()
+
+
+def test_metrics_only_drops_the_timeline(client, simulation_requests):
+    body = simulation_requests(29, 1)[0].model_dump(mode="json")
+    full = client.post("/simulation/", json=body).json()
+    light = client.post("/simulation/?metrics_only=true", json=body).json()
+    assert full["timeline"]
+    assert light["timeline"] == []
+    assert light["metrics"] == full["metrics"]
+    assert light["coverage"] == full["coverage"]
@@ -0,0 +1,91 @@
+# tests/test_simulation_coverage.py
+import pytest
+
+from app import schemas
+from app.services.simulation import (
+    SimulationListener,
+    SimulationValidationError,
+    _SimulationEngine,
+    _ordered_events,
+    simulate,
+    simulate_batch,
+)
+from app.services.simulation_metrics import merge_coverage_reports
+
+
+class _StateLog(SimulationListener):
+    def __init__(self):
+        self.states = []
+
+    def on_state(self, time, floor, state_id, doors_open, direction):
+        self.states.append((time, state_id))
+
+
+def _run(request):
+    """Прогон движка с записью всех смен состояния (точное время, без округления)."""
+    log = _StateLog()
+    engine = _SimulationEngine(request.fsm, request.config, listener=log)
+    try:
+        for ev in _ordered_events(request.scenario.events):
+            engine.step(ev)
+    except SimulationValidationError:
+        return None, None
+    return engine.coverage_report(), log.states
+
+
+def test_counters_match_the_state_stream(simulation_requests):
+    checked = 0
+    for request in simulation_requests(28, 60):
+        report, states = _run(request)
+        if report is None:
+            continue
+        checked += 1
+        known = {st.id for st in request.fsm.states}
+        visits = dict.fromkeys(known, 0)
+        time = dict.fromkeys(known, 0.0)
+        previous = None
+        for (start, state_id), (end, _) in zip(states, states[1:] + [states[-1]]):
+            if state_id in known:
+                time[state_id] += end - start
+                if state_id != previous:
+                    visits[state_id] += 1
+            previous = state_id
+
+        assert report.events == len(request.scenario.events)
+        assert sum(tr.hits for tr in report.transitions) + report.soft_mode_hits + report.unhandled_events == report.events
+        assert report.total_time == pytest.approx(states[-1][0] - states[0][0])
+        assert {st.state_id: st.visits for st in report.states} == visits
+        for st in report.states:
+            assert st.time == pytest.approx(time[st.state_id])
+        assert 0.0 <= report.idle_ratio <= 1.0
+        hit = sum(1 for tr in report.transitions if tr.hits)
+        assert report.transition_coverage == (hit / len(report.transitions) if report.transitions else 0.0)
+    assert checked > 20
+
+
+def test_batch_coverage_is_the_sum_of_runs(simulation_requests):
+    requests = simulation_requests(29, 30)[::3]  # FSM эталонного проекта
+    base = requests[0]
+    batch = schemas.SimulationBatchRequest(
+        project_id=1, config=base.config, fsm=base.fsm, scenarios=[r.scenario for r in requests],
+    )
+    singles = [
+        simulate(schemas.SimulationRequest(project_id=1, config=base.config, fsm=base.fsm, scenario=r.scenario)).coverage
+        for r in requests
+    ]
+    result = simulate_batch(batch)
+
+    assert result.coverage == merge_coverage_reports(singles)
+    assert result.coverage.runs == len(requests) == len(result.metrics)
+    assert result.coverage.events == sum(len(r.scenario.events) for r in requests)
+
+
+def test_merge_adds_hits_and_keeps_coverage(simulation_requests):
+    report = simulate(simulation_requests(3, 1)[0]).coverage
+    doubled = merge_coverage_reports([report, report])
+    assert doubled.runs == 2
+    assert [tr.hits for tr in doubled.transitions] == [2 * tr.hits for tr in report.transitions]
+    assert [st.visits for st in doubled.states] == [2 * st.visits for st in report.states]
+    assert doubled.transition_coverage == report.transition_coverage
+    assert doubled.idle_ratio == pytest.approx(report.idle_ratio)
+    assert merge_coverage_reports([]).runs == 0
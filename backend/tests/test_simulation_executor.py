@@ -0,0 +1,176 @@
+# tests/test_simulation_executor.py
+import asyncio
+import threading
+
+import pytest
+
+from app.services.simulation_executor import SimulationExecutor, SimulationRejected
+
+
+async def _hold(ex, user, cost, gate, entered, reservation=None):
+    """Занимает слот исполнителя, пока не откроется gate."""
+    async with ex.slot(user, cost, reservation=reservation):
+        entered.append(user)
+        await gate.wait()
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_slots_are_granted_round_robin_between_users():
+    async def scenario():
+        ex = SimulationExecutor(workers=1, queue_limit=10, per_user_limit=10)
+        gate = asyncio.Event()
+        entered = []
+        order = []
+
+        async def job(user):
+            async with ex.slot(user, 10):
+                order.append(user)
+
+        holder = asyncio.create_task(_hold(ex, "a", 10, gate, entered))
+        await _settle()
+        jobs = [asyncio.create_task(job(user)) for user in ["a", "a", "a", "b", "b"]]
+        await _settle()
+        assert ex.stats()["running"] == 1
+        assert ex.stats()["queued"] == 5
+        gate.set()
+        await asyncio.gather(holder, *jobs)
+        return order, ex.stats()
+
+    order, stats = asyncio.run(scenario())
+    # пачка пользователя a не задерживает b
+    assert order == ["a", "b", "a", "b", "a"]
+    assert stats["running"] == 0 and stats["queued"] == 0
+
+
+def test_too_many_runs_per_user_is_429():
+    async def scenario():
+        ex = SimulationExecutor(workers=1, queue_limit=10, per_user_limit=2)
+        gate = asyncio.Event()
+        entered = []
+        tasks = [asyncio.create_task(_hold(ex, "a", 10, gate, entered)) for _ in range(2)]
+        await _settle()
+        with pytest.raises(SimulationRejected) as rejected:
+            async with ex.slot("a", 10):
+                pass
+        # другой пользователь при этом допускается
+        tasks.append(asyncio.create_task(_hold(ex, "b", 10, gate, entered)))
+        await _settle()
+        gate.set()
+        await asyncio.gather(*tasks)
+        return rejected.value, ex.stats(), entered
+
+    rejected, stats, entered = asyncio.run(scenario())
+    assert rejected.status_code == 429
+    assert rejected.retry_after >= 1
+    assert stats["rejected_user"] == 1
+    assert sorted(entered) == ["a", "a", "b"]
+
+
+@pytest.mark.parametrize("limits", [{"queue_limit": 1}, {"queue_limit": 10, "queue_max_cost": 15}])
+def test_full_queue_is_503(limits):
+    async def scenario():
+        ex = SimulationExecutor(workers=1, per_user_limit=10, **limits)
+        gate = asyncio.Event()
+        entered = []
+        tasks = [asyncio.create_task(_hold(ex, user, 10, gate, entered)) for user in ("a", "b")]
+        await _settle()
+        with pytest.raises(SimulationRejected) as rejected:
+            ex.admit("c", 10)
+        gate.set()
+        await asyncio.gather(*tasks)
+        return rejected.value, ex.stats()
+
+    rejected, stats = asyncio.run(scenario())
+    assert rejected.status_code == 503
+    assert stats["rejected_busy"] == 1
+    assert stats["queued_cost"] == 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        ex = SimulationExecutor(workers=1, queue_limit=10, per_user_limit=10)
+        gate = asyncio.Event()
+        entered = []
+        holder = asyncio.create_task(_hold(ex, "a", 10, gate, entered))
+        waiter = asyncio.create_task(_hold(ex, "b", 10, gate, entered))
+        await _settle()
+        assert ex.stats()["queued"] == 1
+        waiter.cancel()
+        await _settle()
+        queued = ex.stats()["queued"]
+        gate.set()
+        await holder
+        return queued, ex.stats(), entered, ex._per_user
+
+    queued, stats, entered, per_user = asyncio.run(scenario())
+    assert queued == 0
+    assert entered == ["a"]
+    assert stats["running"] == 0
+    assert not per_user
+
+
+def test_admit_reserves_until_slot_or_release():
+    async def scenario():
+        ex = SimulationExecutor(workers=1, queue_limit=1, per_user_limit=1)
+        gate = asyncio.Event()
+        entered = []
+        first = ex.admit("a", 10)
+        # резерв уже занят: второй запрос того же пользователя — 429,
+        # хотя первый ещё не дошёл до slot()
+        with pytest.raises(SimulationRejected) as per_user:
+            ex.admit("a", 10)
+        second = ex.admit("b", 10)
+        # место в очереди тоже зарезервировано
+        with pytest.raises(SimulationRejected) as busy:
+            ex.admit("c", 10)
+        holder = asyncio.create_task(_hold(ex, "a", 10, gate, entered, reservation=first))
+        await _settle()
+        ex.release(second)  # b так и не начал
+        ex.release(second)
+        gate.set()
+        await holder
+        with pytest.raises(RuntimeError):
+            async with ex.slot("a", 10, reservation=first):
+                pass
+        return per_user.value, busy.value, ex.stats(), ex._per_user, entered
+
+    per_user, busy, stats, counts, entered = asyncio.run(scenario())
+    assert per_user.status_code == 429
+    assert busy.status_code == 503
+    assert entered == ["a"]
+    assert stats["running"] == 0 and stats["queued"] == 0
+    assert not counts
+
+
+def test_cheap_runs_bypass_the_queue():
+    async def scenario():
+        ex = SimulationExecutor(workers=1, queue_limit=0, per_user_limit=0, inline_cost=100)
+        ex.admit("a", 100)
+        async with ex.slot("a", 100):
+            pass
+        result = await ex.run("a", 100, threading.current_thread)
+        return result, ex.stats()
+
+    thread, stats = asyncio.run(scenario())
+    assert thread is not threading.main_thread()
+    assert stats["inline"] == 2
+    assert stats["completed"] == 0
+
+
+def test_run_uses_the_process_pool():
+    async def scenario():
+        ex = SimulationExecutor(workers=1, queue_limit=10, per_user_limit=4)
+        try:
+            results = await asyncio.gather(*(ex.run("a", 10, pow, 2, n) for n in range(4)))
+        finally:
+            ex.shutdown()
+        return results, ex.stats()
+
+    results, stats = asyncio.run(scenario())
+    assert results == [1, 2, 4, 8]
+    assert stats["completed"] == 4
+    assert stats["running"] == 0
@@ -0,0 +1,119 @@
+# tests/test_simulation_metrics.py
+import math
+import random
+import tracemalloc
+
+import pytest
+
+from app import schemas
+from app.schemas.scenario import Direction
+from app.services.simulation import SimulationValidationError, simulate
+from app.services.simulation_metrics import QuantileSketch, WaitTimeMetrics
+
+
+def _exact(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+@pytest.mark.parametrize("q", [0.5, 0.9, 0.99])
+def test_sketch_quantiles_within_relative_accuracy(q):
+    rng = random.Random(1)
+    values = [rng.lognormvariate(2, 1.5) for _ in range(20000)]
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+    exact = _exact(values, q)
+    assert sketch.quantile(q) == pytest.approx(exact, rel=0.011)
+
+
+def test_sketch_bins_stay_bounded_and_keep_upper_quantiles():
+    rng = random.Random(2)
+    values = [10 ** rng.uniform(-6, 6) for _ in range(50000)]
+    sketch = QuantileSketch(relative_accuracy=0.001, max_bins=256)
+    for value in values:
+        sketch.add(value)
+        assert len(sketch._bins) <= sketch.max_bins
+    assert sketch.count == len(values)
+    # схлопываются только младшие корзины, верхние квантили точны
+    assert sketch.quantile(0.99) == pytest.approx(_exact(values, 0.99), rel=0.002)
+    assert sketch.max == max(values)
+
+
+def test_sketch_merge_matches_single_sketch():
+    rng = random.Random(3)
+    values = [rng.expovariate(0.1) for _ in range(5000)]
+    whole, left, right = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for i, value in enumerate(values):
+        whole.add(value)
+        (left if i % 2 else right).add(value)
+    left.merge(right)
+    assert left.count == whole.count
+    for q in (0.5, 0.9, 0.99):
+        assert left.quantile(q) == whole.quantile(q)
+
+
+def test_sketch_handles_zero_and_empty():
+    sketch = QuantileSketch()
+    assert sketch.quantile(0.5) == 0.0
+    for _ in range(10):
+        sketch.add(0.0)
+    sketch.add(5.0)
+    assert sketch.quantile(0.5) == 0.0
+    assert sketch.quantile(1.0) == 5.0
+
+
+def test_wait_metrics_count_calls_outside_building():
+    metrics = WaitTimeMetrics(floors=3)
+    metrics.add(2.0, 0, Direction.UP)
+    metrics.add(4.0, 3, Direction.DOWN)
+    metrics.add(6.0, 4, Direction.UP)
+    metrics.add(8.0, -1, Direction.NONE)
+
+    result = metrics.to_schema(total_moves=7)
+
+    assert result.total_moves == 7
+    assert result.stops == 4
+    assert result.avg_wait_time == pytest.approx(5.0)
+    assert result.max_wait_time == 8.0
+    assert result.calls_outside_floors == 2
+    assert [(s.floor, s.calls) for s in result.wait_by_floor] == [(0, 1), (3, 1)]
+    assert sum(s.calls for s in result.wait_by_direction) == 4
+    assert not math.isnan(result.p99_wait_time)
+
+
+def test_metrics_only_matches_full_run(simulation_requests):
+    compared = 0
+    for request in simulation_requests(29, 60):
+        try:
+            full = simulate(request)
+        except SimulationValidationError:
+            continue
+        light = simulate(request, metrics_only=True)
+        assert light.timeline == []
+        assert light.metrics == full.metrics
+        assert light.coverage == full.coverage
+        compared += 1
+    assert compared > 20
+
+
+def test_metrics_only_memory_does_not_grow_with_scenario(sample_config):
+    def peak(n):
+        events = [{"time": i, "floor": (i * 7) % 6, "direction": "up", "type": "call"} for i in range(n)]
+        request = schemas.SimulationRequest(
+            project_id=1,
+            config={"floors": 6, "door_time": 1, "move_time": 1, "capacity": 8},
+            fsm=sample_config.fsm,
+            scenario={"events": events},
+        )
+        tracemalloc.start()
+        try:
+            simulate(request, metrics_only=True)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    small, large = peak(1000), peak(4000)
+    # таймлайн на 4000 событий занимал бы ~20 МБ
+    assert large < 256 * 1024
+    assert large < small * 1.5
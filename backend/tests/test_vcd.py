@@ -0,0 +1,120 @@
+# tests/test_vcd.py
+import pytest
+
+from app import schemas
+from app.schemas.fsm import StateEncoding
+from app.services.cosimulation import VCDReader
+from app.services.fsm_verilog import state_encoding
+from app.services.simulation import SimulationListener, SimulationValidationError, _SimulationEngine, _ordered_events
+from app.services.vcd import VCDWriter, stream_simulation_vcd
+
+
+class _StateLog(SimulationListener):
+    def __init__(self):
+        self.states = []
+
+    def on_state(self, time, floor, state_id, doors_open, direction):
+        self.states.append((state_id, floor, int(doors_open)))
+
+
+def _expected(request):
+    """Смены (state, floor, doors_open) так, как их видит движок симуляции."""
+    log = _StateLog()
+    engine = _SimulationEngine(request.fsm, request.config, record_timeline=False, listener=log)
+    try:
+        for ev in _ordered_events(request.scenario.events):
+            engine.step(ev)
+    except SimulationValidationError:
+        return None
+    return log.states
+
+
+def _dedup(values):
+    result = []
+    for value in values:
+        if not result or result[-1] != value:
+            result.append(value)
+    return result
+
+
+def _write(tmp_path, request, encoding=StateEncoding.BINARY, **kwargs):
+    path = tmp_path / "run.vcd"
+    path.write_text("".join(stream_simulation_vcd(request, "lift", encoding, **kwargs)), encoding="utf-8")
+    return path
+
+
+@pytest.mark.parametrize("encoding", list(StateEncoding))
+def test_vcd_round_trip(tmp_path, simulation_requests, encoding):
+    checked = 0
+    for request in simulation_requests(36, 30):
+        states = _expected(request)
+        if states is None:
+            continue
+        checked += 1
+        codes = state_encoding(request.fsm, encoding)
+        with open(_write(tmp_path, request, encoding), "rb") as file, VCDReader(file) as reader:
+            assert reader.timescale == "1ms"
+            columns = {}
+            for name in ("state", "floor", "doors_open"):
+                changes = list(reader.changes(reader.find(f"lift.{name}")))
+                times = [time for time, _ in changes]
+                assert times == sorted(times)
+                columns[name] = [value for _, value in changes]
+
+        # id вне FSM (служебные состояния цикла дверей) пишутся как x
+        expected_state = _dedup([
+            "x" if codes.get(state_id) is None else format(codes[state_id], "b")
+            for state_id, _, _ in states
+        ])
+        assert [value.lstrip("0") or "0" for value in columns["state"]] == expected_state
+        assert [int(value, 2) for value in columns["floor"]] == _dedup([floor for _, floor, _ in states])
+        assert [int(value) for value in columns["doors_open"]] == _dedup([doors for _, _, doors in states])
+    assert checked > 10
+
+
+def test_flush_size_does_not_change_the_dump(simulation_requests):
+    request = simulation_requests(3, 1)[0]
+    whole = "".join(stream_simulation_vcd(request, "lift"))
+    chunks = list(stream_simulation_vcd(request, "lift", flush_every=1))
+    assert len(chunks) > 3
+    drop_date = lambda text: text.split("\n", 1)[1]
+    assert drop_date("".join(chunks)) == drop_date(whole)
+
+
+def test_header_declares_every_signal(sample_config):
+    writer = VCDWriter(sample_config.fsm, floors=9, module_name="lift", encoding=StateEncoding.ONE_HOT)
+    header = writer.header()
+    assert f"$var reg {len(sample_config.fsm.states)} ! state $end" in header
+    assert '$var reg 4 " floor $end' in header
+    assert header.endswith("$enddefinitions $end\n")
+    assert len(set(writer.ids.values())) == len(writer.ids)
+    assert [VCDWriter._identifier(i) for i in (0, 93, 94, 95)] == ["!", "~", "!!", '"!']
+
+
+def test_simulation_error_ends_the_dump_with_a_comment():
+    # doors_open -> moving_up: симуляция падает посреди уже начатого ответа
+    fsm = {
+        "type": "mealy",
+        "states": [
+            {"id": "idle", "name": "idle", "is_initial": True},
+            {"id": "doors_open", "name": "doors_open"},
+            {"id": "moving_up", "name": "moving_up"},
+        ],
+        "transitions": [
+            {"id": "t1", "from_state_id": "idle", "to_state_id": "doors_open", "condition": "*", "event_type": "call"},
+            {"id": "t2", "from_state_id": "doors_open", "to_state_id": "moving_up", "condition": "*", "event_type": "timer"},
+        ],
+    }
+    events = [
+        {"time": 0, "floor": 2, "direction": "up", "type": "call"},
+        {"time": 3, "floor": 2, "direction": "none", "type": "timer"},
+    ]
+    request = schemas.SimulationRequest(
+        project_id=1,
+        config={"floors": 5, "door_time": 2, "move_time": 1, "capacity": 8},
+        fsm=fsm,
+        scenario={"events": events},
+    )
+    text = "".join(stream_simulation_vcd(request, "lift"))
+    assert text.rstrip().splitlines()[-1].startswith("$comment ")
+    assert "t2" in text.rstrip().splitlines()[-1]
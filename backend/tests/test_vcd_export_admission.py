@@ -0,0 +1,92 @@
+# tests/test_vcd_export_admission.py
+"""
+Потоковый VCD-экспорт резервирует место исполнителя в admit(): параллельные
+запросы не проскакивают лимит до старта генератора, а резерв возвращается
+и при отключении клиента до чтения тела.
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import ClientDisconnect
+
+from app import schemas
+from app.api.v1.endpoints import projects
+from app.services.simulation_executor import SimulationExecutor
+
+USER = SimpleNamespace(id=7)
+SCOPE = {"type": "http", "asgi": {"spec_version": "2.4"}}
+
+
+@pytest.fixture
+def executor(monkeypatch, simulation_requests):
+    ex = SimulationExecutor(workers=1, queue_limit=4, per_user_limit=1)
+    request = simulation_requests(5, 1)[0]
+
+    async def fake_request(project_id, payload, db, current_user):
+        return request
+
+    monkeypatch.setattr(projects, "simulation_executor", ex)
+    monkeypatch.setattr(projects, "_project_simulation_request", fake_request)
+    return ex
+
+
+def _export():
+    return projects.export_simulation_vcd(
+        1, None, schemas.StateEncoding.BINARY, db=None, current_user=USER,
+    )
+
+
+async def _receive():
+    await asyncio.Event().wait()
+
+
+def test_concurrent_exports_respect_the_per_user_limit(executor):
+    async def scenario():
+        first = await _export()
+        # первый ответ ещё не начат, но место уже занято
+        with pytest.raises(HTTPException) as rejected:
+            await _export()
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        await first(SCOPE, _receive, send)
+        third = await _export()
+        await third(SCOPE, _receive, send)
+        return rejected.value, sent
+
+    rejected, sent = asyncio.run(scenario())
+    assert rejected.status_code == 429
+    assert int(rejected.headers["Retry-After"]) >= 1
+    body = b"".join(message.get("body", b"") for message in sent)
+    assert body.count(b"$enddefinitions") == 2
+    assert executor.stats()["running"] == 0
+    assert executor.stats()["rejected_user"] == 1
+    assert not executor._per_user
+
+
+@pytest.mark.parametrize("sent_before_disconnect", [0, 2])
+def test_disconnect_returns_the_reservation(executor, sent_before_disconnect):
+    async def scenario():
+        response = await _export()
+        assert executor._per_user[USER.id] == 1
+        sent = []
+
+        async def send(message):
+            if len(sent) == sent_before_disconnect:
+                raise OSError("client went away")
+            sent.append(message)
+
+        with pytest.raises(ClientDisconnect):
+            await response(SCOPE, _receive, send)
+        # резерв вернулся: следующий экспорт допускается
+        follow_up = await _export()
+        executor.release(follow_up.reservation)
+
+    asyncio.run(scenario())
+    assert executor.stats()["running"] == 0
+    assert executor.stats()["rejected_user"] == 0
+    assert not executor._per_user